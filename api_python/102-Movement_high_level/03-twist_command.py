@@ -12,7 +12,6 @@
 #
 ###
 
-from itertools import zip_longest
 import numpy as np
 
 import sys
@@ -27,6 +26,11 @@ from kortex_api.autogen.messages.Common_pb2 import ModeSelection, OperatingModeT
 
 # The following code is used to execute Actions and TwistCommands. It also shows how to send a stream of twist commands
 
+# Real-time settings of the streaming loop (Linux only): CPU to pin it to and SCHED_FIFO priority (1 to 99).
+# None leaves the setting unchanged. The garbage collector is disabled while streaming.
+REALTIME_CPU = None
+REALTIME_PRIORITY = None
+
 # This function is part of a mechanism that waits for the previous program to finish before starting a new one
 def wait_for_completed(e):
     def check(notif, e=e):
@@ -111,45 +115,42 @@ def example_twist_command(base):
     return True
 
 
-# This function configures a twist command
-def fill_twist_command(twist):
-
-    twistcmd = Base_pb2.TwistCommand()
-    descriptor = twistcmd.twist.DESCRIPTOR.fields_by_name.keys()
-
-    twistcmd.reference_frame = (Base_pb2.CartesianReferenceFrame.CARTESIAN_REFERENCE_FRAME_BASE)
-    twistcmd.duration = 2  # seconds
-
-    for field, cmd in zip_longest(descriptor, twist):
-        if cmd is not None:
-            setattr(twistcmd.twist, field, float(cmd))
-        else:
-            setattr(twistcmd.twist, field, 0.0)
-
-    return twistcmd
+# This function builds the twist commands of a sine trajectory on the z axis, all at once before streaming them
+def build_commands(duration):
 
-
-# This function generates multiple twist commands by using the fill_twist_command function to configure them
-def yield_commands(duration):
+    # The helper module is found through the path set by main()
+    import command_batch
 
     nframe = duration * 40
     t = np.linspace(0.0, 4 * 2 * np.pi, nframe)
-    z = np.sin(t) * 0.2
-    for zt in z:
-        yield fill_twist_command([0.0, 0.0, zt])
+    twists = np.zeros((nframe, len(command_batch.TWIST_FIELDS)))
+    twists[:, 2] = np.sin(t) * 0.2  # linear_z, in m/s
+
+    return command_batch.twist_commands(twists, Base_pb2.CartesianReferenceFrame.CARTESIAN_REFERENCE_FRAME_BASE, duration=2)
 
 
-# This function runs a trajectory defined by cartesian velocities by the yield_commands function
+# This function runs a trajectory defined by cartesian velocities built by the build_commands function
+# The commands are submitted every 25 ms on absolute deadlines and sent by the thread of a CommandStreamer, so a slow
+# SendTwistCommand neither stretches the period nor delays the next commands. The robot is stopped if the loop stalls.
 def example_twist_stream(duration, base):
 
+    # The helper modules are found through the path set by main()
+    import periodic_loop
+    import command_streamer
+
+    # The whole stream is built before the first command is sent
+    commands = build_commands(duration)
+
     # Twist commands only work in JOG_MANUAL mode
     change_operating_mode(base, "OPERATING_MODE_JOG_MANUAL")
 
-    FREQ = 1 / 40
-    for twist_cmd in yield_commands(duration):
+    PERIOD = 1 / 40
+    realtime = periodic_loop.RealTime(cpu=REALTIME_CPU, priority=REALTIME_PRIORITY)
+    jitter_report, streamer_report = command_streamer.play(commands, base.SendTwistCommand, PERIOD, stop=base.Stop, realtime=realtime)
 
-        base.SendTwistCommand(twist_cmd)
-        time.sleep(FREQ)
+    print(jitter_report)
+    print(streamer_report)
+    print(realtime)
 
     return True
 
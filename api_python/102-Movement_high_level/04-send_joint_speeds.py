@@ -18,7 +18,7 @@ import time
 import threading
 
 from kortex_api.autogen.client_stubs.BaseClientRpc import BaseClient
-from kortex_api.autogen.messages import Base_pb2, ProgramRunner_pb2, Common_pb2
+from kortex_api.autogen.messages import ProgramRunner_pb2, Common_pb2
 from kortex_api.autogen.messages.Common_pb2 import (
     ModeSelection,
     NotificationOptions,
@@ -31,6 +31,16 @@ from kortex_api.autogen.client_stubs.ProgramRunnerClientRpc import ProgramRunner
 # Actuator speed (deg/s)
 SPEED = 20.0
 
+# Speed profile limits (deg/s^2 and deg/s^3) and command rate (Hz)
+MAX_ACCELERATION = 40.0
+MAX_JERK = 200.0
+RATE = 40
+
+# Real-time settings of the streaming loop (Linux only): CPU to pin it to and SCHED_FIFO priority (1 to 99).
+# None leaves the setting unchanged. The garbage collector is disabled while streaming.
+REALTIME_CPU = None
+REALTIME_PRIORITY = None
+
 # This function is part of a mechanism that waits for the previous program to finish before starting a new one
 def wait_for_completed(e):
     def check(notif, e=e):
@@ -103,39 +113,51 @@ def example_move_to_home_position(base, program_runner):
     return True
 
 
-# This function sends a command containing velocities to the joints
-def example_send_joint_speeds(base):
-
-    # Set robot mode to JOG_MANUAL in order to execute a Joint Speed Command
-    change_operating_mode(base, "OPERATING_MODE_JOG_MANUAL")
+# This function builds the joint speed commands of a jerk-limited profile, all at once before streaming them
+def build_commands():
 
-    # Create joint speeds
-    joint_speeds = Base_pb2.JointSpeeds()
+    # The helper modules are found through the path set by main()
+    import speed_profile
+    import command_batch
 
-    # The robot will alternate between 4 spins, each for 2.5 seconds
+    # The robot alternates between 4 spins, each for 2.5 seconds, then stops
+    segments = []
     for times in range(4):
-
-        del joint_speeds.joint_speeds[:]
-        # The code below allows us to send a joint speed movement followed by the opposite of said movement
+        # A joint speed movement is followed by the opposite of said movement
         if times % 2:
             speeds = [-SPEED, 0.0, 0.0, SPEED, 0.0, 0.0]
         else:
             speeds = [SPEED, 0.0, 0.0, -SPEED, 0.0, 0.0]
+        segments.append((speeds, 2.5))
+    segments.append(([0.0] * 6, 0.0))
+
+    speeds = speed_profile.jerk_limited_profile(segments, RATE, MAX_ACCELERATION, MAX_JERK)
 
-        i = 0
-        # Initializing joint speed parameters
-        for speed in speeds:
+    return command_batch.joint_speeds_commands(speeds)
 
-            joint_speed = joint_speeds.joint_speeds.add()
-            joint_speed.joint_identifier = i
-            joint_speed.value = speed
-            i = i + 1
 
-        base.SendJointSpeedsCommand(joint_speeds)
-        time.sleep(2.5)
+# This function sends a stream of commands containing velocities to the joints
+# The speeds change with limited acceleration and jerk instead of steps, and are sent at RATE by a CommandStreamer
+def example_send_joint_speeds(base):
+
+    # The helper modules are found through the path set by main()
+    import periodic_loop
+    import command_streamer
+
+    # The whole stream is built before the first command is sent
+    commands = build_commands()
+
+    # Set robot mode to JOG_MANUAL in order to execute a Joint Speed Command
+    change_operating_mode(base, "OPERATING_MODE_JOG_MANUAL")
+
+    realtime = periodic_loop.RealTime(cpu=REALTIME_CPU, priority=REALTIME_PRIORITY)
+    jitter_report, streamer_report = command_streamer.play(commands, base.SendJointSpeedsCommand, 1.0 / RATE, stop=base.Stop, realtime=realtime)
 
-    print("Stopping the robot")
-    base.Stop()
+    print(jitter_report)
+    print(streamer_report)
+    print(realtime)
+    # play() stopped the robot with base.Stop when the stream ended
+    print("Robot stopped")
 
     return True
 
@@ -12,10 +12,12 @@
 #
 ###
 
-import sys, os, numpy as np, threading, time
+import argparse, sys, os, numpy as np, threading, time
 from kortex_api.autogen.client_stubs.BaseClientRpc import BaseClient
 from kortex_api.autogen.client_stubs.ProgramRunnerClientRpc import ProgramRunnerClient
-from kortex_api.autogen.messages import Base_pb2, ProgramRunner_pb2, Common_pb2
+from kortex_api.autogen.client_stubs.ProtectionZoneClientRpc import ProtectionZoneClient
+from kortex_api.autogen.client_stubs.ToolManagerClientRpc import ToolManagerClient
+from kortex_api.autogen.messages import ProgramRunner_pb2, Common_pb2
 from kortex_api.autogen.messages.Common_pb2 import ModeSelection,OperatingModeType, CartesianReferenceFrame
 
 
@@ -93,33 +95,14 @@ def example_move_to_home_position(base, program_runner):
 
     return True
 
-# This function populates a Cartesian waypoint object with the data provided by an array of numbers
-def populate_cartesian_coordinates(waypointInformation):
-
-    # This function links the information in waypointDefinitions array to its corresponding data
-    waypoint = Base_pb2.CartesianWaypoint()
-    waypoint.pose.x = waypointInformation[0]            # in meters
-    waypoint.pose.y = waypointInformation[1]            # in meters
-    waypoint.pose.z = waypointInformation[2]            # in meters
-    waypoint.blending_radius = waypointInformation[3]   # in meters
-    waypoint.pose.theta_x = waypointInformation[4]      # in degrees
-    waypoint.pose.theta_y = waypointInformation[5]      # in degrees
-    waypoint.pose.theta_z = waypointInformation[6]      # in degrees
-    
-    # To define the reference frame of a cartesian waypoint, a CartesianReferenceFrame object must be created.
-    # The possible values of this object are defined below:
-    #CARTESIAN_REFERENCE_FRAME_UNSPECIFIED (0):   Unspecified Cartesian reference frame
-    #CARTESIAN_REFERENCE_FRAME_MIXED (1): Mixed reference frame where translation reference = base and  orientation reference = tool
-    #CARTESIAN_REFERENCE_FRAME_TOOL (2): Tool reference frame where translation reference = tool and orientation reference = tool
-    #CARTESIAN_REFERENCE_FRAME_BASE (3): Base reference frame where the translation reference = base and orientation reference = base
-
-    waypoint.reference_frame = CartesianReferenceFrame.Value("CARTESIAN_REFERENCE_FRAME_BASE")
-
-    return waypoint
-
 # This function creates a trajectory using multiple Cartesian waypoints and runs it
-def example_trajectory(base: BaseClient):
+# The waypoint list is built from an array of waypoints in one pass by command_batch.cartesian_waypoint_list(),
+# which stays fast for the thousands of waypoints of paths generated from CAD
+def example_trajectory(base: BaseClient, validator, cache):
     
+    # The helper module is found through the path set by main()
+    import command_batch
+
     change_operating_mode(base, "OPERATING_MODE_AUTO")
     
     # define the angular orientation poses of the waypoints
@@ -127,8 +110,9 @@ def example_trajectory(base: BaseClient):
     kTheta_y = 180
     kTheta_z = 90
 
-    # Array of waypoints and their information
-    waypointsDefinition = (
+    # Array of waypoints and their information, one row per waypoint, in command_batch.CARTESIAN_WAYPOINT_FIELDS order:
+    # (pose_X, pose_Y, pose_Z in meters, blending_radius in meters, pose_theta_X, pose_theta_Y, pose_theta_Z in degrees)
+    waypointsDefinition = np.array((
     (0.40, -0.10, 0.30, 0.0, kTheta_x, kTheta_y, kTheta_z), 
     (0.50, 0.0, 0.40, 0.0, kTheta_x, kTheta_y, kTheta_z), 
     (0.50, 0.35, 0.45, 0.0,kTheta_x, kTheta_y, kTheta_z),
@@ -136,27 +120,27 @@ def example_trajectory(base: BaseClient):
     (0.30, 0.30, 0.25, 0.0,kTheta_x, kTheta_y, kTheta_z),
     (0.45, -0.25, 0.40, 0.0,kTheta_x, kTheta_y, kTheta_z),
     (0.35, 0.20, 0.30, 0.0,kTheta_x, kTheta_y, kTheta_z) 
-    )
+    ))
+
+    # To define the reference frame of a cartesian waypoint, a CartesianReferenceFrame object must be created.
+    # The possible values of this object are defined below:
+    #CARTESIAN_REFERENCE_FRAME_UNSPECIFIED (0):   Unspecified Cartesian reference frame
+    #CARTESIAN_REFERENCE_FRAME_MIXED (1): Mixed reference frame where translation reference = base and  orientation reference = tool
+    #CARTESIAN_REFERENCE_FRAME_TOOL (2): Tool reference frame where translation reference = tool and orientation reference = tool
+    #CARTESIAN_REFERENCE_FRAME_BASE (3): Base reference frame where the translation reference = base and orientation reference = base
+    reference_frame = CartesianReferenceFrame.Value("CARTESIAN_REFERENCE_FRAME_BASE")
 
-    waypoint_count = len(waypointsDefinition)
+    # Check the waypoints locally first: a list failing these checks would be rejected by the robot after a round trip
+    report = validator.check_cartesian(waypointsDefinition)
+    if not report.valid:
+        print(report)
+        return
 
-    wptlist = Base_pb2.WaypointList()
-    wptlist.use_optimal_blending = True
-            
-    #Create waypoints from the waypointsDefinition array
-    array_wpts = np.array([])
-    index = 0
-    for i in range(0,waypoint_count):
-        
-        np.append(array_wpts, waypointsDefinition[i])
-        waypoint = wptlist.waypoints.add()
-        waypoint.name = "waypoint_" + str(index)
-        waypoint.cartesian_waypoint.CopyFrom(populate_cartesian_coordinates(waypointsDefinition[i]))
-        index = index + 1
-    
-    #Add waypoints to waypoint list
-    wptlist.waypoints.MergeFrom(array_wpts)
-    result = base.ValidateWaypointList(wptlist)
+    # Create the waypoints, named waypoint_0, waypoint_1, ..., from the waypointsDefinition array
+    wptlist = command_batch.cartesian_waypoint_list(waypointsDefinition, reference_frame, use_optimal_blending=True)
+
+    # The report comes from the cache when this list was already validated with the same robot configuration
+    result = cache.validate(base, wptlist)
 
     # If the list is valid, execute the waypoint list. If not, print an error
     if len(result.trajectory_error_report.trajectory_error_elements) == 0:
@@ -176,9 +160,15 @@ def main():
     # Import the utilities helper module
     sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
     import utilities
+    import trajectory_validator
+    import validation_cache
 
     # Parse arguments
-    args = utilities.parseConnectionArguments()
+    # The cache directory keeps the validation reports of the trajectories already validated by the robot, so running
+    # this example again with the same waypoints, tool and protection zones skips the validation round trip
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--cache-dir", help="directory of the validation cache", default=validation_cache.DEFAULT_DIRECTORY)
+    args = utilities.parseConnectionArguments(parser)
 
     # Create connection to the device and get the router
     with utilities.DeviceConnection.createMqttConnection(args) as router:
@@ -186,9 +176,17 @@ def main():
         # Create required services
         base = BaseClient(router)
         program_runner = ProgramRunnerClient(router)
+        protection_zone_client = ProtectionZoneClient(router)
+
+        # Local checks of the waypoints, including the protection zones configured on the robot
+        validator = trajectory_validator.TrajectoryValidator.from_protection_zones(protection_zone_client.ReadAllProtectionZones())
+
+        # Cache of the validation reports, keyed by waypoint list and by tool and protection zone configuration
+        fingerprint = validation_cache.robot_fingerprint(ToolManagerClient(router), protection_zone_client)
+        cache = validation_cache.ValidationCache(args.cache_dir, fingerprint=fingerprint)
 
         example_move_to_home_position(base, program_runner)
-        example_trajectory(base)
+        example_trajectory(base, validator, cache)
 
         return 
 
@@ -89,48 +89,33 @@ def example_move_to_home_position(base, program_runner):
 
     return True
 
-# This function populates an Angular waypoint object with the data provided by an array
-def populate_angular_coordinates(waypointInformation):
-    """
-    Populate AngularWaypoint message with provided angular coordinates and blending.
+# This function creates a trajectory using multiple angular waypoints and runs it
+# The waypoint list is built from arrays of angles and blending values in one pass by command_batch.angular_waypoint_list()
+def example_angular_trajectory(base, validator):
 
-    Args:
-        waypointInformation (tuple): Tuple containing angular coordinates (list), and blending (float).
+    # The helper module is found through the path set by main()
+    import command_batch
 
-    Returns:
-        Base_pb2.AngularWaypoint: AngularWaypoint message populated with the provided information.
-    """
-    waypoint = Base_pb2.AngularWaypoint()
-
-    # Extract values from the tuple
-    angles_list, blending = waypointInformation
-
-    # Populate AngularWaypoint fields
-    waypoint.angles.extend(map(float, angles_list))  # Array of 6 angles, in degrees
-    waypoint.blending = blending  # Blending factor, float from 0 to 1 (1 being optimal blending)
-
-    return waypoint
-def example_angular_trajectory(base):
     # Set the operating mode to AUTO
     change_operating_mode(base, "OPERATING_MODE_AUTO")
 
-    # Define waypoints with angles and blending values
-    waypointsDefinition = [
-        ([40, -22, 75, 0, 10, 20], 1),
-        ([40, -20, 70, 0, 11, 21], 1),
-        ([40, -22, 75, 0, 10, 20], 0),
-    ]
-
-    # Create a WaypointList to hold the waypoints
-    wptlist = Base_pb2.WaypointList()
-    wptlist.use_optimal_blending = True
+    # Define waypoints with angles (array of 6 angles, in degrees) and blending values
+    # (float from 0 to 1, 1 being optimal blending)
+    angles = np.array([
+        [40, -22, 75, 0, 10, 20],
+        [40, -20, 70, 0, 11, 21],
+        [40, -22, 75, 0, 10, 20],
+    ])
+    blending = np.array([1, 1, 0])
+
+    # Check the waypoints locally first: a list failing these checks would be rejected by the robot after a round trip
+    report = validator.check_angular(angles, blending)
+    if not report.valid:
+        print(report)
+        return
 
-    # Iterate over waypoints and add them to the WaypointList
-    for i, (angles, blending) in enumerate(waypointsDefinition):
-        waypoint = wptlist.waypoints.add()
-        waypoint.name = f"waypoint_{i}"
-        # Populate Angular waypoint coordinates using the provided function
-        waypoint.angular_waypoint.CopyFrom(populate_angular_coordinates((angles, blending)))
+    # Create a WaypointList holding the waypoints, named waypoint_0, waypoint_1, ...
+    wptlist = command_batch.angular_waypoint_list(angles, blending, use_optimal_blending=True)
 
     # Validate the waypoint list
     result = base.ValidateWaypointList(wptlist)
@@ -149,6 +134,7 @@ def main():
     # Import the utilities helper module
     sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
     import utilities
+    import trajectory_validator
 
     # Parse arguments
     args = utilities.parseConnectionArguments()
@@ -160,9 +146,12 @@ def main():
         base = BaseClient(router)
         program_runner = ProgramRunnerClient(router)
 
+        # Local checks of the waypoints (joint limits and blending)
+        validator = trajectory_validator.TrajectoryValidator()
+
         # Example core
         example_move_to_home_position(base, program_runner)
-        example_angular_trajectory(base)
+        example_angular_trajectory(base, validator)
 
         return
 
@@ -15,7 +15,8 @@
 import sys, os, numpy as np, threading, time
 from kortex_api.autogen.client_stubs.BaseClientRpc import BaseClient
 from kortex_api.autogen.client_stubs.ProgramRunnerClientRpc import ProgramRunnerClient
-from kortex_api.autogen.messages import Base_pb2, ProgramRunner_pb2, Common_pb2
+from kortex_api.autogen.client_stubs.ProtectionZoneClientRpc import ProtectionZoneClient
+from kortex_api.autogen.messages import ProgramRunner_pb2, Common_pb2
 from kortex_api.autogen.messages.Common_pb2 import ModeSelection,OperatingModeType, CartesianReferenceFrame
 global base
 
@@ -96,46 +97,13 @@ def example_move_to_home_position(base, program_runner):
 
     return True
 
-# This function populates a toolpath Arc point waypoint object with the data provided by an array of numbers
-def populate_arc_coordinates(waypointInformation):
-
-   
-    # This function links the information in waypointDefinitions array to its corresponding data
-    waypoint = Base_pb2.ArcPointToolpath()
-    waypoint.pose.x = waypointInformation[0]                # in meters
-    waypoint.pose.y = waypointInformation[1]                # in meters
-    waypoint.pose.z = waypointInformation[2]                # in meters
-    waypoint.blending_radius = waypointInformation[3]       # in meters
-    waypoint.pose.theta_x = waypointInformation[4]          # in degrees
-    waypoint.pose.theta_y = waypointInformation[5]          # in degrees
-    waypoint.pose.theta_z = waypointInformation[6]          # in degrees
-    waypoint.linear_speed = waypointInformation[8]          # in meters /secondes
-    waypoint.linear_acceleration = waypointInformation[9]   # in meters /secondes
-    waypoint.via_point_x = waypointInformation[10]          # in meters
-    waypoint.via_point_y = waypointInformation[11]          # in meters
-    waypoint.via_point_z = waypointInformation[12]          # in meters
-    waypoint.angular_acceleration = waypointInformation[13] # in degree /secondes
-    return waypoint
-
-# This function populates a toolpath straight segment waypoint object with the data provided by an array of numbers
-def populate_segment_coordinates(waypointInformation):        
-
-    # This function links the information in waypointDefinitions array to its corresponding data
-    waypoint = Base_pb2.StraightSegmentToolpath()
-    waypoint.pose.x = waypointInformation[0]                # in meters
-    waypoint.pose.y = waypointInformation[1]                # in meters
-    waypoint.pose.z = waypointInformation[2]                # in meters
-    waypoint.blending_radius = waypointInformation[3]       # in meters
-    waypoint.pose.theta_x = waypointInformation[4]          # in degrees
-    waypoint.pose.theta_y = waypointInformation[5]          # in degrees
-    waypoint.pose.theta_z = waypointInformation[6]          # in degrees
-    waypoint.linear_speed = waypointInformation[8]          # in meters /secondes
-    waypoint.linear_acceleration = waypointInformation[9]   # in meters /secondes 
-    return waypoint
-
-# This function creates a trajectory using multiple Cartesian waypoints and runs it
-def example_trajectory(base: BaseClient):
+# This function creates a trajectory using multiple toolpath waypoints and runs it
+# The waypoint list is built from an array of waypoints and their types in one pass by command_batch.toolpath_waypoint_list()
+def example_trajectory(base: BaseClient, validator):
     
+    # The helper module is found through the path set by main()
+    import command_batch
+
     change_operating_mode(base, "OPERATING_MODE_AUTO")
     
     # define the angular orientation poses of the waypoints
@@ -144,33 +112,29 @@ def example_trajectory(base: BaseClient):
     kTheta_z = 90
 
     """
-    Array of waypoints and their information as described in fonction populate_segment_coordinates or populate_arc_coordinates depending on waypoint type
-    always need to start by a "segment" waypoint
-    
-    (pose_X,pose_Y,pose_Z,blending_radius,pose_theta_X,pose_theta_Y,pose_theta_Z,"segment",linear_speed,linear_acceleration)
-    (pose_X,pose_Y,pose_Z,blending_radius,pose_theta_X,pose_theta_Y,pose_theta_Z,"arc",linear_speed,linear_acceleration,via_point_X,via_point_Y,via_point_Z,angular_acceleration)
+    Array of waypoints and their information, one row per waypoint, in command_batch.TOOLPATH_FIELDS order:
+
+    (pose_X,pose_Y,pose_Z,blending_radius,pose_theta_X,pose_theta_Y,pose_theta_Z,linear_speed,linear_acceleration,via_point_X,via_point_Y,via_point_Z,angular_acceleration)
+
+    Poses, blending radius and via points are in meters and degrees, speeds in meters /secondes, accelerations in meters /secondes^2 and degrees /secondes^2.
+    The type of each waypoint is given by waypointTypes: straight segments (TOOLPATH_SEGMENT) ignore the last 4 columns,
+    arcs (TOOLPATH_ARC) go through the via point. A toolpath always needs to start by a segment waypoint.
     """
-    waypointsDefinition = (
-    (0.646, 0.158, 0.397, 0.0, kTheta_x, kTheta_y, kTheta_z,"segment",0.2,0.1), 
-    (0.646, -0.039, 0.397, 0.0, kTheta_x, kTheta_y, kTheta_z,"segment",0.2,0.1),
-    (0.646, -0.39, 0.397, 0.0, kTheta_x, kTheta_y, 70,"arc",0.1,2.5, 0.776,-0.131,0.397,25)
-    )
-
-    waypoint_count = len(waypointsDefinition)
-
-    wptlist = Base_pb2.WaypointList()
-    wptlist.use_optimal_blending = True
-            
-    #Create waypoints from the waypointsDefinition array according to its waypoint type
-    index = 0
-    for i in range(0,waypoint_count):
-        waypoint = wptlist.waypoints.add()
-        waypoint.name = "waypoint_" + str(index)
-        if waypointsDefinition[i][7] == "arc":    
-            waypoint.arc_point_toolpath.CopyFrom(populate_arc_coordinates(waypointsDefinition[i]))
-        elif  waypointsDefinition[i][7] == "segment":   
-            waypoint.straight_segment_toolpath.CopyFrom(populate_segment_coordinates(waypointsDefinition[i]))
-        index = index + 1
+    waypointsDefinition = np.array((
+    (0.646, 0.158, 0.397, 0.0, kTheta_x, kTheta_y, kTheta_z,0.2,0.1, 0,0,0,0), 
+    (0.646, -0.039, 0.397, 0.0, kTheta_x, kTheta_y, kTheta_z,0.2,0.1, 0,0,0,0),
+    (0.646, -0.39, 0.397, 0.0, kTheta_x, kTheta_y, 70,0.1,2.5, 0.776,-0.131,0.397,25)
+    ))
+    waypointTypes = (command_batch.TOOLPATH_SEGMENT, command_batch.TOOLPATH_SEGMENT, command_batch.TOOLPATH_ARC)
+
+    # Check the waypoints locally first: a list failing these checks would be rejected by the robot after a round trip
+    report = validator.check_toolpath(waypointsDefinition, waypointTypes)
+    if not report.valid:
+        print(report)
+        return
+
+    # Create waypoints, named waypoint_0, waypoint_1, ..., from the waypointsDefinition array according to their waypoint type
+    wptlist = command_batch.toolpath_waypoint_list(waypointsDefinition, waypointTypes, use_optimal_blending=True)
     
     result = base.ValidateWaypointList(wptlist)
 
@@ -192,6 +156,7 @@ def main():
     # Import the utilities helper module
     sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
     import utilities
+    import trajectory_validator
 
     # Parse arguments
     args = utilities.parseConnectionArguments()
@@ -202,9 +167,13 @@ def main():
         # Create required services
         base = BaseClient(router)
         program_runner = ProgramRunnerClient(router)
+        protection_zone_client = ProtectionZoneClient(router)
+
+        # Local checks of the waypoints, including the protection zones configured on the robot
+        validator = trajectory_validator.TrajectoryValidator.from_protection_zones(protection_zone_client.ReadAllProtectionZones())
 
         example_move_to_home_position(base, program_runner)
-        example_trajectory(base)
+        example_trajectory(base, validator)
 
         return 
 
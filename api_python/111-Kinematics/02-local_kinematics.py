@@ -0,0 +1,109 @@
+#! /usr/bin/env python3
+
+###
+# KINOVA (R) KORTEX (TM)
+#
+# Copyright (c) 2024 Kinova inc. All rights reserved.
+#
+# This software may be modified and distributed
+# under the terms of the BSD 3-Clause license.
+#
+# Refer to the LICENSE file for details.
+#
+###
+
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+from kortex_api.autogen.client_stubs.BaseClientRpc import BaseClient
+from kortex_api.autogen.client_stubs.ToolManagerClientRpc import ToolManagerClient
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+import utilities
+import simulator
+import kinematics
+
+# This example computes the kinematics locally with kinematics.KinematicModel:
+#
+#   - conformance: the model is compared to base.ComputeForwardKinematics() on random configurations
+#   - throughput: the poses of a large batch of configurations are computed at once
+#   - inverse kinematics: a straight Cartesian path from the current pose is converted to joint space, each pose
+#     starting from the solution of the previous one
+#
+#   python3 02-local_kinematics.py --ip 192.168.1.10 --samples 200
+#   python3 02-local_kinematics.py --simulate --batch 1000000 --path 5000
+#
+# The model uses the nominal Link 6 parameters and the transform of the tool of the robot (--tool to choose it
+# when several tools are configured). With --simulate, the simulator computes the kinematics with the same nominal
+# model, without tool.
+
+
+PATH_LENGTH = 0.10  # meters, along the x axis of the base
+
+
+# This function compares the model to the controller and measures the local throughput
+def example_local_kinematics(base, tool, samples, batch, path):
+
+    model = kinematics.KinematicModel(tool=tool)
+
+    print("Comparing the model to ComputeForwardKinematics on {} configurations...".format(samples))
+    start = time.perf_counter()
+    report = kinematics.check_conformance(base, model, model.sample(samples, seed=0))
+    elapsed = time.perf_counter() - start
+    print(report)
+    print("Controller: {:.0f} configurations/s".format(samples / elapsed))
+    if not report.conforms and len(report.outliers()):
+        print("First configurations out of tolerance:")
+        print(report.outliers()[:5])
+
+    joint_angles = model.sample(batch, seed=1)
+    start = time.perf_counter()
+    poses = model.forward(joint_angles)
+    elapsed = time.perf_counter() - start
+    print("Local model: {} configurations in {:.3f} s, {:.0f} configurations/s".format(len(poses), elapsed, len(poses) / elapsed))
+
+    # Straight path from the current pose, in the model
+    current = [joint_angle.value for joint_angle in base.GetMeasuredJointAngles().joint_angles]
+    targets = np.repeat(model.forward(current), path, axis=0)
+    targets[:, 0] += np.linspace(0.0, PATH_LENGTH, path)
+    start = time.perf_counter()
+    result = model.inverse(targets, guess=current)
+    elapsed = time.perf_counter() - start
+    print("Inverse kinematics of a {}-pose path in {:.3f} s: {}".format(path, elapsed, result))
+
+    return report.conforms and bool(result)
+
+
+def main():
+    # Parse arguments
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--samples", type=int, help="configurations compared to the controller", default=100)
+    parser.add_argument("--batch", type=int, help="configurations computed locally", default=100000)
+    parser.add_argument("--path", type=int, help="poses of the path converted to joint space", default=5000)
+    parser.add_argument("--tool", type=int, help="identifier of the tool, when several are configured", default=None)
+    parser.add_argument("--simulate", action="store_true", help="compare to the simulator instead of a robot")
+    args = utilities.parseConnectionArguments(parser)
+
+    if args.simulate:
+        connection = utilities.DeviceConnection.createSimulatedConnection(latency=0.001)
+    else:
+        connection = utilities.DeviceConnection.createMqttConnection(args)
+
+    # Create connection to the device and get the router
+    with connection as router:
+
+        # Create required services
+        base = simulator.create_client(BaseClient, router)
+        tool = None if args.simulate else kinematics.tool_transform(ToolManagerClient(router), args.tool)
+
+        # Example core
+        success = example_local_kinematics(base, tool, args.samples, args.batch, args.path)
+
+        return 0 if success else 1
+
+
+if __name__ == "__main__":
+    exit(main())
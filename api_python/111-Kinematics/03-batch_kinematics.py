@@ -0,0 +1,105 @@
+#! /usr/bin/env python3
+
+###
+# KINOVA (R) KORTEX (TM)
+#
+# Copyright (c) 2024 Kinova inc. All rights reserved.
+#
+# This software may be modified and distributed
+# under the terms of the BSD 3-Clause license.
+#
+# Refer to the LICENSE file for details.
+#
+###
+
+import argparse
+import os
+import sys
+
+import numpy as np
+from kortex_api.autogen.client_stubs.BaseClientRpc import BaseClient
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+import utilities
+import simulator
+import kinematics_cache
+import kinematics_client
+
+# This example computes the kinematics of a batch of configurations on the controller, one call at a time and then
+# with several calls in flight, and prints the throughput of both:
+#
+#   - forward kinematics of random configurations around the current one
+#   - inverse kinematics of the poses found, each starting from its configuration minus one degree
+#
+# The pipelined batch then runs twice through a kinematics_cache.KinematicsCache: the second run is answered from
+# memory.
+#
+#   python3 03-batch_kinematics.py --ip 192.168.1.10 --count 500 --in-flight 16
+#   python3 03-batch_kinematics.py --simulate
+
+SPREAD = 20.0  # degrees, largest offset of the configurations from the current one
+
+
+# This function runs the batch with a given number of calls in flight and prints its report
+def run_batch(base, joint_angles, max_in_flight):
+
+    client = kinematics_client.BatchKinematicsClient(base, max_in_flight=max_in_flight)
+
+    poses = client.forward(joint_angles)
+    print(poses.report)
+    solved = ~poses.failed
+    joint_solutions = client.inverse(poses.values[solved], joint_angles[solved] - 1.0)
+    print(joint_solutions.report)
+
+    return poses.report.rate, bool(poses) and bool(joint_solutions)
+
+
+# This function compares serial and pipelined batches
+def example_batch_kinematics(base, count, max_in_flight):
+
+    current = np.array([joint_angle.value for joint_angle in base.GetMeasuredJointAngles().joint_angles])
+    joint_angles = current + np.random.default_rng(0).uniform(-SPREAD, SPREAD, size=(count, len(current)))
+
+    print("One call in flight:")
+    serial_rate, serial_success = run_batch(base, joint_angles, 1)
+    print("{} calls in flight:".format(max_in_flight))
+    pipelined_rate, pipelined_success = run_batch(base, joint_angles, max_in_flight)
+    print("Forward kinematics speedup: {:.1f}x".format(pipelined_rate / serial_rate if serial_rate > 0 else float("nan")))
+
+    cache = kinematics_cache.KinematicsCache()
+    cached_base = kinematics_cache.CachedKinematicsBase(base, cache)
+    for run in ("first", "second"):
+        print("Through the cache, {} run:".format(run))
+        run_batch(cached_base, joint_angles, max_in_flight)
+    print(cache)
+
+    return serial_success and pipelined_success
+
+
+def main():
+    # Parse arguments
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--count", type=int, help="configurations of the batch", default=200)
+    parser.add_argument("--in-flight", type=int, help="calls in flight of the pipelined batch", default=kinematics_client.DEFAULT_MAX_IN_FLIGHT)
+    parser.add_argument("--simulate", action="store_true", help="run on the simulator instead of a robot")
+    args = utilities.parseConnectionArguments(parser)
+
+    if args.simulate:
+        connection = utilities.DeviceConnection.createSimulatedConnection(latency=0.002)
+    else:
+        connection = utilities.DeviceConnection.createMqttConnection(args)
+
+    # Create connection to the device and get the router
+    with connection as router:
+
+        # Create required services
+        base = simulator.create_client(BaseClient, router)
+
+        # Example core
+        success = example_batch_kinematics(base, args.count, args.in_flight)
+
+        return 0 if success else 1
+
+
+if __name__ == "__main__":
+    exit(main())
@@ -0,0 +1,110 @@
+#! /usr/bin/env python3
+
+###
+# KINOVA (R) KORTEX (TM)
+#
+# Copyright (c) 2024 Kinova inc. All rights reserved.
+#
+# This software may be modified and distributed
+# under the terms of the BSD 3-Clause license.
+#
+# Refer to the LICENSE file for details.
+#
+###
+
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+from kortex_api.autogen.client_stubs.BaseClientRpc import BaseClient
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+import utilities
+import simulator
+import kinematics
+import workspace_index
+
+# This example builds a workspace_index.WorkspaceIndex of the nominal Link 6 model (or opens the one already built)
+# and uses it:
+#
+#   - reachability: random targets, half of them moved anywhere in the grid, are looked up at once
+#   - inverse kinematics: the reachable targets are solved from the current configuration of the robot, then from
+#     the seeds of the index (the wrist joints from the current configuration)
+#
+#   python3 04-workspace_index.py --ip 192.168.1.10 --index link6.idx --samples 5000000
+#   python3 04-workspace_index.py --simulate --resolution 0.05 --samples 500000
+#
+# Building takes a few seconds per million samples, the index is built once and opened by the other runs (--rebuild
+# to build it again, e.g. with other options).
+
+
+# This function looks targets up in the index and compares the inverse kinematics from a fixed guess and from the
+# seeds of the index
+def example_workspace_index(base, index, count):
+
+    model = index.model
+    print(index)
+
+    # Targets: poses of random configurations, and as many positions scattered in the grid
+    random = np.random.default_rng(2)
+    targets = model.forward(model.sample(count, seed=random))
+    scattered = targets.copy()
+    scattered[:, :3] = index.origin + random.uniform(0.0, 1.0, size=(count, 3)) * np.array(index.shape) * index.resolution
+    targets = np.concatenate([targets, scattered])
+
+    start = time.perf_counter()
+    reachable = index.reachable(targets)
+    elapsed = time.perf_counter() - start
+    print("Looked up {} targets in {:.3f} ms, {} reachable".format(len(targets), elapsed * 1e3, int(reachable.sum())))
+
+    targets = targets[reachable]
+    current = [joint_angle.value for joint_angle in base.GetMeasuredJointAngles().joint_angles]
+    for name, guess in (("current configuration", current), ("index seeds", index.seeds(targets, current))):
+        start = time.perf_counter()
+        result = model.inverse(targets, guess=guess, path=False)
+        elapsed = time.perf_counter() - start
+        print("Inverse kinematics from the {} in {:.3f} s: {}".format(name, elapsed, result))
+
+    return bool(len(targets))
+
+
+def main():
+    # Parse arguments
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--index", help="workspace index file", default="workspace.idx")
+    parser.add_argument("--rebuild", action="store_true", help="build the index even when the file exists")
+    parser.add_argument("--resolution", type=float, help="size of the voxels in meters", default=workspace_index.DEFAULT_RESOLUTION)
+    parser.add_argument("--samples", type=int, help="configurations sampled to build the index", default=workspace_index.DEFAULT_SAMPLES)
+    parser.add_argument("--count", type=int, help="random targets looked up and solved", default=1000)
+    parser.add_argument("--simulate", action="store_true", help="run on the simulator instead of a robot")
+    args = utilities.parseConnectionArguments(parser)
+
+    if args.rebuild or not os.path.exists(args.index):
+        print("Building the index of {} samples...".format(args.samples))
+        start = time.perf_counter()
+        index = workspace_index.build(kinematics.KinematicModel(), args.index, resolution=args.resolution, samples=args.samples, seed=0)
+        print("Built {} in {:.1f} s".format(args.index, time.perf_counter() - start))
+    else:
+        index = workspace_index.WorkspaceIndex(args.index)
+
+    if args.simulate:
+        connection = utilities.DeviceConnection.createSimulatedConnection()
+    else:
+        connection = utilities.DeviceConnection.createMqttConnection(args)
+
+    # Create connection to the device and get the router
+    with connection as router:
+
+        # Create required services
+        base = simulator.create_client(BaseClient, router)
+
+        # Example core
+        success = example_workspace_index(base, index, args.count)
+
+        return 0 if success else 1
+
+
+if __name__ == "__main__":
+    exit(main())
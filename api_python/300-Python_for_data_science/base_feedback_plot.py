@@ -14,21 +14,36 @@
 
 
 # Pandas is necessary for this example to work. You may install pandas using pip with the command 'pip install pandas'
-import pandas as pd
-from google.protobuf.json_format import MessageToDict
 from kortex_api.autogen.client_stubs.BaseCyclicClientRpc import BaseCyclicClient
-import time, sys, os
+from kortex_api.autogen.messages import BaseCyclic_pb2
+import sys, os
 
-# This funcion returns real time information on the robot's tool pose and the tool external wrench torque, every 0.01 seconds
-def yield_tool_feedback(base_cyclic_client, count):
-    for i in range(count):
-        feedback = base_cyclic_client.RefreshFeedback()
-        feedback_dict = MessageToDict(feedback.base)
+# Set to a file name (e.g. "tool_feedback.log") to also keep the capture in a memory-mapped binary log.
+# The log can be read back later with feedback_log.FeedbackLog(FEEDBACK_LOG).time_slice(start, end)
+FEEDBACK_LOG = None
 
-        tool_feedback = {k: v for k, v in feedback_dict.items() if k.startswith("tool")}
-        tool_feedback["feedback_id"] = i
-        yield tool_feedback
-        time.sleep(0.001)
+# This funcion returns real time information on the robot's tool pose and the tool external wrench torque, every 0.001 seconds
+def get_tool_data(base_cyclic_client, count, log_writer=None):
+
+    # The helper modules are found through the path set by main()
+    import feedback_recorder
+    import message_extractor
+
+    # The recorder copies the tool fields of each feedback in a preallocated NumPy buffer,
+    # the DataFrame is only built once the capture is done.
+    # The columns keep the names given by MessageToDict, e.g. toolPoseX
+    recorder = feedback_recorder.FeedbackRecorder(
+        feedback_recorder.tool_fields(BaseCyclic_pb2.Feedback),
+        capacity=count,
+        columns=lambda path: message_extractor.json_name(BaseCyclic_pb2.Feedback, path),
+    )
+    sinks = [recorder] if log_writer is None else [recorder, log_writer]
+
+    # The feedback is polled at 1 kHz on absolute deadlines, the report shows the achieved period jitter
+    jitter_report = feedback_recorder.capture(base_cyclic_client, sinks, count, rate=1000)
+    print(jitter_report)
+
+    return recorder.to_dataframe()
 
 
 def main():
@@ -37,6 +52,9 @@ def main():
     sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
     
     import utilities
+    import feedback_log
+    import feedback_recorder
+    import message_extractor
 
     # Parse arguments
     args = utilities.parseConnectionArguments()
@@ -46,9 +64,16 @@ def main():
 
         base_cyclic_client = BaseCyclicClient(router)
 
-        # pd.DataFrame() generates a two-dimensional, size-mutable, potentially heterogeneous tabular data.
-        df = pd.DataFrame(yield_tool_feedback(base_cyclic_client, 1000))
-        df = df.set_index(["feedback_id"])
+        log_writer = None
+        if FEEDBACK_LOG is not None:
+            extractor = message_extractor.MessageExtractor(BaseCyclic_pb2.Feedback, feedback_recorder.tool_fields(BaseCyclic_pb2.Feedback))
+            log_writer = feedback_log.FeedbackLogWriter(FEEDBACK_LOG, extractor)
+
+        # The DataFrame is indexed by feedback_id and has one column per recorded field
+        df = get_tool_data(base_cyclic_client, 1000, log_writer)
+        if log_writer is not None:
+            log_writer.close()
+
         # you need to install matplotlib for this to work. If you are on linux, open the terminal and enter 'python3 -mpip install matplotlib'
         # The filter() function is used to subset rows or columns of dataframe according to labels in the specified index.
         df.filter(like="toolPose", axis=1).plot()
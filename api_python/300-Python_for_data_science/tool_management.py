@@ -13,46 +13,38 @@
 ##
 from kortex_api.autogen.client_stubs.ToolManagerClientRpc import ToolManagerClient
 from kortex_api.autogen.messages import ToolPlugin_pb2
-from numpy import append
-import pandas as pd
 import sys, os
 
+# Prefixes of the columns holding the fields of the ToolInformation submessages
+COLUMN_PREFIXES = {"transform": "tcp_", "center_of_mass": "com_", "inertia": ""}
+
+
+# This function returns the column name of a ToolInformation field given its dotted path
+def tool_column(path):
+    if path == "handle.identifier":
+        return "handle"
+    if path == "friendly_name":
+        return "name"
+    parent, _, field = path.rpartition(".")
+    return COLUMN_PREFIXES.get(parent, "") + field
+
+
 # This function organizes the available tools information in a data frame, and prints it in the terminal
 def tool_managing(tool_manager):
     
+    # The helper module is found through the path set by main()
+    import message_extractor
+
     tools = tool_manager.GetAllToolsInformation()
 
-    ti = ToolPlugin_pb2.ToolInformation()
-    columns = []
-    columns.append("handle")
-    columns.append("active_index")
-    columns.append("name")
-    columns.append("mass")
-    columns.extend([f"tcp_{s}" for s in ti.transform.DESCRIPTOR.fields_by_name.keys()])
-    columns.extend(
-        [f"com_{s}" for s in ti.center_of_mass.DESCRIPTOR.fields_by_name.keys()]
+    # The extractor reads the descriptor once and compiles a function reading every selected field of a tool
+    extractor = message_extractor.MessageExtractor(
+        ToolPlugin_pb2.ToolInformation,
+        ["handle.identifier", "active_index", "friendly_name", "mass", "transform", "center_of_mass", "inertia"],
+        columns=tool_column,
     )
-    columns.extend(ti.inertia.DESCRIPTOR.fields_by_name.keys())
-
-    df = pd.DataFrame(columns=columns)
-    temp = []
-
-    for tool in tools.tools_information:
-
-        new_tool = dict.fromkeys(columns)
-        new_tool["handle"] = tool.handle.identifier
-        new_tool["active_index"] = tool.active_index
-        new_tool["name"] = tool.friendly_name
-
-        for field in tool.transform.DESCRIPTOR.fields_by_name.keys():
-            new_tool[f"tcp_{field}"] = getattr(tool.transform, field)
-        for field in tool.center_of_mass.DESCRIPTOR.fields_by_name.keys():
-            new_tool[f"com_{field}"] = getattr(tool.center_of_mass, field)
-        for field in tool.inertia.DESCRIPTOR.fields_by_name.keys():
-            new_tool[field] = getattr(tool.inertia, field)
-        temp.append(new_tool)
 
-    df = pd.DataFrame(temp)
+    df = extractor.to_dataframe(tools.tools_information)
     print(df)
 
 
@@ -11,20 +11,9 @@
 # Refer to the LICENSE file for details.
 #
 ##
-import time, os ,sys
-import pandas as pd
-from google.protobuf.json_format import MessageToDict
+import os ,sys
 from kortex_api.autogen.client_stubs.BaseCyclicClientRpc import BaseCyclicClient
-
-# This function yields the feedback obtained using the cyclic client
-def yield_feedback(base_cyclic_client, count):
-    for i in range(count):
-        feedback = base_cyclic_client.RefreshFeedback()
-        feedback_dict = MessageToDict(feedback.wrist.c61)
-        feedback_dict["feedback_id"] = i
-
-        yield feedback_dict
-        time.sleep(0.001)
+from kortex_api.autogen.messages import BaseCyclic_pb2
 
 
 # This function returns real-time information about each wrist's ACTUATOR. 
@@ -34,8 +23,21 @@ def get_wrist_data(base_cyclic_client):
     # click on the menu icon, in the top left corner,
     # then clicking on Diagnostics, then Monitoring, and finally choosing the Detailed tab
 
-    df = pd.DataFrame(yield_feedback(base_cyclic_client, 1000))
-    df = df.set_index(["feedback_id"])
+    # The helper modules are found through the path set by main()
+    import feedback_recorder
+    import message_extractor
+
+    # The recorder copies the wrist IMU and force fields of each feedback in a preallocated NumPy buffer.
+    # The columns keep the names given by MessageToDict, e.g. imuAccelerationX
+    recorder = feedback_recorder.FeedbackRecorder(
+        feedback_recorder.wrist_fields(BaseCyclic_pb2.Feedback),
+        capacity=1000,
+        columns=lambda path: message_extractor.json_name(BaseCyclic_pb2.Feedback, path),
+    )
+    # The feedback is polled at 1 kHz on absolute deadlines, the report shows the achieved period jitter
+    jitter_report = recorder.record(base_cyclic_client, 1000, rate=1000)
+    print(jitter_report)
+    df = recorder.to_dataframe()
 
     df.filter(like="imu", axis=1).plot()
     df.filter(like="force", axis=1).plot()
@@ -0,0 +1,69 @@
+#! /usr/bin/env python3
+
+###
+# KINOVA (R) KORTEX (TM)
+#
+# Copyright (c) 2024 Kinova inc. All rights reserved.
+#
+# This software may be modified and distributed
+# under the terms of the BSD 3-Clause license.
+#
+# Refer to the LICENSE file for details.
+#
+###
+
+import os
+import sys
+import time
+
+from kortex_api.autogen.client_stubs.BaseClientRpc import BaseClient
+from kortex_api.autogen.client_stubs.BaseCyclicClientRpc import BaseCyclicClient
+from kortex_api.autogen.messages import Base_pb2
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+import utilities
+import simulator
+
+# This example runs without a robot: the simulator stands in for the arm behind the router.
+# Services are created with simulator.create_client() instead of calling BaseClient(router) directly,
+# so replacing createSimulatedConnection by createMqttConnection runs the same code on the real arm.
+
+# This function sends a twist command and follows the tool pose through the cyclic feedback
+def example_simulated_twist(base, base_cyclic):
+
+    command = Base_pb2.TwistCommand()
+    command.reference_frame = Base_pb2.CARTESIAN_REFERENCE_FRAME_BASE
+    command.duration = 1  # seconds
+    command.twist.linear_z = 0.05  # m/s
+
+    base.SendTwistCommand(command)
+
+    for i in range(5):
+        feedback = base_cyclic.RefreshFeedback()
+        print("Tool pose z: {:.4f} m".format(feedback.base.tool_pose_z))
+        time.sleep(0.25)
+
+    base.Stop()
+
+    return True
+
+
+def main():
+    # Parse arguments
+    args = utilities.parseConnectionArguments()
+
+    # Create a simulated connection, with a round trip latency of 1 ms for each RPC
+    with utilities.DeviceConnection.createSimulatedConnection(latency=0.001) as router:
+
+        # Create required services
+        base = simulator.create_client(BaseClient, router)
+        base_cyclic = simulator.create_client(BaseCyclicClient, router)
+
+        # Example core
+        success = example_simulated_twist(base, base_cyclic)
+
+        return 0 if success else 1
+
+
+if __name__ == "__main__":
+    exit(main())
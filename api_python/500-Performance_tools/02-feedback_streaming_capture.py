@@ -0,0 +1,68 @@
+#! /usr/bin/env python3
+
+###
+# KINOVA (R) KORTEX (TM)
+#
+# Copyright (c) 2024 Kinova inc. All rights reserved.
+#
+# This software may be modified and distributed
+# under the terms of the BSD 3-Clause license.
+#
+# Refer to the LICENSE file for details.
+#
+###
+
+# pyarrow is necessary for this example to work. You may install pyarrow using pip with the command 'pip install pyarrow'
+import os
+import sys
+
+from kortex_api.autogen.client_stubs.BaseCyclicClientRpc import BaseCyclicClient
+from kortex_api.autogen.messages import BaseCyclic_pb2
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+import utilities
+import feedback_recorder
+import message_extractor
+import columnar_writer
+
+# Capture duration, in seconds
+CAPTURE_DURATION = 60
+
+# This function streams the base tool and wrist feedback to Parquet files at 1 kHz.
+# Only a few chunks of samples are kept in memory, so the capture duration is only limited by the disk space.
+def example_streaming_capture(base_cyclic):
+
+    # Select the tool pose/wrench and wrist IMU/force fields, named after their protobuf field
+    fields = feedback_recorder.tool_fields(BaseCyclic_pb2.Feedback) + feedback_recorder.wrist_fields(BaseCyclic_pb2.Feedback)
+    extractor = message_extractor.MessageExtractor(BaseCyclic_pb2.Feedback, fields, columns=lambda path: path.rsplit(".", 1)[-1])
+
+    with columnar_writer.ColumnarFeedbackWriter("feedback_capture", extractor, format="parquet") as writer:
+        print("Capturing feedback for {} seconds...".format(CAPTURE_DURATION))
+        jitter_report = writer.record(base_cyclic, CAPTURE_DURATION * 1000, rate=1000)
+
+    print(jitter_report)
+    print("Samples written: {}, dropped: {}".format(writer.count - writer.dropped, writer.dropped))
+    for path in writer.files:
+        print(path)
+
+    return True
+
+
+def main():
+    # Parse arguments
+    args = utilities.parseConnectionArguments()
+
+    # Create connection to the device and get the router
+    with utilities.DeviceConnection.createUdpConnection(args) as router:
+
+        # Create required services
+        base_cyclic = BaseCyclicClient(router)
+
+        # Example core
+        success = example_streaming_capture(base_cyclic)
+
+        return 0 if success else 1
+
+
+if __name__ == "__main__":
+    exit(main())
@@ -0,0 +1,95 @@
+#! /usr/bin/env python3
+
+###
+# KINOVA (R) KORTEX (TM)
+#
+# Copyright (c) 2024 Kinova inc. All rights reserved.
+#
+# This software may be modified and distributed
+# under the terms of the BSD 3-Clause license.
+#
+# Refer to the LICENSE file for details.
+#
+###
+
+import argparse
+import os
+import sys
+import time
+
+from kortex_api.autogen.client_stubs.BaseCyclicClientRpc import BaseCyclicClient
+from kortex_api.autogen.messages import BaseCyclic_pb2
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+import utilities
+import feedback_recorder
+import message_extractor
+import feedback_fanout
+
+# This example shares the cyclic feedback of one poller with several local processes.
+# Start the producer once (it polls the robot), then start as many consumers as needed in other terminals:
+#
+#   python3 03-feedback_fanout.py
+#   python3 03-feedback_fanout.py --consumer
+
+# Producer run time, in seconds
+PRODUCER_DURATION = 300
+
+# This function polls the robot at 1 kHz and publishes every sample in shared memory
+def example_producer(base_cyclic):
+
+    fields = feedback_recorder.tool_fields(BaseCyclic_pb2.Feedback) + feedback_recorder.wrist_fields(BaseCyclic_pb2.Feedback)
+    extractor = message_extractor.MessageExtractor(BaseCyclic_pb2.Feedback, fields, columns=lambda path: path.rsplit(".", 1)[-1])
+
+    with feedback_fanout.FeedbackPublisher(extractor) as publisher:
+        print("Publishing feedback for {} seconds...".format(PRODUCER_DURATION))
+        jitter_report = feedback_recorder.capture(base_cyclic, [publisher], PRODUCER_DURATION * 1000, rate=1000)
+
+    print(jitter_report)
+
+    return True
+
+
+# This function tails the shared feedback and prints the received rate and the latest tool position every second
+def example_consumer():
+
+    with feedback_fanout.FeedbackSubscriber() as subscriber:
+        received = 0
+        start = time.perf_counter()
+        for samples in subscriber.tail():
+            received += len(samples)
+            elapsed = time.perf_counter() - start
+            if elapsed >= 1.0:
+                latest = samples[-1]
+                print("{:.0f} samples/s, lost: {}, tool pose: ({:.4f}, {:.4f}, {:.4f})".format(
+                    received / elapsed, subscriber.lost, latest["tool_pose_x"], latest["tool_pose_y"], latest["tool_pose_z"]))
+                received = 0
+                start = time.perf_counter()
+
+    return True
+
+
+def main():
+    # Parse arguments
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--consumer", action="store_true", help="read the feedback published by the producer")
+    args = utilities.parseConnectionArguments(parser)
+
+    # Consumers do not connect to the robot
+    if args.consumer:
+        return 0 if example_consumer() else 1
+
+    # Create connection to the device and get the router
+    with utilities.DeviceConnection.createUdpConnection(args) as router:
+
+        # Create required services
+        base_cyclic = BaseCyclicClient(router)
+
+        # Example core
+        success = example_producer(base_cyclic)
+
+        return 0 if success else 1
+
+
+if __name__ == "__main__":
+    exit(main())
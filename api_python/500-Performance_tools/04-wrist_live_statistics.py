@@ -0,0 +1,74 @@
+#! /usr/bin/env python3
+
+###
+# KINOVA (R) KORTEX (TM)
+#
+# Copyright (c) 2024 Kinova inc. All rights reserved.
+#
+# This software may be modified and distributed
+# under the terms of the BSD 3-Clause license.
+#
+# Refer to the LICENSE file for details.
+#
+###
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+import feedback_fanout
+import streaming_stats
+
+# This example watches the vibration and load of the wrist live. It reads the feedback shared by the producer of
+# 03-feedback_fanout.py, so start it first:
+#
+#   python3 03-feedback_fanout.py
+#   python3 04-wrist_live_statistics.py
+#
+# The statistics are updated with every block of samples received, nothing is kept but the last window.
+
+# Feedback rate of the producer, in Hz
+FEEDBACK_RATE = 1000
+
+# This function updates the statistics of the wrist IMU and force channels and prints them every 'interval' seconds
+def example_wrist_statistics(duration, interval):
+
+    with feedback_fanout.FeedbackSubscriber() as subscriber:
+        columns = [name for name in subscriber.dtype.names if "imu" in name or "force" in name]
+        if not columns:
+            print("The published feedback holds no wrist IMU or force field")
+            return False
+
+        statistics = streaming_stats.StreamingStatistics(columns, rate=FEEDBACK_RATE, window=FEEDBACK_RATE, halflife=FEEDBACK_RATE // 10)
+
+        # The deadline also ends the example when the producer stops publishing
+        last_print = time.monotonic()
+        for samples in subscriber.tail(deadline=last_print + duration):
+            statistics.update(samples)
+
+            now = time.monotonic()
+            if now - last_print >= interval:
+                print(statistics.summary().to_string(float_format="{:.4f}".format))
+                print("lost samples: {}\n".format(subscriber.lost))
+                last_print = now
+
+    return True
+
+
+def main():
+    # Parse arguments
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--duration", type=float, help="run time, in seconds", default=60.0)
+    parser.add_argument("--interval", type=float, help="time between two printed summaries, in seconds", default=1.0)
+    args = parser.parse_args()
+
+    # Example core
+    success = example_wrist_statistics(args.duration, args.interval)
+
+    return 0 if success else 1
+
+
+if __name__ == "__main__":
+    exit(main())
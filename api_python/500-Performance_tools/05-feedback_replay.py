@@ -0,0 +1,71 @@
+#! /usr/bin/env python3
+
+###
+# KINOVA (R) KORTEX (TM)
+#
+# Copyright (c) 2024 Kinova inc. All rights reserved.
+#
+# This software may be modified and distributed
+# under the terms of the BSD 3-Clause license.
+#
+# Refer to the LICENSE file for details.
+#
+###
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+import feedback_recorder
+import feedback_replay
+
+# This example replays a capture offline, through the same code that polls the robot.
+# The capture is a feedback log (see FEEDBACK_LOG in 300-Python_for_data_science/base_feedback_plot.py)
+# or a Parquet/Arrow file written by 02-feedback_streaming_capture.py:
+#
+#   python3 05-feedback_replay.py capture.log --speed 10
+#   python3 05-feedback_replay.py feedback_capture/feedback_00000_20240101-120000.parquet --speed 0
+
+# This function polls the replay like a BaseCyclicClient until the end of the capture, records every field and
+# prints the replay throughput
+def example_feedback_replay(path, speed):
+
+    if path.endswith(".parquet") or path.endswith(".arrow"):
+        replay = feedback_replay.FeedbackReplay.from_columnar(path, speed)
+    else:
+        replay = feedback_replay.FeedbackReplay.from_log(path, speed)
+
+    recorder = feedback_recorder.FeedbackRecorder(replay.fields, capacity=len(replay))
+
+    start = time.perf_counter()
+    try:
+        while True:
+            recorder.append(replay.RefreshFeedback())
+    except EOFError:
+        pass
+    elapsed = time.perf_counter() - start
+
+    print("Replayed {} samples of {} in {:.3f} s ({:.0f} samples/s), skipped: {}".format(
+        replay.served, len(replay), elapsed, replay.served / elapsed, replay.skipped))
+    print(recorder.to_dataframe().describe())
+
+    return True
+
+
+def main():
+    # Parse arguments
+    parser = argparse.ArgumentParser()
+    parser.add_argument("path", help="feedback log, Parquet or Arrow file to replay")
+    parser.add_argument("--speed", type=float, help="replay speed, 1 for real time, 0 for as fast as possible", default=1.0)
+    args = parser.parse_args()
+
+    # Example core
+    success = example_feedback_replay(args.path, args.speed or None)
+
+    return 0 if success else 1
+
+
+if __name__ == "__main__":
+    exit(main())
@@ -0,0 +1,91 @@
+#! /usr/bin/env python3
+
+###
+# KINOVA (R) KORTEX (TM)
+#
+# Copyright (c) 2024 Kinova inc. All rights reserved.
+#
+# This software may be modified and distributed
+# under the terms of the BSD 3-Clause license.
+#
+# Refer to the LICENSE file for details.
+#
+###
+
+import argparse
+import os
+import sys
+
+from kortex_api.autogen.client_stubs.BaseClientRpc import BaseClient
+from kortex_api.autogen.client_stubs.BaseCyclicClientRpc import BaseCyclicClient
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+import utilities
+import simulator
+import transport_benchmark
+
+# This example measures the sustained rate, round trip latency and message sizes of SendTwistCommand,
+# SendJointSpeedsCommand and RefreshFeedback over MQTT and over UDP, one transport after the other:
+#
+#   python3 06-transport_benchmark.py --ip 192.168.1.10 --count 2000
+#   python3 06-transport_benchmark.py --rate 500
+#   python3 06-transport_benchmark.py --simulate --latency 0.0005
+#
+# The commands are zero speeds, but the arm must be in a mode accepting them (JOG_MANUAL) for SendTwistCommand and
+# SendJointSpeedsCommand to succeed; failed calls are counted as errors.
+# With --simulate, the simulator stands in for the robot, once with each of its transport models (simulator.TRANSPORTS):
+# the MQTT and UDP rows then show the modeled round trips, plus the given latency, not measurements of a controller.
+
+
+# This function benchmarks the services of one connection and returns the results
+def example_transport_benchmark(transport, base, base_cyclic, count, rate):
+
+    print("Benchmarking {} ({} calls per RPC)...".format(transport, count))
+    results = transport_benchmark.run_suite(transport, base, base_cyclic, count, rate)
+    for result in results:
+        print(result)
+
+    return results
+
+
+def main():
+    # Parse arguments
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--count", type=int, help="measured calls per RPC", default=transport_benchmark.DEFAULT_COUNT)
+    parser.add_argument("--rate", type=float, help="target call rate in Hz, as fast as possible by default", default=None)
+    parser.add_argument("--simulate", action="store_true", help="benchmark the simulator instead of a robot")
+    parser.add_argument("--latency", type=float, help="simulated latency added to the transport models, in seconds", default=0.0)
+    args = utilities.parseConnectionArguments(parser)
+
+    if args.simulate:
+        connections = [
+            (transport, lambda transport=transport: utilities.DeviceConnection.createSimulatedConnection(latency=args.latency, transport=transport))
+            for transport in simulator.TRANSPORTS
+        ]
+    else:
+        connections = [
+            ("MQTT", lambda: utilities.DeviceConnection.createMqttConnection(args)),
+            ("UDP", lambda: utilities.DeviceConnection.createUdpConnection(args)),
+        ]
+
+    # Example core
+    results = []
+    for transport, connect in connections:
+        with connect() as router:
+            if args.simulate:
+                # The simulator is not a transport, its services are created by the simulator
+                base = simulator.create_client(BaseClient, router)
+                base_cyclic = simulator.create_client(BaseCyclicClient, router)
+            else:
+                base = BaseClient(router)
+                base_cyclic = BaseCyclicClient(router)
+            results += example_transport_benchmark(transport, base, base_cyclic, args.count, args.rate)
+
+    print()
+    print(transport_benchmark.format_results(results))
+
+    return 0 if results else 1
+
+
+if __name__ == "__main__":
+    exit(main())
@@ -0,0 +1,109 @@
+#! /usr/bin/env python3
+
+###
+# KINOVA (R) KORTEX (TM)
+#
+# Copyright (c) 2024 Kinova inc. All rights reserved.
+#
+# This software may be modified and distributed
+# under the terms of the BSD 3-Clause license.
+#
+# Refer to the LICENSE file for details.
+#
+###
+
+import argparse
+import os
+import sys
+
+import numpy as np
+from kortex_api.autogen.client_stubs.BaseClientRpc import BaseClient
+from kortex_api.autogen.messages import Base_pb2
+from kortex_api.autogen.messages.Common_pb2 import ModeSelection, OperatingModeType
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+import utilities
+import simulator
+import cycle_time
+import trajectory_executor
+import trajectory_validator
+
+# This example executes a long dispensing-like path (a flat spiral of thousands of Cartesian waypoints) in chunks:
+# the next chunk is validated while the current one runs, so the arm starts moving after the validation of the
+# first chunk only. The controller cannot blend across two trajectories, so the arm stops at the end of every chunk.
+# The cycle time estimated offline is printed before the execution.
+#
+#   python3 07-chunked_trajectory.py --simulate
+#   python3 07-chunked_trajectory.py --ip 192.168.1.10 --waypoints 20000 --chunk-size 2000
+#
+# The path is centered on SPIRAL_CENTER: check that it is reachable and clear of obstacles before running it on a robot.
+
+SPIRAL_CENTER = (0.45, 0.0, 0.30)  # meters
+SPIRAL_RADIUS = 0.10  # meters
+SPIRAL_TURNS = 5
+TOOL_ORIENTATION = (0.0, 180.0, 90.0)  # degrees
+
+
+# This function returns the waypoints of a flat spiral, one row per waypoint in command_batch.CARTESIAN_WAYPOINT_FIELDS
+# order. The waypoints are closer than a millimeter, they are not blended.
+def build_spiral(count):
+
+    t = np.linspace(0.0, 1.0, count)
+    angle = 2 * np.pi * SPIRAL_TURNS * t
+    radius = SPIRAL_RADIUS * (0.2 + 0.8 * t)
+
+    poses = np.zeros((count, 7))
+    poses[:, 0] = SPIRAL_CENTER[0] + radius * np.cos(angle)
+    poses[:, 1] = SPIRAL_CENTER[1] + radius * np.sin(angle)
+    poses[:, 2] = SPIRAL_CENTER[2]
+    poses[:, 4:7] = TOOL_ORIENTATION
+
+    return poses
+
+
+# This function executes the spiral in chunks and prints the timings of the execution
+def example_chunked_trajectory(base, count, chunk_size):
+
+    # Waypoint trajectories only execute in AUTO mode
+    base.SelectOperatingMode(ModeSelection(operating_mode=OperatingModeType.Value("OPERATING_MODE_AUTO")))
+
+    poses = build_spiral(count)
+    executor = trajectory_executor.ChunkedTrajectoryExecutor(base, chunk_size=chunk_size, validator=trajectory_validator.TrajectoryValidator())
+
+    print("Estimated {}".format(cycle_time.estimate_cartesian(poses)))
+    print("Executing {} waypoints in chunks of about {}...".format(count, chunk_size))
+    report = executor.execute_cartesian(poses, Base_pb2.CARTESIAN_REFERENCE_FRAME_BASE)
+    print(report)
+    if report.validation_report is not None:
+        print(report.validation_report.trajectory_error_report)
+
+    return report.completed
+
+
+def main():
+    # Parse arguments
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--waypoints", type=int, help="number of waypoints of the spiral", default=20000)
+    parser.add_argument("--chunk-size", type=int, help="waypoints per chunk", default=trajectory_executor.DEFAULT_CHUNK_SIZE)
+    parser.add_argument("--simulate", action="store_true", help="execute on the simulator instead of a robot")
+    args = utilities.parseConnectionArguments(parser)
+
+    if args.simulate:
+        connection = utilities.DeviceConnection.createSimulatedConnection(latency=0.001, validation_time=20e-6)
+    else:
+        connection = utilities.DeviceConnection.createMqttConnection(args)
+
+    # Create connection to the device and get the router
+    with connection as router:
+
+        # Create required services
+        base = simulator.create_client(BaseClient, router)
+
+        # Example core
+        success = example_chunked_trajectory(base, args.waypoints, args.chunk_size)
+
+        return 0 if success else 1
+
+
+if __name__ == "__main__":
+    exit(main())
@@ -0,0 +1,193 @@
+#! /usr/bin/env python3
+
+###
+# KINOVA (R) KORTEX (TM)
+#
+# Copyright (c) 2024 Kinova inc. All rights reserved.
+#
+# This software may be modified and distributed
+# under the terms of the BSD 3-Clause license.
+#
+# Refer to the LICENSE file for details.
+#
+###
+
+# Chunked columnar streaming writer for cyclic feedback.
+#
+# Samples are extracted with a MessageExtractor into fixed-size chunks (preallocated NumPy structured arrays).
+# Full chunks are handed to a background thread that writes them as Parquet row groups or Arrow IPC record batches,
+# and starts a new file when the current one reaches a size or age limit. A fixed pool of chunks is reused, so the
+# memory used by a capture is bounded whatever its duration: if the disk can not keep up, whole chunks are dropped
+# and counted instead of growing a queue. If writing fails, the error is raised by the next append() that fills a
+# chunk, and by close().
+
+# pyarrow is necessary for this module to work. You may install it using pip with the command 'pip install pyarrow'
+import json
+import os
+import queue
+import threading
+import time
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from feedback_recorder import capture
+
+DEFAULT_CHUNK_SIZE = 10000  # samples, 10 s at 1 kHz
+DEFAULT_CHUNK_COUNT = 4
+DEFAULT_MAX_FILE_SIZE = 256 * 1024 * 1024  # bytes
+DEFAULT_MAX_FILE_DURATION = 3600.0  # seconds
+
+FORMATS = {"parquet": ".parquet", "arrow": ".arrow"}
+
+
+class ColumnarFeedbackWriter:
+    """
+    Streams the fields read by 'extractor' (a message_extractor.MessageExtractor) to Parquet or Arrow IPC files in
+    'directory'. Each sample also stores its feedback_id and timestamp. Files are named
+    <prefix>_<index>_<start time>.parquet (or .arrow) and rotated after max_file_size bytes or max_file_duration seconds.
+    """
+
+    def __init__(self, directory, extractor, format="parquet", prefix="feedback", chunk_size=DEFAULT_CHUNK_SIZE, chunk_count=DEFAULT_CHUNK_COUNT, max_file_size=DEFAULT_MAX_FILE_SIZE, max_file_duration=DEFAULT_MAX_FILE_DURATION, compression="zstd"):
+
+        if format not in FORMATS:
+            raise ValueError("The format must be one of {}".format(", ".join(FORMATS)))
+        if chunk_count < 2:
+            raise ValueError("At least 2 chunks are needed to write while recording")
+
+        self.directory = directory
+        self.extractor = extractor
+        self.format = format
+        self.prefix = prefix
+        self.chunk_size = chunk_size
+        self.max_file_size = max_file_size
+        self.max_file_duration = max_file_duration
+        self.compression = compression
+
+        self.dtype = np.dtype([("feedback_id", np.int64), ("timestamp", np.float64)] + extractor.dtype.descr)
+        # The recorded fields are kept in the schema metadata, so that a file can be replayed (see feedback_replay.py)
+        metadata = {"message": extractor.message_class.DESCRIPTOR.full_name, "fields": json.dumps(extractor.fields)}
+        self.schema = pa.schema([(name, pa.from_numpy_dtype(self.dtype[name]) if not self.dtype[name].hasobject else pa.string()) for name in self.dtype.names], metadata=metadata)
+
+        self.count = 0
+        self.dropped = 0
+        self.files = []
+        self.error = None
+
+        # Chunks cycle between the free pool, the recorder and the write queue
+        self._free = queue.Queue()
+        for i in range(chunk_count - 1):
+            self._free.put(np.zeros(chunk_size, dtype=self.dtype))
+        self._chunk = np.zeros(chunk_size, dtype=self.dtype)
+        self._index = 0
+        self._pending = queue.Queue()
+
+        self._sink = None
+        self._writer = None
+        self._file_start = None
+
+        os.makedirs(directory, exist_ok=True)
+        self._thread = threading.Thread(target=self._run, name="ColumnarFeedbackWriter", daemon=True)
+        self._thread.start()
+
+    # Called when entering 'with' statement
+    def __enter__(self):
+        return self
+
+    # Called when exiting 'with' statement
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is None:
+            self.close()
+            return
+        # An error of the writer must not replace the exception leaving the 'with' block, it stays in 'error'
+        try:
+            self.close()
+        except Exception:
+            pass
+
+    def append(self, feedback, timestamp=None):
+        if timestamp is None:
+            timestamp = time.time()
+        self._chunk[self._index] = (self.count, timestamp) + self.extractor(feedback)
+        self.count += 1
+        self._index += 1
+        if self._index == self.chunk_size:
+            self._flush_chunk()
+
+    # This function polls the cyclic client 'count' times at 'rate' (in Hz) and returns the jitter report of the capture
+    def record(self, base_cyclic_client, count, rate=1000):
+        return capture(base_cyclic_client, [self], count, rate)
+
+    def _flush_chunk(self):
+        # The writer thread stopped on an error: no chunk will come back to the free pool
+        if self.error is not None:
+            raise self.error
+        try:
+            chunk = self._free.get_nowait()
+        except queue.Empty:
+            # The writer thread is behind: drop this chunk and reuse its buffer
+            self.dropped += self._index
+            self._index = 0
+            return
+        self._pending.put((self._chunk, self._index))
+        self._chunk = chunk
+        self._index = 0
+
+    # This function writes the pending samples and closes the current file, the writer can not be used afterwards
+    def close(self):
+        if self._thread is None:
+            return
+        if self._index:
+            self._pending.put((self._chunk, self._index))
+            self._index = 0
+        self._pending.put(None)
+        self._thread.join()
+        self._thread = None
+        if self.error is not None:
+            raise self.error
+
+    def _run(self):
+        try:
+            while True:
+                item = self._pending.get()
+                if item is None:
+                    break
+                chunk, length = item
+                self._write(chunk[:length])
+                self._free.put(chunk)
+        except Exception as ex:
+            self.error = ex
+        finally:
+            self._close_file()
+
+    def _write(self, samples):
+        if self._writer is not None:
+            too_big = self._sink.tell() >= self.max_file_size
+            too_old = time.monotonic() - self._file_start >= self.max_file_duration
+            if too_big or too_old:
+                self._close_file()
+        if self._writer is None:
+            self._open_file()
+
+        columns = [pa.array(np.ascontiguousarray(samples[name]), type=self.schema.field(name).type) for name in self.dtype.names]
+        table = pa.Table.from_arrays(columns, schema=self.schema)
+        self._writer.write_table(table)
+
+    def _open_file(self):
+        name = "{}_{:05d}_{}{}".format(self.prefix, len(self.files), time.strftime("%Y%m%d-%H%M%S"), FORMATS[self.format])
+        path = os.path.join(self.directory, name)
+        self._sink = pa.OSFile(path, "wb")
+        if self.format == "parquet":
+            self._writer = pq.ParquetWriter(self._sink, self.schema, compression=self.compression)
+        else:
+            self._writer = pa.ipc.new_file(self._sink, self.schema, options=pa.ipc.IpcWriteOptions(compression=self.compression))
+        self._file_start = time.monotonic()
+        self.files.append(path)
+
+    def _close_file(self):
+        if self._writer is not None:
+            self._writer.close()
+            self._sink.close()
+            self._writer = None
+            self._sink = None
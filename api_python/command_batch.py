@@ -0,0 +1,441 @@
+#! /usr/bin/env python3
+
+###
+# KINOVA (R) KORTEX (TM)
+#
+# Copyright (c) 2024 Kinova inc. All rights reserved.
+#
+# This software may be modified and distributed
+# under the terms of the BSD 3-Clause license.
+#
+# Refer to the LICENSE file for details.
+#
+###
+
+# Vectorized builders for streams of commands and for waypoint lists.
+#
+# Building a stream command by command (new message, DESCRIPTOR lookups, one setattr per field) costs more than the
+# period of a fast stream. The commands of a stream only differ by their float values, so their protobuf encoding has
+# a fixed layout: the tags, lengths and constant fields are computed once from the message descriptors, and the
+# values of all the commands are written in one NumPy pass into an array of records of that layout.
+#
+# Each record is the serialized command, ready to be sent or parsed back into a message with FromString().
+# Every value is written, including zeros, which protobuf parsers accept.
+#
+# Waypoint lists are built the same way: one record per waypoint of each type, joined with the waypoint names into
+# the encoding of the 'waypoints' field, which is parsed once into the WaypointList with MergeFromString().
+# The waypoints are named name_prefix + index, counted from first_index (waypoint_0, waypoint_1, ... by default).
+
+import numpy as np
+from google.protobuf.descriptor import FieldDescriptor
+from kortex_api.autogen.messages import Base_pb2
+
+# Twist fields, in the column order of the twist arrays
+TWIST_FIELDS = ("linear_x", "linear_y", "linear_z", "angular_x", "angular_y", "angular_z")
+
+# Cartesian waypoint fields, in the column order of the pose arrays (meters and degrees)
+CARTESIAN_WAYPOINT_FIELDS = ("pose.x", "pose.y", "pose.z", "blending_radius", "pose.theta_x", "pose.theta_y", "pose.theta_z")
+
+# Toolpath fields, in the column order of the toolpath arrays. Straight segments only use the first 9 columns.
+TOOLPATH_FIELDS = CARTESIAN_WAYPOINT_FIELDS + ("linear_speed", "linear_acceleration", "via_point_x", "via_point_y", "via_point_z", "angular_acceleration")
+SEGMENT_FIELDS = TOOLPATH_FIELDS[:9]
+
+# Type codes of the rows of a toolpath
+TOOLPATH_SEGMENT = 0
+TOOLPATH_ARC = 1
+
+DEFAULT_NAME_PREFIX = "waypoint_"
+
+# Type of the lists holding each type_of_waypoint field
+WAYPOINT_LIST_TYPES = {
+    "cartesian_waypoint": "cartesian",
+    "angular_waypoint": "angular",
+    "straight_segment_toolpath": "toolpath",
+    "arc_point_toolpath": "toolpath",
+}
+
+_WIRETYPE_VARINT = 0
+_WIRETYPE_FIXED64 = 1
+_WIRETYPE_LENGTH_DELIMITED = 2
+_WIRETYPE_FIXED32 = 5
+
+# NumPy type and wire type of the fields that have a fixed size
+_FIXED_TYPES = {
+    FieldDescriptor.TYPE_FLOAT: ("<f4", _WIRETYPE_FIXED32),
+    FieldDescriptor.TYPE_DOUBLE: ("<f8", _WIRETYPE_FIXED64),
+}
+
+
+# This function returns the varint encoding of an integer. Negative values are encoded as 64-bit two's complement
+# (10 bytes), as protobuf encodes negative int32, int64 and enum values.
+def _varint(value):
+    value &= (1 << 64) - 1
+    encoded = bytearray()
+    while True:
+        byte = value & 0x7F
+        value >>= 7
+        if value:
+            encoded.append(byte | 0x80)
+        else:
+            encoded.append(byte)
+            return bytes(encoded)
+
+
+# This function returns the encoded key (field number and wire type) of a field
+def _key(field, wire_type):
+    return _varint((field.number << 3) | wire_type)
+
+
+# This function returns the encoding of a varint field (integer or enum)
+def _encode_varint_field(field, value):
+    return _key(field, _WIRETYPE_VARINT) + _varint(int(value))
+
+
+# This function returns the record dtype of fixed-size fields: the key of each field as a constant prefix,
+# followed by its value
+def _fixed_fields_dtype(fields):
+    layout = []
+    for field in fields:
+        if field.type not in _FIXED_TYPES:
+            raise ValueError("{} is not a float field".format(field.full_name))
+        numpy_type, wire_type = _FIXED_TYPES[field.type]
+        layout.append(("key_" + field.name, "V{}".format(len(_key(field, wire_type)))))
+        layout.append((field.name, numpy_type))
+    return np.dtype(layout)
+
+
+# This function writes the keys of fixed-size fields in every record of an array of _fixed_fields_dtype()
+def _write_fixed_keys(records, fields):
+    for field in fields:
+        records["key_" + field.name] = np.void(_key(field, _FIXED_TYPES[field.type][1]))
+
+
+# This function returns the serialized TwistCommand of each row of an (N, 6) array of twists (linear in m/s,
+# angular in deg/s, in TWIST_FIELDS order) as a structured array with one record per command.
+# The payload of command i is records[i].tobytes().
+def serialize_twist_commands(twists, reference_frame=Base_pb2.CARTESIAN_REFERENCE_FRAME_BASE, duration=0):
+
+    twists = np.asarray(twists, dtype=np.float64)
+    if twists.ndim != 2 or twists.shape[1] != len(TWIST_FIELDS):
+        raise ValueError("The twists must be an (N, {}) array".format(len(TWIST_FIELDS)))
+
+    descriptor = Base_pb2.TwistCommand.DESCRIPTOR
+    twist_field = descriptor.fields_by_name["twist"]
+    fields = [twist_field.message_type.fields_by_name[name] for name in TWIST_FIELDS]
+    twist_dtype = _fixed_fields_dtype(fields)
+
+    # The fields around the twist are the same for every command
+    prefix = _encode_varint_field(descriptor.fields_by_name["reference_frame"], reference_frame)
+    prefix += _key(twist_field, _WIRETYPE_LENGTH_DELIMITED) + _varint(twist_dtype.itemsize)
+    suffix = _encode_varint_field(descriptor.fields_by_name["duration"], duration)
+
+    dtype = np.dtype([("prefix", "V{}".format(len(prefix))), ("twist", twist_dtype), ("suffix", "V{}".format(len(suffix)))])
+    records = np.empty(len(twists), dtype=dtype)
+    records["prefix"] = np.void(prefix)
+    records["suffix"] = np.void(suffix)
+    _write_fixed_keys(records["twist"], fields)
+    for column, field in enumerate(fields):
+        records["twist"][field.name] = twists[:, column]
+
+    return records
+
+
+# This function returns the records of an array of serialized commands as a list of bytes
+def _payloads(records):
+    buffer = records.tobytes()
+    size = records.dtype.itemsize
+    return [buffer[i : i + size] for i in range(0, len(buffer), size)]
+
+
+# This function returns the serialized TwistCommand of each row of an (N, 6) array of twists, as a list of bytes
+def twist_command_payloads(twists, reference_frame=Base_pb2.CARTESIAN_REFERENCE_FRAME_BASE, duration=0):
+    return _payloads(serialize_twist_commands(twists, reference_frame, duration))
+
+
+# This function returns the TwistCommand of each row of an (N, 6) array of twists, ready for base.SendTwistCommand()
+def twist_commands(twists, reference_frame=Base_pb2.CARTESIAN_REFERENCE_FRAME_BASE, duration=0):
+    parse = Base_pb2.TwistCommand.FromString
+    return [parse(payload) for payload in twist_command_payloads(twists, reference_frame, duration)]
+
+
+# This function returns the serialized JointSpeeds command of each row of an (N, joints) array of joint speeds
+# (in deg/s, joint identifiers 0 to joints - 1) as a structured array with one record per command.
+# The payload of command i is records[i].tobytes().
+def serialize_joint_speeds_commands(speeds, duration=0):
+
+    speeds = np.asarray(speeds, dtype=np.float64)
+    if speeds.ndim != 2:
+        raise ValueError("The speeds must be an (N, joints) array")
+
+    descriptor = Base_pb2.JointSpeeds.DESCRIPTOR
+    joint_speeds_field = descriptor.fields_by_name["joint_speeds"]
+    joint_speed = joint_speeds_field.message_type
+    value_field = joint_speed.fields_by_name["value"]
+    if value_field.type not in _FIXED_TYPES:
+        raise ValueError("{} is not a float field".format(value_field.full_name))
+    numpy_type, wire_type = _FIXED_TYPES[value_field.type]
+    value_size = np.dtype(numpy_type).itemsize
+
+    # Each JointSpeed is a constant header (identifier), the speed value and a constant suffix (duration)
+    layout = []
+    suffix = _encode_varint_field(joint_speed.fields_by_name["duration"], duration)
+    for joint in range(speeds.shape[1]):
+        header = _encode_varint_field(joint_speed.fields_by_name["joint_identifier"], joint) + _key(value_field, wire_type)
+        size = len(header) + value_size + len(suffix)
+        header = _key(joint_speeds_field, _WIRETYPE_LENGTH_DELIMITED) + _varint(size) + header
+        layout.append((header, suffix))
+
+    trailer = _encode_varint_field(descriptor.fields_by_name["duration"], duration)
+
+    fields = []
+    for joint, (header, suffix) in enumerate(layout):
+        fields += [("header_{}".format(joint), "V{}".format(len(header))), ("value_{}".format(joint), numpy_type), ("suffix_{}".format(joint), "V{}".format(len(suffix)))]
+    fields.append(("trailer", "V{}".format(len(trailer))))
+
+    records = np.empty(len(speeds), dtype=np.dtype(fields))
+    for joint, (header, suffix) in enumerate(layout):
+        records["header_{}".format(joint)] = np.void(header)
+        records["value_{}".format(joint)] = speeds[:, joint]
+        records["suffix_{}".format(joint)] = np.void(suffix)
+    records["trailer"] = np.void(trailer)
+
+    return records
+
+
+# This function returns the serialized JointSpeeds command of each row of an (N, joints) array, as a list of bytes
+def joint_speeds_payloads(speeds, duration=0):
+    return _payloads(serialize_joint_speeds_commands(speeds, duration))
+
+
+# This function returns the JointSpeeds command of each row of an (N, joints) array of joint speeds,
+# ready for base.SendJointSpeedsCommand()
+def joint_speeds_commands(speeds, duration=0):
+    parse = Base_pb2.JointSpeeds.FromString
+    return [parse(payload) for payload in joint_speeds_payloads(speeds, duration)]
+
+
+# This function returns the record dtype of the float fields 'paths' of a message ("pose.x" for a field of a
+# sub-message) and the constant parts to write in each record, as (record field path, bytes) pairs
+def _message_dtype(descriptor, paths):
+
+    # Fields of the message, in order of first appearance, with the paths of their own fields for sub-messages
+    fields = {}
+    for path in paths:
+        name, _, rest = path.partition(".")
+        fields.setdefault(name, [])
+        if rest:
+            fields[name].append(rest)
+
+    layout = []
+    constants = []
+    for name, nested_paths in fields.items():
+        field = descriptor.fields_by_name[name]
+        if nested_paths:
+            nested_dtype, nested_constants = _message_dtype(field.message_type, nested_paths)
+            key = _key(field, _WIRETYPE_LENGTH_DELIMITED) + _varint(nested_dtype.itemsize)
+            constants.append((("key_" + name,), key))
+            constants += [((name,) + nested_path, value) for nested_path, value in nested_constants]
+            layout += [("key_" + name, "V{}".format(len(key))), (name, nested_dtype)]
+        else:
+            layout += _fixed_fields_dtype([field]).descr
+            constants.append((("key_" + name,), _key(field, _FIXED_TYPES[field.type][1])))
+
+    return np.dtype(layout), constants
+
+
+# This function returns the field of nested 'records' designated by a record field path
+def _record_field(records, path):
+    for name in path:
+        records = records[name]
+    return records
+
+
+# This function returns, for each row of 'values', the encoding of the 'field' sub-message made of the float fields
+# 'paths' (one per column of 'values') followed by the constant bytes 'suffix', as an (N, size) array of bytes
+def _sub_message_bytes(field, paths, values, suffix=b""):
+
+    message_dtype, constants = _message_dtype(field.message_type, paths)
+    header = _key(field, _WIRETYPE_LENGTH_DELIMITED) + _varint(message_dtype.itemsize + len(suffix))
+
+    dtype = np.dtype([("header", "V{}".format(len(header))), ("message", message_dtype), ("suffix", "V{}".format(len(suffix)))])
+    records = np.empty(len(values), dtype=dtype)
+    records["header"] = np.void(header)
+    if suffix:
+        records["suffix"] = np.void(suffix)
+    for path, value in constants:
+        _record_field(records["message"], path)[...] = np.void(value)
+    for column, path in enumerate(paths):
+        _record_field(records["message"], path.split("."))[...] = values[:, column]
+
+    return records.view(np.uint8).reshape(len(records), dtype.itemsize)
+
+
+# This function returns the encoding of the 'waypoints' field of a WaypointList. 'bodies' is a list of (rows, bytes)
+# pairs: the indices of waypoints of the same type and their encoded type_of_waypoint fields, as returned by
+# _sub_message_bytes(). The waypoints are named name_prefix + (first_index + index), unnamed if name_prefix is None.
+def _waypoints_payload(bodies, name_prefix, first_index=0):
+
+    waypoint_field = Base_pb2.WaypointList.DESCRIPTOR.fields_by_name["waypoints"]
+    waypoint_key = _key(waypoint_field, _WIRETYPE_LENGTH_DELIMITED)
+    name_key = _key(waypoint_field.message_type.fields_by_name["name"], _WIRETYPE_LENGTH_DELIMITED)
+    prefix = name_prefix.encode() if name_prefix is not None else None
+
+    # The waypoints of the same type whose index has the same number of digits have the same layout: each such group
+    # is written as an (N, size) array of bytes, then scattered at the offsets of its waypoints
+    count = sum(len(rows) for rows, body in bodies)
+    sizes = np.zeros(count, dtype=np.int64)
+    groups = []
+    for rows, body in bodies:
+        numbers = rows + first_index
+        digit_counts = np.searchsorted(10 ** np.arange(1, 19, dtype=np.int64), numbers, side="right") + 1
+        for digits in np.unique(digit_counts).tolist() if prefix is not None else [0]:
+            selected = digit_counts == digits if prefix is not None else slice(None)
+            group_rows = rows[selected]
+            group_numbers = numbers[selected]
+            name = name_key + _varint(len(prefix) + digits) + prefix if prefix is not None else b""
+            header = waypoint_key + _varint(len(name) + digits + body.shape[1])
+
+            start = len(header) + len(name)
+            group = np.empty((len(group_rows), start + digits + body.shape[1]), dtype=np.uint8)
+            group[:, : start] = np.frombuffer(header + name, dtype=np.uint8)
+            if digits:
+                powers = 10 ** np.arange(digits - 1, -1, -1, dtype=np.int64)
+                group[:, start : start + digits] = group_numbers[:, np.newaxis] // powers % 10 + ord("0")
+            group[:, start + digits :] = body[selected]
+
+            sizes[group_rows] = group.shape[1]
+            groups.append((group_rows, group))
+
+    offsets = np.cumsum(sizes) - sizes
+    payload = np.empty(int(sizes.sum()), dtype=np.uint8)
+    for group_rows, group in groups:
+        payload[offsets[group_rows, np.newaxis] + np.arange(group.shape[1])] = group
+
+    return payload.tobytes()
+
+
+# This function appends the waypoints encoded in 'payload' to 'waypoint_list', or to a new WaypointList, in place
+def _fill_waypoint_list(payload, waypoint_list, use_optimal_blending):
+    if waypoint_list is None:
+        waypoint_list = Base_pb2.WaypointList()
+    waypoint_list.MergeFromString(payload)
+    if use_optimal_blending is not None:
+        waypoint_list.use_optimal_blending = use_optimal_blending
+    return waypoint_list
+
+
+# This function returns an (N, columns) float array, or raises a ValueError
+def _rows(values, columns, what):
+    values = np.asarray(values, dtype=np.float64)
+    if values.ndim != 2 or values.shape[1] != columns:
+        raise ValueError("The {} must be an (N, {}) array".format(what, columns))
+    return values
+
+
+# This function adds a Cartesian waypoint for each row of an (N, 7) array of poses (in CARTESIAN_WAYPOINT_FIELDS
+# order) to 'waypoint_list' (a new WaypointList by default) and returns the list
+def cartesian_waypoint_list(poses, reference_frame=Base_pb2.CARTESIAN_REFERENCE_FRAME_BASE, waypoint_list=None, use_optimal_blending=True, name_prefix=DEFAULT_NAME_PREFIX, first_index=0):
+
+    poses = _rows(poses, len(CARTESIAN_WAYPOINT_FIELDS), "poses")
+    waypoint = Base_pb2.WaypointList.DESCRIPTOR.fields_by_name["waypoints"].message_type
+    field = waypoint.fields_by_name["cartesian_waypoint"]
+    suffix = _encode_varint_field(field.message_type.fields_by_name["reference_frame"], reference_frame)
+
+    bodies = [(np.arange(len(poses)), _sub_message_bytes(field, CARTESIAN_WAYPOINT_FIELDS, poses, suffix))]
+    return _fill_waypoint_list(_waypoints_payload(bodies, name_prefix, first_index), waypoint_list, use_optimal_blending)
+
+
+# This function adds an angular waypoint for each row of an (N, joints) array of joint angles (in degrees) to
+# 'waypoint_list' (a new WaypointList by default) and returns the list. 'blending' (0 to 1, 1 being optimal blending)
+# is a scalar or one value per waypoint.
+def angular_waypoint_list(angles, blending=1.0, waypoint_list=None, use_optimal_blending=True, name_prefix=DEFAULT_NAME_PREFIX, first_index=0):
+
+    angles = np.asarray(angles, dtype=np.float64)
+    if angles.ndim != 2:
+        raise ValueError("The angles must be an (N, joints) array")
+    blending = np.broadcast_to(np.asarray(blending, dtype=np.float64), (len(angles),))
+
+    waypoint = Base_pb2.WaypointList.DESCRIPTOR.fields_by_name["waypoints"].message_type
+    field = waypoint.fields_by_name["angular_waypoint"]
+    angles_field = field.message_type.fields_by_name["angles"]
+    blending_field = field.message_type.fields_by_name["blending"]
+    for value_field in (angles_field, blending_field):
+        if value_field.type not in _FIXED_TYPES:
+            raise ValueError("{} is not a float field".format(value_field.full_name))
+    angle_type = _FIXED_TYPES[angles_field.type][0]
+
+    # The angles are a packed repeated field: key, byte length, then the values
+    angles_key = _key(angles_field, _WIRETYPE_LENGTH_DELIMITED) + _varint(angles.shape[1] * np.dtype(angle_type).itemsize)
+    message_dtype = np.dtype([
+        ("key_angles", "V{}".format(len(angles_key))),
+        ("angles", angle_type, (angles.shape[1],)),
+    ] + _fixed_fields_dtype([blending_field]).descr)
+    header = _key(field, _WIRETYPE_LENGTH_DELIMITED) + _varint(message_dtype.itemsize)
+
+    records = np.empty(len(angles), dtype=np.dtype([("header", "V{}".format(len(header))), ("message", message_dtype)]))
+    records["header"] = np.void(header)
+    records["message"]["key_angles"] = np.void(angles_key)
+    records["message"]["angles"] = angles
+    _write_fixed_keys(records["message"], [blending_field])
+    records["message"]["blending"] = blending
+
+    bodies = [(np.arange(len(angles)), records.view(np.uint8).reshape(len(records), records.dtype.itemsize))]
+    return _fill_waypoint_list(_waypoints_payload(bodies, name_prefix, first_index), waypoint_list, use_optimal_blending)
+
+
+# This function adds a toolpath waypoint for each row of an (N, 13) array of points (in TOOLPATH_FIELDS order) to
+# 'waypoint_list' (a new WaypointList by default) and returns the list. 'kinds' gives the type of each row,
+# TOOLPATH_SEGMENT (straight segment, the arc columns are ignored) or TOOLPATH_ARC (arc through the via point).
+def toolpath_waypoint_list(points, kinds, waypoint_list=None, use_optimal_blending=True, name_prefix=DEFAULT_NAME_PREFIX, first_index=0):
+
+    points = _rows(points, len(TOOLPATH_FIELDS), "toolpath points")
+    kinds = np.asarray(kinds)
+    if kinds.shape != (len(points),):
+        raise ValueError("A type code is needed for each of the {} toolpath points".format(len(points)))
+    arcs = kinds == TOOLPATH_ARC
+    segments = kinds == TOOLPATH_SEGMENT
+    if not np.all(arcs | segments):
+        raise ValueError("The toolpath type codes must be TOOLPATH_SEGMENT or TOOLPATH_ARC")
+
+    waypoint = Base_pb2.WaypointList.DESCRIPTOR.fields_by_name["waypoints"].message_type
+    bodies = []
+    for rows, field, paths in (
+        (np.flatnonzero(segments), waypoint.fields_by_name["straight_segment_toolpath"], SEGMENT_FIELDS),
+        (np.flatnonzero(arcs), waypoint.fields_by_name["arc_point_toolpath"], TOOLPATH_FIELDS),
+    ):
+        bodies.append((rows, _sub_message_bytes(field, paths, points[rows, : len(paths)])))
+
+    return _fill_waypoint_list(_waypoints_payload(bodies, name_prefix, first_index), waypoint_list, use_optimal_blending)
+
+
+# This function returns the type of a WaypointList ("cartesian", "angular" or "toolpath") and its waypoints as the
+# arrays taken by the builders of this module: (poses,), (angles, blending) or (points, kinds). It raises a ValueError
+# if the list mixes types of waypoints or if its angular waypoints have different numbers of angles.
+def waypoint_list_arrays(waypoint_list):
+
+    waypoints = waypoint_list.waypoints
+    kinds = [waypoint.WhichOneof("type_of_waypoint") for waypoint in waypoints]
+    types = {WAYPOINT_LIST_TYPES.get(kind) for kind in kinds}
+    if None in types or len(types) > 1:
+        raise ValueError("The waypoint list mixes or holds unsupported types of waypoints: {}".format(sorted(set(map(str, kinds)))))
+    list_type = types.pop() if types else "cartesian"
+
+    if list_type == "angular":
+        angles = [list(waypoint.angular_waypoint.angles) for waypoint in waypoints]
+        if len({len(row) for row in angles}) > 1:
+            raise ValueError("The angular waypoints have different numbers of angles")
+        return list_type, (np.array(angles, dtype=np.float64).reshape(len(angles), -1), np.array([waypoint.angular_waypoint.blending for waypoint in waypoints]))
+
+    fields = CARTESIAN_WAYPOINT_FIELDS if list_type == "cartesian" else TOOLPATH_FIELDS
+    values = np.zeros((len(waypoints), len(fields)))
+    for row, (waypoint, kind) in enumerate(zip(waypoints, kinds)):
+        point = getattr(waypoint, kind)
+        for column, path in enumerate(fields if kind != "straight_segment_toolpath" else SEGMENT_FIELDS):
+            message = point
+            for name in path.split("."):
+                message = getattr(message, name)
+            values[row, column] = message
+
+    if list_type == "cartesian":
+        return list_type, (values,)
+    return list_type, (values, np.array([TOOLPATH_ARC if kind == "arc_point_toolpath" else TOOLPATH_SEGMENT for kind in kinds], dtype=np.int64))
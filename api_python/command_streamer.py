@@ -0,0 +1,219 @@
+#! /usr/bin/env python3
+
+###
+# KINOVA (R) KORTEX (TM)
+#
+# Copyright (c) 2024 Kinova inc. All rights reserved.
+#
+# This software may be modified and distributed
+# under the terms of the BSD 3-Clause license.
+#
+# Refer to the LICENSE file for details.
+#
+###
+
+# Latest-value-wins asynchronous command streamer.
+#
+# When a control loop calls base.SendTwistCommand() itself, every RPC latency spike delays the loop and all the
+# commands after it. CommandStreamer decouples them: the loop submits setpoints to a single-slot mailbox and a
+# dedicated thread sends them. A setpoint that is replaced before the thread could send it is dropped (and counted),
+# so the robot always receives the newest setpoint and no backlog builds up.
+#
+# If the producer stops submitting for more than 'stall_timeout' seconds, the streamer calls 'stop' (e.g. base.Stop)
+# once, so a crashed or frozen control loop does not leave the robot moving on its last setpoint.
+#
+# Typical use:
+#
+#   with CommandStreamer(base.SendTwistCommand, base.Stop, stall_timeout=0.1) as streamer:
+#       for command in commands:
+#           streamer.submit(command)
+#           loop.wait()
+#   print(streamer.report())
+#
+# play() runs this loop for a prebuilt list of commands (see command_batch.py).
+
+import contextlib
+import threading
+import time
+
+import numpy as np
+
+from periodic_loop import PeriodicLoop
+
+DEFAULT_STALL_TIMEOUT = 0.2  # seconds
+DEFAULT_HISTORY = 10000  # latencies kept for the report
+
+
+class StreamerReport:
+    """
+    Counters and latency statistics of a CommandStreamer. 'latencies' are the durations of the send calls and
+    'ages' the times between the submission of the setpoints and the start of their send call, in seconds.
+    """
+
+    def __init__(self, submitted, sent, dropped, errors, stops, latencies, ages):
+        self.submitted = submitted
+        self.sent = sent
+        self.dropped = dropped
+        self.errors = errors
+        self.stops = stops
+        self.latencies = latencies
+        self.ages = ages
+
+    # This function returns the send latency below which 'q' percent of the recent sends fall
+    def percentile(self, q):
+        return float(np.percentile(self.latencies, q)) if len(self.latencies) else 0.0
+
+    def __str__(self):
+        lines = [
+            "Setpoints submitted: {}, sent: {}, dropped: {}, send errors: {}, stops: {}".format(self.submitted, self.sent, self.dropped, self.errors, self.stops),
+        ]
+        if len(self.latencies):
+            lines.append("Send latency mean: {:.3f} ms, p50: {:.3f} ms, p99: {:.3f} ms, max: {:.3f} ms".format(
+                self.latencies.mean() * 1e3, self.percentile(50) * 1e3, self.percentile(99) * 1e3, self.latencies.max() * 1e3))
+            lines.append("Setpoint age mean: {:.3f} ms, max: {:.3f} ms".format(self.ages.mean() * 1e3, self.ages.max() * 1e3))
+        return "\n".join(lines)
+
+
+class CommandStreamer:
+    """
+    Sends the latest setpoint given to submit() with 'send' (e.g. base.SendTwistCommand or base.SendJointSpeedsCommand)
+    from a dedicated thread. 'stop' (e.g. base.Stop), when given, is called once each time the producer stalls for
+    more than 'stall_timeout' seconds after a setpoint was sent, and by close(). Errors raised by 'send' and 'stop' are
+    counted and the last one is kept in 'last_error', the stream goes on.
+    'realtime', a periodic_loop.RealTime, gives the priority of the sender thread.
+    """
+
+    def __init__(self, send, stop=None, stall_timeout=DEFAULT_STALL_TIMEOUT, history=DEFAULT_HISTORY, realtime=None):
+
+        if stall_timeout <= 0:
+            raise ValueError("The stall timeout must be greater than 0")
+
+        self.send = send
+        self.stop = stop
+        self.stall_timeout = stall_timeout
+
+        self.submitted = 0
+        self.sent = 0
+        self.dropped = 0
+        self.errors = 0
+        self.stops = 0
+        self.last_error = None
+
+        self._latencies = np.zeros(history)
+        self._ages = np.zeros(history)
+        # The settings of the sender thread, with its latency buffers to pre-fault
+        self.realtime = realtime.for_thread([self._latencies, self._ages]) if realtime is not None else None
+
+        self._condition = threading.Condition()
+        self._pending = None
+        self._submitted_at = None
+        self._last_submit = None
+        # True while the robot may be moving on a setpoint that was sent
+        self._moving = False
+        self._closing = False
+
+        self._thread = threading.Thread(target=self._run, name="CommandStreamer", daemon=True)
+        self._thread.start()
+
+    # Called when entering 'with' statement
+    def __enter__(self):
+        return self
+
+    # Called when exiting 'with' statement
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    # This function replaces the setpoint waiting to be sent, it never blocks on the send call
+    def submit(self, command):
+        with self._condition:
+            if self._pending is not None:
+                self.dropped += 1
+            self._pending = command
+            self._submitted_at = time.perf_counter()
+            self._last_submit = self._submitted_at
+            self.submitted += 1
+            self._condition.notify()
+
+    # This function stops the sender thread, after calling 'stop' if a setpoint was sent
+    def close(self):
+        if self._thread is None:
+            return
+        with self._condition:
+            self._closing = True
+            self._condition.notify()
+        self._thread.join()
+        self._thread = None
+
+    def _run(self):
+        if self.realtime is None:
+            self._stream()
+        else:
+            with self.realtime:
+                self._stream()
+
+    def _stream(self):
+        while True:
+            with self._condition:
+                while self._pending is None and not self._closing:
+                    if self._moving and time.perf_counter() - self._last_submit >= self.stall_timeout:
+                        break
+                    timeout = self._last_submit + self.stall_timeout - time.perf_counter() if self._moving else None
+                    self._condition.wait(timeout)
+
+                command = self._pending
+                submitted_at = self._submitted_at
+                self._pending = None
+                closing = self._closing
+
+            if command is not None and not closing:
+                self._send(command, submitted_at)
+            elif self._moving:
+                # The producer stalled or the streamer is closing
+                self._stop()
+            if closing:
+                return
+
+    def _send(self, command, submitted_at):
+        start = time.perf_counter()
+        try:
+            self.send(command)
+        except Exception as ex:
+            self.errors += 1
+            self.last_error = ex
+        end = time.perf_counter()
+
+        slot = self.sent % len(self._latencies)
+        self._latencies[slot] = end - start
+        self._ages[slot] = start - submitted_at
+        self.sent += 1
+        self._moving = True
+
+    def _stop(self):
+        self._moving = False
+        if self.stop is None:
+            return
+        self.stops += 1
+        try:
+            self.stop()
+        except Exception as ex:
+            self.errors += 1
+            self.last_error = ex
+
+    def report(self):
+        count = min(self.sent, len(self._latencies))
+        return StreamerReport(self.submitted, self.sent, self.dropped, self.errors, self.stops, self._latencies[:count].copy(), self._ages[:count].copy())
+
+
+# This function submits 'commands' one every 'period' seconds on absolute deadlines through a CommandStreamer and
+# returns the jitter report of the loop and the report of the streamer. The robot is stopped at the end of the stream,
+# or if the loop stalls for more than 'stall_timeout' seconds (4 periods by default).
+# 'realtime', a periodic_loop.RealTime, is applied to the loop and, for the priority, to the sender thread.
+def play(commands, send, period, stop=None, stall_timeout=None, realtime=None):
+    loop = PeriodicLoop(period)
+    with CommandStreamer(send, stop, stall_timeout if stall_timeout is not None else 4 * period, realtime=realtime) as streamer:
+        with realtime if realtime is not None else contextlib.nullcontext():
+            for i in loop.ticks(len(commands)):
+                streamer.submit(commands[i])
+            # The last command is held for a whole period too
+            loop.wait()
+    return loop.report(), streamer.report()
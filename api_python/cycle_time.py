@@ -0,0 +1,285 @@
+#! /usr/bin/env python3
+
+###
+# KINOVA (R) KORTEX (TM)
+#
+# Copyright (c) 2024 Kinova inc. All rights reserved.
+#
+# This software may be modified and distributed
+# under the terms of the BSD 3-Clause license.
+#
+# Refer to the LICENSE file for details.
+#
+###
+
+# Offline cycle time estimation of waypoint lists.
+#
+# The time of a trajectory is estimated from its geometry, without the robot, for all the segments at once:
+#
+#   - length of each segment: straight line, or arc of the circle through the previous waypoint, the via point and
+#     the end point for toolpath arcs; rotation angle between the orientations; joint displacements for angular lists
+#   - motions: the arm stops at the waypoints without blending and goes through the blended ones, so consecutive
+#     segments joined by blended waypoints form one motion. A blending radius r cuts the corner of a waypoint
+#     where the path turns by an angle a, shortening it by about 2 r (1 - cos(a / 2)).
+#   - time of each motion under trapezoidal speed profiles: the cruise time of its segments at their speed, plus the
+#     acceleration and deceleration ramps (v / 2a each), or a triangular profile 2 sqrt(L / a) when the motion is too
+#     short to reach its speed. Linear, orientation and joint motions are synchronized: the slowest one sets the time.
+#
+# This is a planning model: the controller also limits the speed in tight blends and near singularities, so the
+# estimate is a lower bound that is mostly useful to compare trajectories and cells. The default limits are the
+# speeds used when a waypoint does not give its own, replace them by those configured on the arm.
+
+import numpy as np
+
+from command_batch import CARTESIAN_WAYPOINT_FIELDS, TOOLPATH_ARC, TOOLPATH_FIELDS, waypoint_list_arrays
+from kinematics import rotation_distances, rotation_matrices
+
+# Default limits
+LINEAR_SPEED = 0.1  # m/s
+LINEAR_ACCELERATION = 0.5  # m/s^2
+ANGULAR_SPEED = 30.0  # deg/s, orientation of the tool
+ANGULAR_ACCELERATION = 60.0  # deg/s^2
+JOINT_SPEED = 20.0  # deg/s
+JOINT_ACCELERATION = 40.0  # deg/s^2
+
+_POSITION = [CARTESIAN_WAYPOINT_FIELDS.index(name) for name in ("pose.x", "pose.y", "pose.z")]
+_ORIENTATION = [CARTESIAN_WAYPOINT_FIELDS.index(name) for name in ("pose.theta_x", "pose.theta_y", "pose.theta_z")]
+_BLENDING_RADIUS = CARTESIAN_WAYPOINT_FIELDS.index("blending_radius")
+_VIA_POINT = [TOOLPATH_FIELDS.index(name) for name in ("via_point_x", "via_point_y", "via_point_z")]
+_LINEAR_SPEED = TOOLPATH_FIELDS.index("linear_speed")
+_LINEAR_ACCELERATION = TOOLPATH_FIELDS.index("linear_acceleration")
+_ANGULAR_ACCELERATION = TOOLPATH_FIELDS.index("angular_acceleration")
+
+
+class CycleTimeEstimate:
+    """
+    Estimated timeline of a trajectory. Segment i goes from waypoint i to waypoint i + 1 (from the start pose to
+    waypoint 0 when a start is given, then segment i ends at waypoint i). 'lengths' are in meters (degrees for angular
+    lists), 'durations' in seconds, 'arrivals' the times at which the waypoints are reached and 'stops' tells which
+    waypoints the arm stops at.
+    """
+
+    def __init__(self, lengths, durations, arrivals, stops):
+        self.lengths = lengths
+        self.durations = durations
+        self.arrivals = arrivals
+        self.stops = stops
+
+    @property
+    def total(self):
+        return float(self.arrivals[-1]) if len(self.arrivals) else 0.0
+
+    @property
+    def path_length(self):
+        return float(self.lengths.sum())
+
+    # This function returns the timeline as a pandas DataFrame, one row per waypoint
+    def to_dataframe(self):
+        import pandas as pd
+
+        offset = len(self.arrivals) - len(self.durations)
+        return pd.DataFrame({
+            "arrival": self.arrivals,
+            "segment_length": np.concatenate((np.zeros(offset), self.lengths)),
+            "segment_duration": np.concatenate((np.zeros(offset), self.durations)),
+            "stop": self.stops,
+        })
+
+    def __str__(self):
+        return "Cycle time: {:.3f} s, {} segments, path length: {:.4f}, stops: {}".format(self.total, len(self.durations), self.path_length, int(self.stops.sum()))
+
+
+# This function returns the rotation angles in degrees between consecutive orientations of (N, 3) Euler angles
+def _rotation_angles(thetas):
+    rotations = rotation_matrices(thetas)
+    return rotation_distances(rotations[:-1], rotations[1:])
+
+
+# This function returns the lengths of the arcs from 'starts' through 'vias' to 'ends' (arrays of shape (N, 3)),
+# the polyline length for aligned points
+def arc_lengths(starts, vias, ends):
+    ab = vias - starts
+    ac = ends - starts
+    normals = np.cross(ab, ac)
+    normal_norms = np.einsum("ij,ij->i", normals, normals)
+    polyline = np.linalg.norm(ab, axis=1) + np.linalg.norm(ends - vias, axis=1)
+
+    degenerate = normal_norms < 1e-18
+    safe = np.where(degenerate, 1.0, normal_norms)[:, np.newaxis]
+    # Circumcenter of the triangle (start, via, end)
+    centers = starts + (np.einsum("ij,ij->i", ac, ac)[:, np.newaxis] * np.cross(normals, ab) + np.einsum("ij,ij->i", ab, ab)[:, np.newaxis] * np.cross(ac, normals)) / (2.0 * safe)
+    radii = np.linalg.norm(starts - centers, axis=1)
+
+    # Angles from the start to the via point and from the via point to the end, counted around the normal
+    unit_normals = normals / np.sqrt(safe)
+
+    def angle(u, v):
+        return np.mod(np.arctan2(np.einsum("ij,ij->i", unit_normals, np.cross(u, v)), np.einsum("ij,ij->i", u, v)), 2 * np.pi)
+
+    sweep = angle(starts - centers, vias - centers) + angle(vias - centers, ends - centers)
+    return np.where(degenerate, polyline, radii * sweep)
+
+
+# This function returns the corner angles in radians of a polyline at its inner vertices
+def _turn_angles(points):
+    directions = np.diff(points, axis=0)
+    norms = np.linalg.norm(directions, axis=1)
+    directions = directions / np.where(norms > 0, norms, 1.0)[:, np.newaxis]
+    return np.arccos(np.clip(np.einsum("ij,ij->i", directions[:-1], directions[1:]), -1.0, 1.0))
+
+
+# This function returns the durations of segments grouped into motions. 'distances', 'speeds' and 'accelerations' have
+# shape (segments, axes) and 'stops' tells, for each waypoint between two segments, if the arm stops there.
+def _motion_durations(distances, speeds, accelerations, stops):
+
+    count = len(distances)
+    if count == 0:
+        return np.zeros(0)
+
+    cruise = distances / speeds
+    ramp = speeds / accelerations
+    # Motions: the segments between two stops
+    starts = np.flatnonzero(np.concatenate(([True], stops)))
+    motion = np.cumsum(np.concatenate(([True], stops))) - 1
+
+    motion_cruise = np.add.reduceat(cruise, starts, axis=0)
+    motion_distance = np.add.reduceat(distances, starts, axis=0)
+    ends = np.append(starts[1:], count) - 1
+    # Acceleration at the start of the motion, deceleration at its end
+    motion_ramps = (ramp[starts] + ramp[ends]) / 2.0
+    # Speed and acceleration reachable by the whole motion
+    slowest_acceleration = np.minimum.reduceat(accelerations, starts, axis=0)
+    fastest_speed = np.maximum.reduceat(speeds, starts, axis=0)
+    trapezoid = motion_distance * slowest_acceleration >= fastest_speed * fastest_speed
+    motion_time = np.where(trapezoid, motion_cruise + motion_ramps, 2.0 * np.sqrt(motion_distance / slowest_acceleration))
+
+    # The slowest axis sets the time of each motion, and each segment lasts at least the cruise time of its slowest
+    # axis, since the axes are synchronized
+    segment_cruise = cruise.max(axis=1)
+    motion_segment_cruise = np.add.reduceat(segment_cruise, starts)
+    motion_time = np.maximum(motion_time.max(axis=1), motion_segment_cruise)
+    # The time of a motion is shared between its segments in proportion to their cruise time, equally for a motion
+    # without displacement
+    lengths = np.bincount(motion)
+    share = np.where(motion_segment_cruise[motion] > 0, segment_cruise / np.where(motion_segment_cruise > 0, motion_segment_cruise, 1.0)[motion], 1.0 / lengths[motion])
+    return motion_time[motion] * share
+
+
+# This function assembles the estimate from the segment lengths and durations
+def _estimate(lengths, durations, stops):
+    arrivals = np.concatenate(([0.0], np.cumsum(durations)))
+    all_stops = np.concatenate(([True], stops, [True])) if len(durations) else np.ones(len(arrivals), dtype=bool)
+    return CycleTimeEstimate(lengths, durations, arrivals, all_stops)
+
+
+# This function returns the stops at the inner waypoints of a list: waypoints without blending, none with optimal
+# blending
+def _stops(blending, use_optimal_blending):
+    inner = np.asarray(blending[1:-1])
+    return np.zeros(len(inner), dtype=bool) if use_optimal_blending else inner <= 0
+
+
+# This function estimates the cycle time of an (N, 7) array of Cartesian waypoints (command_batch order). 'start' is
+# the pose (x, y, z, theta_x, theta_y, theta_z) of the arm before the first waypoint, the timeline starts at waypoint 0
+# when it is not given.
+def estimate_cartesian(poses, start=None, linear_speed=LINEAR_SPEED, linear_acceleration=LINEAR_ACCELERATION, angular_speed=ANGULAR_SPEED, angular_acceleration=ANGULAR_ACCELERATION, use_optimal_blending=True):
+
+    poses = np.asarray(poses, dtype=np.float64)
+    if poses.ndim != 2 or poses.shape[1] != len(CARTESIAN_WAYPOINT_FIELDS):
+        raise ValueError("The poses must be an (N, {}) array".format(len(CARTESIAN_WAYPOINT_FIELDS)))
+    if start is not None:
+        start_row = np.zeros((1, len(CARTESIAN_WAYPOINT_FIELDS)))
+        start_row[0, _POSITION + _ORIENTATION] = start
+        poses = np.concatenate((start_row, poses))
+
+    positions = poses[:, _POSITION]
+    radii = poses[:, _BLENDING_RADIUS]
+    lengths = np.linalg.norm(np.diff(positions, axis=0), axis=1)
+    rotations = _rotation_angles(poses[:, _ORIENTATION])
+    stops = _stops(radii, use_optimal_blending)
+
+    # Blended corners are cut, half of the shortening on each side
+    shortening = 2.0 * radii[1:-1] * (1.0 - np.cos(_turn_angles(positions) / 2.0)) * ~stops
+    distances = lengths.copy()
+    distances[:-1] -= shortening / 2.0
+    distances[1:] -= shortening / 2.0
+    distances = np.maximum(distances, 0.0)
+
+    count = len(lengths)
+    speeds = np.broadcast_to([linear_speed, angular_speed], (count, 2))
+    accelerations = np.broadcast_to([linear_acceleration, angular_acceleration], (count, 2))
+    durations = _motion_durations(np.column_stack((distances, rotations)), speeds, accelerations, stops)
+    return _estimate(distances, durations, stops)
+
+
+# This function estimates the cycle time of an (N, joints) array of joint angles in degrees with their blending
+# (a scalar or one value per waypoint). 'start' is the joint angles before the first waypoint. The speed and
+# acceleration limits are scalars or one value per joint.
+def estimate_angular(angles, blending=1.0, start=None, joint_speed=JOINT_SPEED, joint_acceleration=JOINT_ACCELERATION, use_optimal_blending=True):
+
+    angles = np.asarray(angles, dtype=np.float64)
+    if angles.ndim != 2:
+        raise ValueError("The angles must be an (N, joints) array")
+    blending = np.broadcast_to(np.asarray(blending, dtype=np.float64), (len(angles),))
+    if start is not None:
+        angles = np.concatenate((np.asarray(start, dtype=np.float64)[np.newaxis], angles))
+        blending = np.concatenate(([0.0], blending))
+
+    displacements = np.abs(np.diff(angles, axis=0))
+    stops = _stops(blending, use_optimal_blending)
+    count, joints = displacements.shape
+    speeds = np.broadcast_to(np.asarray(joint_speed, dtype=np.float64), (count, joints))
+    accelerations = np.broadcast_to(np.asarray(joint_acceleration, dtype=np.float64), (count, joints))
+    durations = _motion_durations(displacements, speeds, accelerations, stops)
+    return _estimate(displacements.max(axis=1) if joints else np.zeros(count), durations, stops)
+
+
+# This function estimates the cycle time of an (N, 13) array of toolpath waypoints (command_batch.TOOLPATH_FIELDS
+# order) with their type codes. Each segment runs at the linear speed and acceleration of its end waypoint, arcs
+# follow the circle through their via point. 'start' is the pose of the arm before the first waypoint.
+def estimate_toolpath(points, kinds, start=None, angular_speed=ANGULAR_SPEED, angular_acceleration=ANGULAR_ACCELERATION, use_optimal_blending=True):
+
+    points = np.asarray(points, dtype=np.float64)
+    kinds = np.asarray(kinds)
+    if points.ndim != 2 or points.shape[1] != len(TOOLPATH_FIELDS) or kinds.shape != (len(points),):
+        raise ValueError("The toolpath must be an (N, {}) array with one type code per point".format(len(TOOLPATH_FIELDS)))
+    if start is not None:
+        start_row = np.zeros((1, len(TOOLPATH_FIELDS)))
+        start_row[0, _POSITION + _ORIENTATION] = start
+        points = np.concatenate((start_row, points))
+        kinds = np.concatenate(([0], kinds))
+
+    positions = points[:, _POSITION]
+    radii = points[:, _BLENDING_RADIUS]
+    arcs = (kinds == TOOLPATH_ARC)[1:]
+
+    lengths = np.linalg.norm(np.diff(positions, axis=0), axis=1)
+    if arcs.any():
+        lengths[arcs] = arc_lengths(positions[:-1][arcs], points[1:, _VIA_POINT][arcs], positions[1:][arcs])
+    rotations = _rotation_angles(points[:, _ORIENTATION])
+    stops = _stops(radii, use_optimal_blending)
+
+    # The corners are cut on the chords of the arcs, an approximation for the blends next to arcs
+    shortening = 2.0 * radii[1:-1] * (1.0 - np.cos(_turn_angles(positions) / 2.0)) * ~stops
+    distances = lengths.copy()
+    distances[:-1] -= shortening / 2.0
+    distances[1:] -= shortening / 2.0
+    distances = np.maximum(distances, 0.0)
+
+    count = len(lengths)
+    linear_speeds = np.where(points[1:, _LINEAR_SPEED] > 0, points[1:, _LINEAR_SPEED], LINEAR_SPEED)
+    linear_accelerations = np.where(points[1:, _LINEAR_ACCELERATION] > 0, points[1:, _LINEAR_ACCELERATION], LINEAR_ACCELERATION)
+    # The angular acceleration of the arcs applies to their orientation change
+    orientation_accelerations = np.where(arcs & (points[1:, _ANGULAR_ACCELERATION] > 0), points[1:, _ANGULAR_ACCELERATION], angular_acceleration)
+    speeds = np.column_stack((linear_speeds, np.full(count, angular_speed)))
+    accelerations = np.column_stack((linear_accelerations, orientation_accelerations))
+    durations = _motion_durations(np.column_stack((distances, rotations)), speeds, accelerations, stops)
+    return _estimate(distances, durations, stops)
+
+
+# This function estimates the cycle time of a Base_pb2.WaypointList, with the options of the estimate_* functions
+def estimate_waypoint_list(waypoint_list, **options):
+    list_type, arrays = waypoint_list_arrays(waypoint_list)
+    options.setdefault("use_optimal_blending", waypoint_list.use_optimal_blending)
+    estimate = {"cartesian": estimate_cartesian, "angular": estimate_angular, "toolpath": estimate_toolpath}[list_type]
+    return estimate(*arrays, **options)
@@ -0,0 +1,214 @@
+#! /usr/bin/env python3
+
+###
+# KINOVA (R) KORTEX (TM)
+#
+# Copyright (c) 2024 Kinova inc. All rights reserved.
+#
+# This software may be modified and distributed
+# under the terms of the BSD 3-Clause license.
+#
+# Refer to the LICENSE file for details.
+#
+###
+
+# Shared-memory fan-out of cyclic feedback to local processes.
+#
+# A single FeedbackPublisher polls the robot (it is a sink for feedback_recorder.capture()) and writes each sample
+# into a ring buffer held in a multiprocessing.shared_memory block. Any number of FeedbackSubscriber, in other
+# processes, tail the ring at full rate without adding traffic to the controller.
+#
+# Shared memory layout:
+#
+#   header (HEADER_SIZE bytes): magic, capacity, record size, published count, size of the dtype description
+#   dtype description (JSON) | sequence numbers (uint64 x capacity) | records (record dtype x capacity)
+#
+# The ring is lock-free, every slot is protected by a sequence number (seqlock): while sample n is written its slot
+# sequence is 2n+1, it becomes 2n+2 once the record is complete. Readers copy a range of slots and keep only the
+# records whose sequence was 2n+2 both before and after the copy, which rejects torn and overwritten records.
+# There must be a single publisher per ring.
+
+import json
+import sys
+import time
+from multiprocessing import resource_tracker, shared_memory
+
+import numpy as np
+
+MAGIC = b"KFBRING1"
+HEADER_SIZE = 64
+ALIGNMENT = 64
+DEFAULT_CAPACITY = 4096  # samples, about 4 s at 1 kHz
+DEFAULT_NAME = "kortex_feedback"
+
+# Offsets of the header fields, in uint64 words after the magic
+_CAPACITY, _RECORD_SIZE, _HEAD, _DESCRIPTION_SIZE = range(1, 5)
+
+# Rings published by this process: before Python 3.13, its resource tracker holds a single registration per block,
+# which the subscribers of this process must leave to the publisher
+_published = set()
+
+
+def _align(offset):
+    return -(-offset // ALIGNMENT) * ALIGNMENT
+
+
+# This function returns views on the header, sequence numbers and records of a ring
+def _map_ring(buffer, dtype, capacity, description_size):
+    header = np.ndarray((HEADER_SIZE // 8,), dtype=np.uint64, buffer=buffer)
+    sequences_offset = _align(HEADER_SIZE + description_size)
+    records_offset = _align(sequences_offset + 8 * capacity)
+    sequences = np.ndarray((capacity,), dtype=np.uint64, buffer=buffer, offset=sequences_offset)
+    records = np.ndarray((capacity,), dtype=dtype, buffer=buffer, offset=records_offset)
+    return header, sequences, records
+
+
+class FeedbackPublisher:
+    """
+    Creates the shared memory ring 'name' and publishes the fields read by 'extractor'
+    (a message_extractor.MessageExtractor with numeric fields only), plus feedback_id and timestamp.
+    Call close() (or use it as a context manager) to remove the shared memory block.
+    """
+
+    def __init__(self, extractor, name=DEFAULT_NAME, capacity=DEFAULT_CAPACITY):
+
+        self.dtype = np.dtype([("feedback_id", np.int64), ("timestamp", np.float64)] + extractor.dtype.descr)
+        if self.dtype.hasobject:
+            raise ValueError("Only numeric fields can be published")
+
+        self.extractor = extractor
+        self.name = name
+        self.capacity = capacity
+        self.count = 0
+
+        description = json.dumps([list(field) for field in self.dtype.descr]).encode("utf-8")
+        size = _align(_align(HEADER_SIZE + len(description)) + 8 * capacity) + self.dtype.itemsize * capacity
+
+        self._memory = shared_memory.SharedMemory(name=name, create=True, size=size)
+        _published.add(self._memory._name)
+        self._memory.buf[HEADER_SIZE : HEADER_SIZE + len(description)] = description
+        self._header, self._sequences, self._records = _map_ring(self._memory.buf, self.dtype, capacity, len(description))
+
+        self._sequences[:] = 0
+        self._header[_CAPACITY] = capacity
+        self._header[_RECORD_SIZE] = self.dtype.itemsize
+        self._header[_HEAD] = 0
+        self._header[_DESCRIPTION_SIZE] = len(description)
+        # The magic is written last, subscribers can not attach to a ring that is not initialized
+        self._memory.buf[: len(MAGIC)] = MAGIC
+
+    # Called when entering 'with' statement
+    def __enter__(self):
+        return self
+
+    # Called when exiting 'with' statement
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def append(self, feedback, timestamp=None):
+        if timestamp is None:
+            timestamp = time.time()
+        n = self.count
+        slot = n % self.capacity
+        self._sequences[slot] = 2 * n + 1
+        self._records[slot] = (n, timestamp) + self.extractor(feedback)
+        self._sequences[slot] = 2 * n + 2
+        self.count = n + 1
+        self._header[_HEAD] = self.count
+
+    def close(self):
+        if self._memory is None:
+            return
+        # The NumPy views must be released before the shared memory can be closed
+        del self._header, self._sequences, self._records
+        self._memory.close()
+        self._memory.unlink()
+        _published.discard(self._memory._name)
+        self._memory = None
+
+
+class FeedbackSubscriber:
+    """
+    Attaches to the shared memory ring 'name' created by a FeedbackPublisher, in this or another process.
+    poll() returns the samples published since the previous call as a structured array. Samples overwritten
+    before they could be read are counted in 'lost'. A new subscriber starts from the latest sample.
+    """
+
+    def __init__(self, name=DEFAULT_NAME):
+
+        self.name = name
+        # The publisher owns the block, the resource tracker of this process must not remove it on exit
+        if sys.version_info >= (3, 13):
+            self._memory = shared_memory.SharedMemory(name=name, track=False)
+        else:
+            self._memory = shared_memory.SharedMemory(name=name)
+            if self._memory._name not in _published:
+                resource_tracker.unregister(self._memory._name, "shared_memory")
+
+        if bytes(self._memory.buf[: len(MAGIC)]) != MAGIC:
+            self._memory.close()
+            raise ValueError("{} is not an initialized feedback ring".format(name))
+
+        words = np.ndarray((HEADER_SIZE // 8,), dtype=np.uint64, buffer=self._memory.buf)
+        self.capacity = int(words[_CAPACITY])
+        description_size = int(words[_DESCRIPTION_SIZE])
+        del words
+
+        description = bytes(self._memory.buf[HEADER_SIZE : HEADER_SIZE + description_size])
+        self.dtype = np.dtype([tuple(field) for field in json.loads(description.decode("utf-8"))])
+        self._header, self._sequences, self._records = _map_ring(self._memory.buf, self.dtype, self.capacity, description_size)
+
+        self.lost = 0
+        self.next = int(self._header[_HEAD])
+
+    # Called when entering 'with' statement
+    def __enter__(self):
+        return self
+
+    # Called when exiting 'with' statement
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    # This function returns the samples published since the last call, at most 'max_count' of them
+    def poll(self, max_count=None):
+        head = int(self._header[_HEAD])
+        start = self.next
+        if head - start > self.capacity:
+            self.lost += head - self.capacity - start
+            start = head - self.capacity
+        if max_count is not None:
+            head = min(head, start + max_count)
+        if head <= start:
+            return self._records[:0].copy()
+
+        numbers = np.arange(start, head, dtype=np.uint64)
+        slots = numbers % self.capacity
+        expected = 2 * numbers + 2
+
+        before = self._sequences[slots]
+        samples = self._records[slots]
+        after = self._sequences[slots]
+
+        valid = (before == expected) & (after == expected)
+        self.lost += int(len(valid) - np.count_nonzero(valid))
+        self.next = head
+
+        return samples[valid]
+
+    # This generator yields the new samples as they are published, checking every 'interval' seconds. It stops at
+    # 'deadline' (a time.monotonic() value) when given, even if the producer stopped publishing.
+    def tail(self, interval=0.0005, max_count=None, deadline=None):
+        while deadline is None or time.monotonic() < deadline:
+            samples = self.poll(max_count)
+            if len(samples):
+                yield samples
+            else:
+                time.sleep(interval)
+
+    def close(self):
+        if self._memory is None:
+            return
+        # The NumPy views must be released before the shared memory can be closed
+        del self._header, self._sequences, self._records
+        self._memory.close()
+        self._memory = None
@@ -0,0 +1,206 @@
+#! /usr/bin/env python3
+
+###
+# KINOVA (R) KORTEX (TM)
+#
+# Copyright (c) 2024 Kinova inc. All rights reserved.
+#
+# This software may be modified and distributed
+# under the terms of the BSD 3-Clause license.
+#
+# Refer to the LICENSE file for details.
+#
+###
+
+# Memory-mapped binary feedback log with a time index.
+#
+# A log is an append-only file of fixed-size records:
+#
+#   magic (8 bytes) | header size (uint32) | JSON header | padding up to DATA_ALIGNMENT | record 0 | record 1 | ...
+#
+# The JSON header holds the message type, the recorded fields and the NumPy dtype of a record, derived from the
+# protobuf descriptor by a MessageExtractor. Every record stores feedback_id, timestamp and the numeric fields.
+# A sparse index file (<log>.idx) stores the timestamp of one record every 'index_interval' records.
+#
+# FeedbackLog reads a log back with numpy.memmap: nothing is loaded until it is accessed, and time_slice() returns
+# a view of the records in a time range after a search in the index, without reading the rest of the file.
+
+import json
+import os
+import time
+
+import numpy as np
+
+from feedback_recorder import capture
+
+MAGIC = b"KFBLOG01"
+DATA_ALIGNMENT = 4096
+DEFAULT_INDEX_INTERVAL = 1000  # records, one index entry per second at 1 kHz
+DEFAULT_BUFFER_SIZE = 1000  # records written per system call
+
+INDEX_DTYPE = np.dtype([("timestamp", np.float64), ("record", np.int64)])
+
+
+# This function returns the header of a log and the offset of its first record
+def read_header(file):
+    magic = file.read(len(MAGIC))
+    if magic != MAGIC:
+        raise ValueError("Not a feedback log file")
+    header_size = int.from_bytes(file.read(4), "little")
+    header = json.loads(file.read(header_size).decode("utf-8"))
+    header["dtype"] = np.dtype([tuple(field) for field in header["dtype"]])
+    return header, header["data_offset"]
+
+
+class FeedbackLogWriter:
+    """
+    Appends the fields read by 'extractor' (a message_extractor.MessageExtractor with numeric fields only) to the
+    log at 'path'. An existing log is appended to if it was written with the same fields.
+    Records are buffered by groups of 'buffer_size' and the file is flushed on close().
+    """
+
+    def __init__(self, path, extractor, index_interval=DEFAULT_INDEX_INTERVAL, buffer_size=DEFAULT_BUFFER_SIZE):
+
+        self.dtype = np.dtype([("feedback_id", np.int64), ("timestamp", np.float64)] + extractor.dtype.descr)
+        if self.dtype.hasobject:
+            raise ValueError("Only numeric fields can be written to a feedback log")
+
+        self.path = path
+        self.extractor = extractor
+        self.index_path = path + ".idx"
+
+        if os.path.exists(path) and os.path.getsize(path) > 0:
+            with open(path, "rb") as file:
+                header, data_offset = read_header(file)
+            if header["dtype"] != self.dtype or header["fields"] != extractor.fields:
+                raise ValueError("{} was written with different fields".format(path))
+            self.index_interval = header["index_interval"]
+            # A record cut by a crash is discarded
+            self.count = (os.path.getsize(path) - data_offset) // self.dtype.itemsize
+            self._file = open(path, "r+b")
+            self._file.truncate(data_offset + self.count * self.dtype.itemsize)
+            self._file.seek(0, os.SEEK_END)
+            if os.path.exists(self.index_path):
+                index = np.fromfile(self.index_path, dtype=INDEX_DTYPE)
+                index[index["record"] < self.count].tofile(self.index_path)
+        else:
+            self.index_interval = index_interval
+            self.count = 0
+            self._file = open(path, "wb")
+            self._write_header()
+            if os.path.exists(self.index_path):
+                os.remove(self.index_path)
+
+        self._index_file = open(self.index_path, "ab")
+        self._buffer = np.zeros(buffer_size, dtype=self.dtype)
+        self._buffered = 0
+
+    def _write_header(self):
+        header = {
+            "message": self.extractor.message_class.DESCRIPTOR.full_name,
+            "fields": self.extractor.fields,
+            "dtype": [list(field) for field in self.dtype.descr],
+            "record_size": self.dtype.itemsize,
+            "index_interval": self.index_interval,
+            "data_offset": 0,
+        }
+        # The data offset is part of the header, so the header size is computed with a large enough placeholder
+        size = len(json.dumps(dict(header, data_offset=2 ** 40)).encode("utf-8"))
+        header["data_offset"] = -(-(len(MAGIC) + 4 + size) // DATA_ALIGNMENT) * DATA_ALIGNMENT
+        encoded = json.dumps(header).encode("utf-8")
+
+        self._file.write(MAGIC)
+        self._file.write(len(encoded).to_bytes(4, "little"))
+        self._file.write(encoded)
+        self._file.write(b"\0" * (header["data_offset"] - self._file.tell()))
+
+    # Called when entering 'with' statement
+    def __enter__(self):
+        return self
+
+    # Called when exiting 'with' statement
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def append(self, feedback, timestamp=None):
+        if timestamp is None:
+            timestamp = time.time()
+        if self.count % self.index_interval == 0:
+            self._index_file.write(np.array([(timestamp, self.count)], dtype=INDEX_DTYPE).tobytes())
+
+        self._buffer[self._buffered] = (self.count, timestamp) + self.extractor(feedback)
+        self.count += 1
+        self._buffered += 1
+        if self._buffered == len(self._buffer):
+            self.flush()
+
+    # This function polls the cyclic client 'count' times at 'rate' (in Hz) and returns the jitter report of the capture
+    def record(self, base_cyclic_client, count, rate=1000):
+        return capture(base_cyclic_client, [self], count, rate)
+
+    def flush(self):
+        self._file.write(self._buffer[: self._buffered].tobytes())
+        self._buffered = 0
+        self._file.flush()
+        self._index_file.flush()
+
+    def close(self):
+        if self._file.closed:
+            return
+        self.flush()
+        self._file.close()
+        self._index_file.close()
+
+
+class FeedbackLog:
+    """
+    Read-only view of a feedback log. 'records' is a numpy.memmap structured array of every complete record,
+    time_slice() and to_dataframe() select records by timestamp (in seconds since the epoch, as written).
+    """
+
+    def __init__(self, path):
+
+        self.path = path
+        with open(path, "rb") as file:
+            self.header, data_offset = read_header(file)
+
+        self.dtype = self.header["dtype"]
+        self.fields = self.header["fields"]
+        count = (os.path.getsize(path) - data_offset) // self.dtype.itemsize
+        if count:
+            self.records = np.memmap(path, dtype=self.dtype, mode="r", offset=data_offset, shape=(count,))
+        else:
+            self.records = np.zeros(0, dtype=self.dtype)
+
+        index_path = path + ".idx"
+        index = np.fromfile(index_path, dtype=INDEX_DTYPE) if os.path.exists(index_path) else np.zeros(0, dtype=INDEX_DTYPE)
+        self.index = index[index["record"] < count]
+
+    def __len__(self):
+        return len(self.records)
+
+    # This function returns the range of records that may hold timestamp 't', found in the sparse index
+    def _block(self, t):
+        if not len(self.index):
+            return 0, len(self.records)
+        position = np.searchsorted(self.index["timestamp"], t)
+        start = self.index["record"][position - 1] if position > 0 else 0
+        end = self.index["record"][position] + 1 if position < len(self.index) else len(self.records)
+        return int(start), int(end)
+
+    # This function returns the position of the first record at or after timestamp 't'
+    def _search(self, t):
+        start, end = self._block(t)
+        return start + int(np.searchsorted(self.records["timestamp"][start:end], t))
+
+    # This function returns a zero-copy view of the records with start <= timestamp < end
+    def time_slice(self, start=None, end=None):
+        first = self._search(start) if start is not None else 0
+        last = self._search(end) if end is not None else len(self.records)
+        return self.records[first:last]
+
+    def to_dataframe(self, start=None, end=None):
+        # Pandas is only needed when the data is exported
+        import pandas as pd
+
+        return pd.DataFrame(np.asarray(self.time_slice(start, end))).set_index("feedback_id")
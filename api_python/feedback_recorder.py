@@ -0,0 +1,130 @@
+#! /usr/bin/env python3
+
+###
+# KINOVA (R) KORTEX (TM)
+#
+# Copyright (c) 2024 Kinova inc. All rights reserved.
+#
+# This software may be modified and distributed
+# under the terms of the BSD 3-Clause license.
+#
+# Refer to the LICENSE file for details.
+#
+###
+
+# Ring-buffer recorder for BaseCyclicClient.RefreshFeedback.
+#
+# The feedback fields to record are chosen once from the message descriptor, then every sample is copied straight
+# into a preallocated NumPy structured array: no dictionary or DataFrame row is created per sample.
+# When the buffer is full the oldest samples are overwritten, so a capture can run for a whole shift with constant memory.
+# The buffer is converted to a pandas DataFrame only when to_dataframe() is called.
+#
+# capture() polls the public BaseCyclicClient.RefreshFeedback(), which reports errors and timeouts as KServerException.
+# Each sample is a new Feedback message, released as soon as the sinks have copied their fields. A single message is not
+# refilled with ParseFromString: with the upb protobuf backend the arena of a reused message grows by the size of every
+# feedback parsed into it.
+
+import contextlib
+import operator
+import time
+
+import numpy as np
+
+from message_extractor import select_fields
+from periodic_loop import PeriodicLoop
+
+DEFAULT_CAPACITY = 60 * 1000  # One minute at 1 kHz
+
+
+# Fields recorded by base_feedback_plot.py: tool pose, twist and external wrench
+def tool_fields(message_class):
+    return select_fields(message_class, "base", lambda name: name.startswith("tool"))
+
+
+# Fields recorded by wrist_feedback_plot.py: wrist IMU and force sensor
+def wrist_fields(message_class):
+    return select_fields(message_class, "wrist.c61", lambda name: "imu" in name or "force" in name)
+
+
+# This function polls the cyclic client 'count' times at 'rate' (in Hz) and appends each sample to every sink,
+# e.g. a FeedbackRecorder, a feedback_log.FeedbackLogWriter or a columnar_writer.ColumnarFeedbackWriter.
+# It returns the jitter report of the capture. 'realtime', a periodic_loop.RealTime, is applied to the polling loop.
+def capture(base_cyclic_client, sinks, count, rate=1000, realtime=None):
+    loop = PeriodicLoop(1.0 / rate)
+    with realtime if realtime is not None else contextlib.nullcontext():
+        for i in loop.ticks(count):
+            feedback = base_cyclic_client.RefreshFeedback()
+            timestamp = time.time()
+            for sink in sinks:
+                sink.append(feedback, timestamp)
+    return loop.report()
+
+
+class FeedbackRecorder:
+    """
+    Records feedback fields, given as dotted paths (e.g. "base.tool_pose_x"), into a ring buffer of 'capacity' samples.
+    Columns are named after the last component of each path, or by 'columns' (a list of names or a function of the path,
+    as for message_extractor.MessageExtractor), and each sample also stores its feedback_id and timestamp.
+    """
+
+    def __init__(self, fields, capacity=DEFAULT_CAPACITY, columns=None):
+
+        self.fields = list(fields)
+        if columns is None:
+            self.columns = [field.rsplit(".", 1)[-1] for field in self.fields]
+        elif callable(columns):
+            self.columns = [columns(field) for field in self.fields]
+        else:
+            self.columns = list(columns)
+        if not self.fields:
+            raise ValueError("At least one field must be recorded")
+        if len(self.columns) != len(self.fields) or len(set(self.columns)) != len(self.columns):
+            raise ValueError("The columns must be distinct and match the recorded fields")
+        if capacity <= 0:
+            raise ValueError("The capacity must be greater than 0")
+
+        self.dtype = np.dtype([("feedback_id", np.int64), ("timestamp", np.float64)] + [(column, np.float64) for column in self.columns])
+        self.capacity = capacity
+        self.count = 0
+
+        # A single attrgetter reads every field in one call, it returns a tuple when there is more than one field
+        getter = operator.attrgetter(*self.fields)
+        self._getter = getter if len(self.fields) > 1 else (lambda message: (getter(message),))
+
+        # The buffer is written once so its memory pages are committed before the capture starts
+        self._buffer = np.empty(capacity, dtype=self.dtype)
+        self._buffer.view(np.uint8).fill(0)
+
+    def __len__(self):
+        return min(self.count, self.capacity)
+
+    @property
+    def dropped(self):
+        # Number of samples overwritten because the buffer was full
+        return max(self.count - self.capacity, 0)
+
+    def append(self, feedback, timestamp=None):
+        if timestamp is None:
+            timestamp = time.time()
+        self._buffer[self.count % self.capacity] = (self.count, timestamp) + self._getter(feedback)
+        self.count += 1
+
+    # This function polls the cyclic client 'count' times at 'rate' (in Hz) and returns the jitter report of the capture
+    def record(self, base_cyclic_client, count, rate=1000):
+        return capture(base_cyclic_client, [self], count, rate)
+
+    # This function returns a copy of the recorded samples, oldest first
+    def to_array(self):
+        if self.count <= self.capacity:
+            return self._buffer[: self.count].copy()
+        start = self.count % self.capacity
+        return np.concatenate((self._buffer[start:], self._buffer[:start]))
+
+    def to_dataframe(self):
+        # Pandas is only needed when the data is exported
+        import pandas as pd
+
+        return pd.DataFrame(self.to_array()).set_index("feedback_id")
+
+    def clear(self):
+        self.count = 0
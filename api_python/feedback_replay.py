@@ -0,0 +1,156 @@
+#! /usr/bin/env python3
+
+###
+# KINOVA (R) KORTEX (TM)
+#
+# Copyright (c) 2024 Kinova inc. All rights reserved.
+#
+# This software may be modified and distributed
+# under the terms of the BSD 3-Clause license.
+#
+# Refer to the LICENSE file for details.
+#
+###
+
+# Replay of recorded feedback through a stand-in for BaseCyclicClient.
+#
+# FeedbackReplay serves the samples of a capture (a feedback_log file, a columnar_writer Parquet/Arrow file or the
+# array of a FeedbackRecorder) from RefreshFeedback(), as a BaseCyclic_pb2.Feedback holding the recorded fields:
+#
+#   speed=1.0    real time: each call returns the latest sample recorded at the elapsed time since the first call,
+#                a slow poller skips samples and a fast one gets the same sample again, like on the robot
+#   speed=100.0  the same, with the recorded time running 100 times faster
+#   speed=None   as fast as possible: each call returns the next sample
+#
+# Code written against BaseCyclicClient (feedback_recorder.capture(), the plotting examples, ...) can then run
+# offline on a known capture, with reproducible inputs and throughput.
+
+import json
+import time
+
+import numpy as np
+from kortex_api.autogen.messages import BaseCyclic_pb2
+
+from feedback_log import FeedbackLog
+from message_extractor import MessageExtractor
+
+_RESERVED_COLUMNS = ("feedback_id", "timestamp")
+
+
+class FeedbackReplay:
+    """
+    Serves the samples of the structured array 'samples', which has a timestamp column (in seconds) and one column per
+    field of 'fields' (dotted paths in BaseCyclic_pb2.Feedback, in column order). When 'repeat' is True the capture
+    is replayed in a loop, otherwise RefreshFeedback() raises EOFError after the last sample.
+    """
+
+    def __init__(self, samples, fields, speed=1.0, repeat=False):
+
+        if not len(samples):
+            raise ValueError("There is no sample to replay")
+        columns = [name for name in samples.dtype.names if name not in _RESERVED_COLUMNS]
+        if len(columns) != len(fields):
+            raise ValueError("The samples must have one column per field")
+        if speed is not None and speed <= 0:
+            raise ValueError("The speed must be greater than 0")
+
+        self.fields = list(fields)
+        self.speed = speed
+        self.repeat = repeat
+        self.extractor = MessageExtractor(BaseCyclic_pb2.Feedback, self.fields, columns)
+
+        self._values = samples[columns]
+        self._timestamps = np.asarray(samples["timestamp"], dtype=np.float64)
+        self._time_offsets = self._timestamps - self._timestamps[0]
+        # A replay in a loop starts again one sample period after the last sample
+        period = self._time_offsets[-1] / (len(samples) - 1) if len(samples) > 1 else 0.001
+        self._duration = self._time_offsets[-1] + period
+
+        self.served = 0
+        self.skipped = 0
+        self._start = None
+        self._position = -1
+
+    def __len__(self):
+        return len(self._values)
+
+    @classmethod
+    def from_log(cls, path, speed=1.0, repeat=False):
+        log = FeedbackLog(path)
+        return cls(log.records, log.fields, speed, repeat)
+
+    @classmethod
+    def from_columnar(cls, path, speed=1.0, repeat=False):
+        # pyarrow is only needed to read columnar files
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        if path.endswith(".arrow"):
+            with pa.OSFile(path, "rb") as source:
+                table = pa.ipc.open_file(source).read_all()
+        else:
+            table = pq.read_table(path)
+
+        metadata = table.schema.metadata or {}
+        if b"fields" not in metadata:
+            raise ValueError("{} does not record its feedback fields".format(path))
+        fields = json.loads(metadata[b"fields"].decode("utf-8"))
+
+        columns = [table.column(name).to_numpy() for name in table.column_names]
+        samples = np.zeros(table.num_rows, dtype=[(name, column.dtype) for name, column in zip(table.column_names, columns)])
+        for name, column in zip(table.column_names, columns):
+            samples[name] = column
+        return cls(samples, fields, speed, repeat)
+
+    @classmethod
+    def from_recorder(cls, recorder, speed=1.0, repeat=False):
+        return cls(recorder.to_array(), recorder.fields, speed, repeat)
+
+    # This function restarts the replay from the first sample, the recorded time starts on the next call
+    def rewind(self):
+        self.served = 0
+        self.skipped = 0
+        self._start = None
+        self._position = -1
+
+    # This function returns the position of the sample to serve, or None when the capture is over
+    def _next_position(self):
+        count = len(self._values)
+        if self.speed is None:
+            position = self._position + 1
+            if position >= count:
+                if not self.repeat:
+                    return None
+                position = 0
+            return position
+
+        now = time.perf_counter()
+        if self._start is None:
+            self._start = now
+        recorded_time = (now - self._start) * self.speed
+        if recorded_time >= self._duration:
+            if not self.repeat:
+                return None
+            recorded_time %= self._duration
+
+        position = int(np.searchsorted(self._time_offsets, recorded_time, side="right")) - 1
+        if position > self._position:
+            self.skipped += position - self._position - 1
+        elif position < self._position:
+            # The loop started again
+            self.skipped += count - self._position - 1 + position
+        return position
+
+    def RefreshFeedback(self):
+        position = self._next_position()
+        if position is None:
+            raise EOFError("The replay reached the end of the capture")
+        self._position = position
+        self.served += 1
+        feedback = BaseCyclic_pb2.Feedback()
+        self.extractor.fill(feedback, self._values[position].item())
+        return feedback
+
+    # This function returns the recorded timestamp of the last sample served
+    def timestamp(self):
+        return float(self._timestamps[self._position]) if self._position >= 0 else None
@@ -0,0 +1,453 @@
+#! /usr/bin/env python3
+
+###
+# KINOVA (R) KORTEX (TM)
+#
+# Copyright (c) 2024 Kinova inc. All rights reserved.
+#
+# This software may be modified and distributed
+# under the terms of the BSD 3-Clause license.
+#
+# Refer to the LICENSE file for details.
+#
+###
+
+# Local forward kinematics of the Link 6 arm.
+#
+# base.ComputeForwardKinematics() gives the pose of one configuration per round trip. Offline planners need the
+# poses of millions of configurations: KinematicModel computes them locally, for (N, 6) arrays of joint angles at
+# once, as a chain of standard Denavit-Hartenberg transforms followed by the tool transform:
+#
+#   T = Dh(q1) Dh(q2) ... Dh(q6) Tool,   Dh(q) = Rz(q + theta_offset) Tz(d) Tx(a) Rx(alpha)
+#
+# The poses are returned as (x, y, z, theta_x, theta_y, theta_z), the convention of the Pose message: meters, and
+# Euler angles in degrees about the fixed x, y then z axes (R = Rz Ry Rx).
+#
+# KinematicModel.inverse() solves the inverse kinematics of (N, 6) target poses locally with damped least-squares
+# iterations, vectorized over the poses being solved. Along a path (path=True), each pose starts from the solution of
+# the previous one, so the solutions stay on the same branch. To keep that warm start and still solve many poses at
+# once, the path is cut into about sqrt(N) blocks: the first pose of every block is solved one after the other, then
+# the blocks advance together, pose k of every block starting from pose k - 1 of the same block.
+#
+# LINK6_DH_PARAMETERS are nominal parameters (zero position with the arm straight up, 1 m reach to the flange). Give
+# the parameters of the arm, e.g. from its URDF, to KinematicModel, then check them with check_conformance(), which
+# compares the model to the controller's ComputeForwardKinematics() on sample configurations.
+#
+# Typical use:
+#
+#   model = KinematicModel(tool=tool_transform(tool_manager))
+#   poses = model.forward(joint_angles)  # (N, 6) joint angles in degrees -> (N, 6) poses
+#   result = model.inverse(poses, guess=current_joint_angles)  # result.joint_angles, result.converged
+#   print(check_conformance(base, model, model.sample(100)))
+
+import numpy as np
+from kortex_api.autogen.messages import Base_pb2
+from kortex_api.exceptions.KServerException import KServerException
+
+JOINT_COUNT = 6
+
+# (a in meters, alpha in degrees, d in meters, theta offset in degrees) of each joint
+LINK6_DH_PARAMETERS = (
+    (0.0, 90.0, 0.29, 0.0),
+    (0.45, 0.0, 0.0, 90.0),
+    (0.0, 90.0, 0.0, 90.0),
+    (0.0, -90.0, 0.42, 0.0),
+    (0.0, 90.0, 0.0, 0.0),
+    (0.0, 0.0, 0.13, 0.0),
+)
+LINK6_JOINT_LIMITS = ((-360.0, 360.0),) * JOINT_COUNT  # degrees
+
+DEFAULT_CHUNK_SIZE = 10000  # configurations computed at once, keeps the temporary arrays small
+POSITION_TOLERANCE = 0.001  # meters
+ORIENTATION_TOLERANCE = 0.1  # degrees
+
+# Inverse kinematics
+IK_MAX_ITERATIONS = 100
+IK_DAMPING = 0.01  # damping of the least-squares steps, in meters and radians
+IK_DAMPING_DISTANCE = 0.01  # error (meters and radians) below which the damping decreases
+IK_MAX_STEP = 10.0  # degrees, largest joint motion of one iteration
+IK_POSITION_TOLERANCE = 1e-5  # meters
+IK_ORIENTATION_TOLERANCE = 1e-3  # degrees
+
+
+# This function returns the rotation matrices of (N, 3) Euler angles in degrees (theta_x, theta_y, theta_z, rotations
+# about the fixed x, y then z axes, R = Rz Ry Rx)
+def rotation_matrices(thetas):
+    x, y, z = np.radians(np.asarray(thetas, dtype=np.float64)).T
+    cx, sx, cy, sy, cz, sz = np.cos(x), np.sin(x), np.cos(y), np.sin(y), np.cos(z), np.sin(z)
+    return np.stack((
+        np.stack((cz * cy, cz * sy * sx - sz * cx, cz * sy * cx + sz * sx), axis=-1),
+        np.stack((sz * cy, sz * sy * sx + cz * cx, sz * sy * cx - cz * sx), axis=-1),
+        np.stack((-sy, cy * sx, cy * cx), axis=-1),
+    ), axis=-2)
+
+
+# This function returns the (N, 3) Euler angles in degrees of (N, 3, 3) rotation matrices, the inverse of
+# rotation_matrices(). At theta_y = +-90 degrees, where only theta_z - theta_x (or their sum) is defined, theta_x is 0.
+def euler_angles(rotations):
+    rotations = np.asarray(rotations, dtype=np.float64)
+    cos_y = np.hypot(rotations[:, 0, 0], rotations[:, 1, 0])
+    regular = cos_y > 1e-9
+    theta_y = np.arctan2(-rotations[:, 2, 0], cos_y)
+    theta_x = np.where(regular, np.arctan2(rotations[:, 2, 1], rotations[:, 2, 2]), 0.0)
+    theta_z = np.where(regular, np.arctan2(rotations[:, 1, 0], rotations[:, 0, 0]), np.arctan2(-rotations[:, 0, 1], rotations[:, 1, 1]))
+    return np.degrees(np.column_stack((theta_x, theta_y, theta_z)))
+
+
+# This function returns the (N, 4, 4) homogeneous transforms of (N, 6) poses (x, y, z, theta_x, theta_y, theta_z)
+def pose_matrices(poses):
+    poses = np.asarray(poses, dtype=np.float64).reshape(-1, 6)
+    transforms = np.zeros((len(poses), 4, 4))
+    transforms[:, :3, :3] = rotation_matrices(poses[:, 3:])
+    transforms[:, :3, 3] = poses[:, :3]
+    transforms[:, 3, 3] = 1.0
+    return transforms
+
+
+# This function returns the (N, 6) poses of (N, 4, 4) homogeneous transforms
+def matrix_poses(transforms):
+    return np.column_stack((transforms[:, :3, 3], euler_angles(transforms[:, :3, :3])))
+
+
+# This function returns the rotation angles in degrees between two arrays of (N, 3, 3) rotation matrices
+def rotation_distances(first, second):
+    # trace(Ra^T Rb)
+    traces = np.einsum("nij,nij->n", first, second)
+    return np.degrees(np.arccos(np.clip((traces - 1.0) / 2.0, -1.0, 1.0)))
+
+
+# This function returns the (N, 3) rotation vectors (axis times angle, in radians) of (N, 3, 3) rotation matrices
+def rotation_vectors(rotations):
+    vee = np.stack((rotations[:, 2, 1] - rotations[:, 1, 2], rotations[:, 0, 2] - rotations[:, 2, 0], rotations[:, 1, 0] - rotations[:, 0, 1]), axis=-1)
+    angles = np.arccos(np.clip((np.einsum("nii->n", rotations) - 1.0) / 2.0, -1.0, 1.0))
+    sines = np.sin(angles)
+    # Small rotations: angle / (2 sin(angle)) tends to 1 / 2
+    scale = np.where(sines > 1e-9, angles / (2.0 * np.where(sines > 1e-9, sines, 1.0)), 0.5)
+    return vee * scale[:, np.newaxis]
+
+
+# This function returns a Base_pb2.JointAngles message of joint angles in degrees
+def joint_angles_message(values):
+    joint_angles = Base_pb2.JointAngles()
+    for identifier, value in enumerate(values):
+        joint_angle = joint_angles.joint_angles.add()
+        joint_angle.joint_identifier = identifier
+        joint_angle.value = value
+    return joint_angles
+
+
+# This function returns the tool transform (x, y, z, theta_x, theta_y, theta_z) of a tool from
+# tool_manager.GetAllToolsInformation(), the tool with handle 'identifier' or the only tool when it is not given
+def tool_transform(tool_manager, identifier=None):
+    tools = list(tool_manager.GetAllToolsInformation().tools_information)
+    if identifier is not None:
+        tools = [tool for tool in tools if tool.handle.identifier == identifier]
+    if len(tools) != 1:
+        raise ValueError("{} tools match, give the identifier of the tool".format(len(tools)) if tools else "No tool found")
+    transform = tools[0].transform
+    return (transform.x, transform.y, transform.z, transform.theta_x, transform.theta_y, transform.theta_z)
+
+
+class InverseKinematicsResult:
+    """
+    Solutions of inverse kinematics: 'joint_angles' (N, joints) in degrees, 'converged' tells which poses were reached
+    within the tolerances, 'iterations' the iterations spent on each pose and 'position_errors' (meters) and
+    'orientation_errors' (degrees) the distances between the targets and the poses of the solutions.
+    """
+
+    def __init__(self, joint_angles, converged, iterations, position_errors, orientation_errors):
+        self.joint_angles = joint_angles
+        self.converged = converged
+        self.iterations = iterations
+        self.position_errors = position_errors
+        self.orientation_errors = orientation_errors
+
+    def __bool__(self):
+        return bool(self.converged.all())
+
+    def __len__(self):
+        return len(self.joint_angles)
+
+    def __str__(self):
+        if not len(self):
+            return "No pose solved"
+        return "Converged: {} / {}, iterations mean {:.1f}, max {}, position error max {:.4f} mm, orientation error max {:.5f} deg".format(
+            int(self.converged.sum()), len(self), self.iterations.mean(), int(self.iterations.max()), self.position_errors.max() * 1e3, self.orientation_errors.max())
+
+
+class KinematicModel:
+    """
+    Kinematic chain of a 6 joint arm: 'dh_parameters' are the (a, alpha, d, theta_offset) of each joint (meters and
+    degrees), 'tool' the (x, y, z, theta_x, theta_y, theta_z) transform from the flange to the tool frame and
+    'joint_limits' the (lower, upper) angles of each joint in degrees, used by sample().
+    """
+
+    def __init__(self, dh_parameters=LINK6_DH_PARAMETERS, tool=None, joint_limits=LINK6_JOINT_LIMITS):
+
+        self.dh_parameters = np.asarray(dh_parameters, dtype=np.float64)
+        if self.dh_parameters.ndim != 2 or self.dh_parameters.shape[1] != 4:
+            raise ValueError("The DH parameters must be one (a, alpha, d, theta_offset) row per joint")
+        self.joint_count = len(self.dh_parameters)
+        self.joint_limits = np.asarray(joint_limits, dtype=np.float64)
+        if self.joint_limits.shape != (self.joint_count, 2):
+            raise ValueError("The joint limits must be one (lower, upper) row per joint")
+        self.tool = pose_matrices(np.zeros(6) if tool is None else tool)[0]
+
+        a, alpha, d, self._offsets = self.dh_parameters.T
+        self._a = a
+        self._d = d
+        self._cos_alpha = np.cos(np.radians(alpha))
+        self._sin_alpha = np.sin(np.radians(alpha))
+
+    # This function returns the (N, 4, 4) transforms from the base to the tool frame of (N, joints) joint angles in
+    # degrees
+    def forward_matrices(self, joint_angles, chunk_size=DEFAULT_CHUNK_SIZE):
+        joint_angles = self._joint_array(joint_angles)
+        transforms = np.zeros((len(joint_angles), 4, 4))
+        transforms[:, 3, 3] = 1.0
+        for start in range(0, len(joint_angles), chunk_size):
+            stop = start + chunk_size
+            transforms[start:stop, :3, :3], transforms[start:stop, :3, 3] = self._chain(joint_angles[start:stop])
+        return transforms
+
+    # This function returns the (N, 6) poses (x, y, z, theta_x, theta_y, theta_z) of (N, joints) joint angles in degrees
+    def forward(self, joint_angles, chunk_size=DEFAULT_CHUNK_SIZE):
+        joint_angles = self._joint_array(joint_angles)
+        poses = np.empty((len(joint_angles), 6))
+        for start in range(0, len(joint_angles), chunk_size):
+            stop = start + chunk_size
+            rotations, poses[start:stop, :3] = self._chain(joint_angles[start:stop])
+            poses[start:stop, 3:] = euler_angles(rotations)
+        return poses
+
+    # This function returns 'count' configurations drawn uniformly within the joint limits
+    def sample(self, count, seed=None):
+        lower, upper = self.joint_limits.T
+        return np.random.default_rng(seed).uniform(lower, upper, size=(count, self.joint_count))
+
+    # This function returns the (N, 6, joints) geometric Jacobians of the tool frame at (N, joints) joint angles in
+    # degrees: linear velocity (m/rad) then angular velocity (rad/rad) rows, in the base frame
+    def jacobians(self, joint_angles):
+        return self._jacobians(self._joint_array(joint_angles))[2]
+
+    # This function returns the manipulability sqrt(det(J J^T)) of (N, joints) joint angles in degrees, 0 at the
+    # singular configurations
+    def manipulability(self, joint_angles):
+        jacobians = self.jacobians(joint_angles)
+        return np.sqrt(np.maximum(np.linalg.det(jacobians @ jacobians.transpose(0, 2, 1)), 0.0))
+
+    # This function returns the (N, 3) wrist points of (N, 4, 4) tool transforms (e.g. pose_matrices(poses)): the
+    # origin of the frame the last joint turns in, which the angle of the last joint does not move
+    def wrist_points(self, transforms):
+        flanges = np.asarray(transforms, dtype=np.float64).reshape(-1, 4, 4) @ np.linalg.inv(self.tool)
+        a, alpha, d = self.dh_parameters[-1, :3]
+        # Inverse of the transform of the last joint, Rz(theta) Tz(d) Tx(a) Rx(alpha), applied to the origin
+        offset = np.array([-a, -d * np.sin(np.radians(alpha)), -d * np.cos(np.radians(alpha))])
+        return flanges[:, :3, :3] @ offset + flanges[:, :3, 3]
+
+    # This function returns the indices of the joints whose axis goes through the wrist point in any configuration:
+    # they only change the orientation of the tool (the spherical wrist of Link 6)
+    def wrist_joints(self, samples=100):
+        axes = []
+        self._chain(self.sample(samples, seed=0), axes)
+        wrist = axes[-1][1]
+        joints = []
+        for i, (axis, origin) in enumerate(axes):
+            arm = wrist - origin
+            if np.abs(arm - (arm * axis).sum(axis=0) * axis).max() < 1e-9:
+                joints.append(i)
+        return joints
+
+    # This function solves the inverse kinematics of (N, 6) target poses (x, y, z, theta_x, theta_y, theta_z) and
+    # returns an InverseKinematicsResult. 'guess' is the joint angles in degrees the first pose starts from (e.g. the
+    # current angles of the arm), and the following poses start from the solution of the previous one along the path.
+    # With path=False, the poses are independent and all start from 'guess', one row per pose or the same for all.
+    def inverse(self, poses, guess, path=True, max_iterations=IK_MAX_ITERATIONS, damping=IK_DAMPING, position_tolerance=IK_POSITION_TOLERANCE, orientation_tolerance=IK_ORIENTATION_TOLERANCE):
+
+        poses = np.asarray(poses, dtype=np.float64)
+        if poses.ndim == 1:
+            poses = poses[np.newaxis]
+        if poses.ndim != 2 or poses.shape[1] != 6:
+            raise ValueError("The poses must be an (N, 6) array")
+        count = len(poses)
+        guess = self._joint_array(guess)
+        if not path and len(guess) not in (1, count):
+            raise ValueError("The guess must be one row of joint angles, or one per pose")
+
+        targets = (rotation_matrices(poses[:, 3:]), poses[:, :3])
+        options = (max_iterations, damping, position_tolerance, np.radians(orientation_tolerance))
+        joint_angles = np.zeros((count, self.joint_count))
+        converged = np.zeros(count, dtype=bool)
+        iterations = np.zeros(count, dtype=np.int64)
+        errors = np.zeros((count, 2))
+
+        def solve(indices, start):
+            joint_angles[indices], converged[indices], iterations[indices], errors[indices] = self._solve(targets[0][indices], targets[1][indices], start, *options)
+
+        if not path:
+            solve(np.arange(count), np.broadcast_to(guess, (count, self.joint_count)))
+        elif count:
+            # First pose of every block, one after the other, then pose k of every block from pose k - 1
+            block = int(np.ceil(np.sqrt(count)))
+            heads = np.arange(0, count, block)
+            start = guess[:1]
+            for head in heads:
+                solve(np.array([head]), start)
+                start = joint_angles[head : head + 1]
+            for k in range(1, block):
+                indices = heads[heads + k < count] + k
+                solve(indices, joint_angles[indices - 1])
+
+        return InverseKinematicsResult(joint_angles, converged, iterations, errors[:, 0], np.degrees(errors[:, 1]))
+
+    # This function returns the rotations, positions and Jacobians of the tool frame
+    def _jacobians(self, joint_angles):
+        axes = []
+        rotations, positions = self._chain(joint_angles, axes)
+        jacobians = np.empty((len(joint_angles), 6, self.joint_count))
+        tool = positions.T
+        for i, (axis, origin) in enumerate(axes):
+            # axis x (tool - origin), component by component
+            arm = tool - origin
+            jacobians[:, 0, i] = axis[1] * arm[2] - axis[2] * arm[1]
+            jacobians[:, 1, i] = axis[2] * arm[0] - axis[0] * arm[2]
+            jacobians[:, 2, i] = axis[0] * arm[1] - axis[1] * arm[0]
+            jacobians[:, 3:, i] = axis.T
+        return rotations, positions, jacobians
+
+    # Damped least-squares iterations on a batch of targets, from the 'start' joint angles. Each iteration moves the
+    # joints by J^T (J J^T + damping^2 I)^-1 e, e being the position and rotation vector errors, and the poses leave
+    # the batch once within the tolerances. It returns the joint angles, convergence, iterations and final errors.
+    def _solve(self, target_rotations, target_positions, start, max_iterations, damping, position_tolerance, orientation_tolerance):
+
+        joint_angles = np.array(start, dtype=np.float64)
+        count = len(joint_angles)
+        converged = np.zeros(count, dtype=bool)
+        iterations = np.zeros(count, dtype=np.int64)
+        errors = np.zeros((count, 2))
+        lower, upper = self.joint_limits.T
+        regularization = damping * damping * np.eye(6)
+
+        active = np.arange(count)
+        for iteration in range(max_iterations + 1):
+            rotations, positions, jacobians = self._jacobians(joint_angles[active])
+            error = np.concatenate((target_positions[active] - positions, rotation_vectors(target_rotations[active] @ rotations.transpose(0, 2, 1))), axis=1)
+            errors[active, 0] = np.linalg.norm(error[:, :3], axis=1)
+            errors[active, 1] = np.linalg.norm(error[:, 3:], axis=1)
+
+            done = (errors[active, 0] <= position_tolerance) & (errors[active, 1] <= orientation_tolerance)
+            converged[active[done]] = True
+            if iteration == max_iterations or done.all():
+                break
+            active, error, jacobians = active[~done], error[~done], jacobians[~done]
+
+            # The damping fades close to the targets, where the steps are short, for a fast final convergence
+            fade = np.minimum(1.0, np.linalg.norm(error, axis=1) / IK_DAMPING_DISTANCE)[:, np.newaxis, np.newaxis]
+            transposed = jacobians.transpose(0, 2, 1)
+            steps = np.degrees(np.einsum("nij,nj->ni", transposed, np.linalg.solve(jacobians @ transposed + fade * regularization, error[:, :, np.newaxis])[:, :, 0]))
+            # Long steps are scaled down, the linearization only holds close to the current angles
+            largest = np.abs(steps).max(axis=1, keepdims=True)
+            steps *= np.minimum(1.0, IK_MAX_STEP / np.maximum(largest, 1e-12))
+            joint_angles[active] = np.clip(joint_angles[active] + steps, lower, upper)
+            iterations[active] += 1
+
+        return joint_angles, converged, iterations, errors
+
+    def _joint_array(self, joint_angles):
+        joint_angles = np.asarray(joint_angles, dtype=np.float64)
+        if joint_angles.ndim == 1:
+            joint_angles = joint_angles[np.newaxis]
+        if joint_angles.ndim != 2 or joint_angles.shape[1] != self.joint_count:
+            raise ValueError("The joint angles must be an (N, {}) array".format(self.joint_count))
+        return joint_angles
+
+    # Product of the joint transforms then of the tool transform, for every configuration. It returns the (N, 3, 3)
+    # rotations and the (N, 3) positions. The axes x, y, z and the origin p of the current frame are updated column by
+    # column, with the structure of the DH transforms, which is much faster than (N, 4, 4) matrix products:
+    #   x' = c x + s y,  y' = cos(alpha) (c y - s x) + sin(alpha) z,  z' = cos(alpha) z - sin(alpha) (c y - s x),
+    #   p' = p + a x' + d z
+    # When 'axes' is a list, the (3, N) axis z and origin p of every joint are appended to it.
+    def _chain(self, joint_angles, axes=None):
+        theta = np.radians(joint_angles + self._offsets)
+        cos_theta, sin_theta = np.cos(theta).T[:, np.newaxis], np.sin(theta).T[:, np.newaxis]
+
+        count = len(joint_angles)
+        x = np.zeros((3, count))
+        y = np.zeros((3, count))
+        z = np.zeros((3, count))
+        x[0], y[1], z[2] = 1.0, 1.0, 1.0
+        p = np.zeros((3, count))
+        for i in range(self.joint_count):
+            c, s = cos_theta[i], sin_theta[i]
+            if axes is not None:
+                axes.append((z, p.copy()))
+            p += self._d[i] * z
+            x, normal = c * x + s * y, c * y - s * x
+            y, z = self._cos_alpha[i] * normal + self._sin_alpha[i] * z, self._cos_alpha[i] * z - self._sin_alpha[i] * normal
+            p += self._a[i] * x
+
+        # Tool transform, with the same column updates
+        tool = self.tool
+        rotations = np.empty((count, 3, 3))
+        for column in range(3):
+            rotations[:, :, column] = (tool[0, column] * x + tool[1, column] * y + tool[2, column] * z).T
+        positions = (p + tool[0, 3] * x + tool[1, 3] * y + tool[2, 3] * z).T
+        return rotations, positions
+
+
+class ConformanceReport:
+    """
+    Comparison of a KinematicModel with the controller: 'position_errors' (meters) and 'orientation_errors' (degrees)
+    of every configuration the controller computed, 'errors' the number of configurations it refused.
+    """
+
+    def __init__(self, joint_angles, position_errors, orientation_errors, errors, position_tolerance=POSITION_TOLERANCE, orientation_tolerance=ORIENTATION_TOLERANCE):
+        self.joint_angles = joint_angles
+        self.position_errors = position_errors
+        self.orientation_errors = orientation_errors
+        self.errors = errors
+        self.position_tolerance = position_tolerance
+        self.orientation_tolerance = orientation_tolerance
+
+    # True when every compared configuration is within the tolerances
+    @property
+    def conforms(self):
+        return len(self.position_errors) > 0 and bool(np.all(self.position_errors <= self.position_tolerance) and np.all(self.orientation_errors <= self.orientation_tolerance))
+
+    # This function returns the configurations out of the tolerances
+    def outliers(self):
+        return self.joint_angles[(self.position_errors > self.position_tolerance) | (self.orientation_errors > self.orientation_tolerance)]
+
+    def __bool__(self):
+        return self.conforms
+
+    def __str__(self):
+        if not len(self.position_errors):
+            return "No configuration compared, errors: {}".format(self.errors)
+        return "{}: {} configurations, position error mean {:.3f} mm, max {:.3f} mm, orientation error mean {:.4f} deg, max {:.4f} deg, errors: {}".format(
+            "Conforms" if self.conforms else "Does not conform", len(self.position_errors), self.position_errors.mean() * 1e3,
+            self.position_errors.max() * 1e3, self.orientation_errors.mean(), self.orientation_errors.max(), self.errors)
+
+
+# This function compares the model to base.ComputeForwardKinematics() on (N, joints) joint angles in degrees, e.g.
+# model.sample(100), and returns a ConformanceReport. The configurations the controller refuses are counted as errors.
+def check_conformance(base, model, joint_angles, position_tolerance=POSITION_TOLERANCE, orientation_tolerance=ORIENTATION_TOLERANCE):
+
+    joint_angles = model._joint_array(joint_angles)
+    computed = np.zeros(len(joint_angles), dtype=bool)
+    controller_poses = np.zeros((len(joint_angles), 6))
+
+    for i, configuration in enumerate(joint_angles):
+        try:
+            pose = base.ComputeForwardKinematics(joint_angles_message(configuration))
+        except KServerException:
+            continue
+        controller_poses[i] = (pose.x, pose.y, pose.z, pose.theta_x, pose.theta_y, pose.theta_z)
+        computed[i] = True
+
+    expected = pose_matrices(controller_poses[computed])
+    transforms = model.forward_matrices(joint_angles[computed])
+    position_errors = np.linalg.norm(transforms[:, :3, 3] - expected[:, :3, 3], axis=1)
+    # The rotations are compared, the Euler angles of a same orientation may differ
+    orientation_errors = rotation_distances(transforms[:, :3, :3], expected[:, :3, :3])
+    return ConformanceReport(joint_angles[computed], position_errors, orientation_errors, int((~computed).sum()), position_tolerance, orientation_tolerance)
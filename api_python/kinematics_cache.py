@@ -0,0 +1,187 @@
+#! /usr/bin/env python3
+
+###
+# KINOVA (R) KORTEX (TM)
+#
+# Copyright (c) 2024 Kinova inc. All rights reserved.
+#
+# This software may be modified and distributed
+# under the terms of the BSD 3-Clause license.
+#
+# Refer to the LICENSE file for details.
+#
+###
+
+# Memoization of forward and inverse kinematics results.
+#
+# A cell computes the kinematics of the same taught poses and home configurations over and over. KinematicsCache
+# keeps the results in memory in LRU order, keyed by the inputs quantized to a resolution (joint angles, or pose and
+# guess), so inputs that differ by less than the resolution share an entry, plus the active tool, so changing the tool
+# gives new keys. A hit costs a few microseconds instead of a round trip or a solve.
+#
+# The inverse kinematics of a pose depends on the guess (the solution branch): the guess is part of the key, at a
+# coarser resolution, or is left out when guess_resolution is None.
+#
+# The cache works with any solver:
+#
+#   cache = KinematicsCache(tool=kinematics.tool_transform(tool_manager))
+#   pose = cache.forward(joint_angles, lambda angles: model.forward(angles)[0])
+#
+# and CachedKinematicsBase puts it in front of the RPCs of a BaseClient, for code written against the base:
+#
+#   base = CachedKinematicsBase(BaseClient(router), cache)
+#   pose = base.ComputeForwardKinematics(joint_angles)  # the controller is only called on a miss
+
+import collections
+import threading
+
+import numpy as np
+
+DEFAULT_CAPACITY = 10000  # results kept
+JOINT_RESOLUTION = 1e-3  # degrees
+POSITION_RESOLUTION = 1e-6  # meters
+ORIENTATION_RESOLUTION = 1e-3  # degrees
+GUESS_RESOLUTION = 1.0  # degrees
+
+
+# This function returns the integer tuple of values rounded to multiples of 'resolution'
+def quantize(values, resolution):
+    return tuple(np.rint(np.asarray(values, dtype=np.float64) / resolution).astype(np.int64).tolist())
+
+
+class KinematicsCache:
+    """
+    LRU cache of up to 'capacity' kinematics results, keyed by quantized inputs and 'tool' (any hashable value, e.g.
+    the tool transform). 'hits' and 'misses' count the lookups.
+    """
+
+    def __init__(self, capacity=DEFAULT_CAPACITY, joint_resolution=JOINT_RESOLUTION, position_resolution=POSITION_RESOLUTION, orientation_resolution=ORIENTATION_RESOLUTION, guess_resolution=GUESS_RESOLUTION, tool=None):
+
+        if capacity < 1:
+            raise ValueError("The cache capacity must be at least 1")
+
+        self.capacity = capacity
+        self.joint_resolution = joint_resolution
+        self.position_resolution = position_resolution
+        self.orientation_resolution = orientation_resolution
+        self.guess_resolution = guess_resolution
+        self.tool = None if tool is None else _hashable(tool)
+
+        self.hits = 0
+        self.misses = 0
+
+        self._results = collections.OrderedDict()
+        self._lock = threading.Lock()
+
+    # Share of the lookups found in the cache
+    @property
+    def hit_rate(self):
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+    # This function returns the cache key of the forward kinematics of joint angles in degrees
+    def forward_key(self, joint_angles):
+        return ("forward", self.tool, quantize(joint_angles, self.joint_resolution))
+
+    # This function returns the cache key of the inverse kinematics of a pose (x, y, z, theta_x, theta_y, theta_z)
+    # from the 'guess' joint angles
+    def inverse_key(self, pose, guess=None):
+        pose = np.asarray(pose, dtype=np.float64)
+        guess_key = None if guess is None or self.guess_resolution is None or not len(guess) else quantize(guess, self.guess_resolution)
+        return ("inverse", self.tool, quantize(pose[:3], self.position_resolution), quantize(pose[3:], self.orientation_resolution), guess_key)
+
+    # This function returns the cached result of a key, or None
+    def get(self, key):
+        with self._lock:
+            result = self._results.get(key)
+            if result is None:
+                self.misses += 1
+                return None
+            self._results.move_to_end(key)
+            self.hits += 1
+            return result
+
+    # This function stores the result of a key, evicting the least recently used results beyond the capacity, and
+    # returns the stored result. Arrays are stored as read-only copies, since every hit returns the same result.
+    def put(self, key, result):
+        if isinstance(result, np.ndarray):
+            result = result.copy()
+            result.flags.writeable = False
+        with self._lock:
+            self._results[key] = result
+            self._results.move_to_end(key)
+            while len(self._results) > self.capacity:
+                self._results.popitem(last=False)
+        return result
+
+    # This function returns the result of a key from the cache, or from compute() on a miss
+    def lookup(self, key, compute):
+        result = self.get(key)
+        if result is None:
+            result = self.put(key, compute())
+        return result
+
+    # This function returns the forward kinematics of joint angles from the cache, or from compute(joint_angles)
+    def forward(self, joint_angles, compute):
+        return self.lookup(self.forward_key(joint_angles), lambda: compute(joint_angles))
+
+    # This function returns the inverse kinematics of a pose from the cache, or from compute(pose, guess)
+    def inverse(self, pose, guess, compute):
+        return self.lookup(self.inverse_key(pose, guess), lambda: compute(pose, guess))
+
+    # This function removes every result
+    def clear(self):
+        with self._lock:
+            self._results.clear()
+
+    def __len__(self):
+        return len(self._results)
+
+    def __str__(self):
+        return "Kinematics cache: {} / {} results, hits: {}, misses: {}, hit rate: {:.1%}".format(len(self), self.capacity, self.hits, self.misses, self.hit_rate)
+
+
+class CachedKinematicsBase:
+    """
+    Wraps a BaseClient: ComputeForwardKinematics() and ComputeInverseKinematics() answer from 'cache' and only call
+    the controller on a miss, the other RPCs go to 'base' unchanged. The answers are returned as new messages, so
+    callers may modify them.
+    """
+
+    def __init__(self, base, cache):
+        self.base = base
+        self.cache = cache
+
+    def ComputeForwardKinematics(self, input_joint_angles):
+        key = self.cache.forward_key([joint_angle.value for joint_angle in input_joint_angles.joint_angles])
+        return self._lookup(key, self.base.ComputeForwardKinematics, input_joint_angles)
+
+    def ComputeInverseKinematics(self, input_ik_data):
+        pose = input_ik_data.cartesian_pose
+        guess = [joint_angle.value for joint_angle in input_ik_data.guess.joint_angles]
+        key = self.cache.inverse_key((pose.x, pose.y, pose.z, pose.theta_x, pose.theta_y, pose.theta_z), guess)
+        return self._lookup(key, self.base.ComputeInverseKinematics, input_ik_data)
+
+    # The answers are stored serialized, and parsed again on every hit
+    def _lookup(self, key, function, request):
+        answer = None
+
+        def compute():
+            nonlocal answer
+            answer = function(request)
+            return (type(answer), answer.SerializeToString())
+
+        message_class, payload = self.cache.lookup(key, compute)
+        return answer if answer is not None else message_class.FromString(payload)
+
+    def __getattr__(self, name):
+        return getattr(self.base, name)
+
+
+# This function returns a hashable version of a tool description (a sequence of numbers, or any hashable value)
+def _hashable(tool):
+    try:
+        hash(tool)
+        return tool
+    except TypeError:
+        return tuple(np.asarray(tool, dtype=np.float64).tolist())
@@ -0,0 +1,219 @@
+#! /usr/bin/env python3
+
+###
+# KINOVA (R) KORTEX (TM)
+#
+# Copyright (c) 2024 Kinova inc. All rights reserved.
+#
+# This software may be modified and distributed
+# under the terms of the BSD 3-Clause license.
+#
+# Refer to the LICENSE file for details.
+#
+###
+
+# Pipelined batches of ComputeForwardKinematics() / ComputeInverseKinematics() calls.
+#
+# Called one after the other, each kinematics RPC waits for a full round trip and the link stays idle meanwhile.
+# BatchKinematicsClient keeps up to 'max_in_flight' requests in flight from a thread pool: a new request is sent as
+# soon as one answers, and the answers are returned in the order of the inputs. Only a window of requests exists at
+# any time, so batches of any length use a bounded memory.
+#
+# Only transient failures are retried, up to 'retries' times after 'retry_delay' seconds: a call that times out, or
+# that fails with a KServerException whose error code is in 'retry_errors' (by default errors of the server protocol
+# layer and internal errors, which do not depend on the request). A device or kinematics error, such as a pose without
+# inverse kinematics solution, fails again with the same request and is not retried. Items that fail are returned as
+# NaN rows with their exception, the rest of the batch goes on. Any other exception stops the batch and is raised.
+#
+# Typical use:
+#
+#   client = BatchKinematicsClient(base, max_in_flight=8)
+#   result = client.inverse(poses, guesses)  # result.values: (N, 6) joint angles, result.failed: (N,) mask
+#   print(result.report)
+#
+# The controller's answers are authoritative; kinematics.KinematicModel computes the same locally, much faster.
+
+import collections
+import concurrent.futures
+import threading
+import time
+
+import numpy as np
+from kortex_api.autogen.messages import Base_pb2, Errors_pb2
+from kortex_api.exceptions.KServerException import KServerException
+
+from kinematics import joint_angles_message
+
+DEFAULT_MAX_IN_FLIGHT = 8
+DEFAULT_RETRIES = 2
+DEFAULT_RETRY_DELAY = 0.01  # seconds
+
+# Error codes of the KServerException retried by default
+DEFAULT_RETRY_ERRORS = frozenset((Errors_pb2.ERROR_PROTOCOL_SERVER, Errors_pb2.ERROR_INTERNAL))
+
+
+class BatchReport:
+    """
+    Throughput of a batch: 'latencies' are the durations of the successful calls in seconds (retries included),
+    'elapsed' the duration of the batch, 'retries' the number of calls repeated and 'failures' the items that failed.
+    """
+
+    def __init__(self, name, count, latencies, elapsed, retries, failures, max_in_flight):
+        self.name = name
+        self.count = count
+        self.latencies = latencies
+        self.elapsed = elapsed
+        self.retries = retries
+        self.failures = failures
+        self.max_in_flight = max_in_flight
+
+    # Items completed per second, failures included
+    @property
+    def rate(self):
+        return self.count / self.elapsed if self.elapsed > 0 else 0.0
+
+    # This function returns the latency below which 'q' percent of the successful calls fall, in seconds
+    def percentile(self, q):
+        return float(np.percentile(self.latencies, q)) if len(self.latencies) else float("nan")
+
+    def __str__(self):
+        return "{}: {} items in {:.3f} s, {:.0f} items/s with {} in flight, latency p50 {:.3f} ms, p99 {:.3f} ms, retries: {}, failures: {}".format(
+            self.name, self.count, self.elapsed, self.rate, self.max_in_flight, self.percentile(50) * 1e3, self.percentile(99) * 1e3, self.retries, self.failures)
+
+
+class BatchResult:
+    """
+    Answers of a batch in input order: 'values' is an (N, 6) array (poses or joint angles) with NaN rows for the
+    failed items, 'failed' the mask of these items, 'errors' their last exception by index and 'report' the
+    BatchReport of the batch.
+    """
+
+    def __init__(self, values, failed, errors, report):
+        self.values = values
+        self.failed = failed
+        self.errors = errors
+        self.report = report
+
+    def __bool__(self):
+        return not self.failed.any()
+
+    def __len__(self):
+        return len(self.values)
+
+
+class BatchKinematicsClient:
+    """
+    Sends kinematics requests to 'base' with up to 'max_in_flight' calls in flight. Failed calls are retried
+    'retries' times after 'retry_delay' seconds when they time out or raise a KServerException whose error code
+    (Errors_pb2.ErrorCodes) is in 'retry_errors'.
+    """
+
+    def __init__(self, base, max_in_flight=DEFAULT_MAX_IN_FLIGHT, retries=DEFAULT_RETRIES, retry_delay=DEFAULT_RETRY_DELAY, retry_errors=DEFAULT_RETRY_ERRORS):
+
+        if max_in_flight < 1:
+            raise ValueError("At least one request must be in flight")
+
+        self.base = base
+        self.max_in_flight = max_in_flight
+        self.retries = retries
+        self.retry_delay = retry_delay
+        self.retry_errors = frozenset(retry_errors)
+
+    # This function returns True if a failed call may succeed when sent again
+    def is_transient(self, ex):
+        if isinstance(ex, KServerException):
+            return ex.get_error_code() in self.retry_errors
+        return isinstance(ex, concurrent.futures.TimeoutError)
+
+    # This function returns the (N, 6) poses (x, y, z, theta_x, theta_y, theta_z) of (N, joints) joint angles in
+    # degrees, from base.ComputeForwardKinematics()
+    def forward(self, joint_angles):
+        joint_angles = np.asarray(joint_angles, dtype=np.float64)
+        if joint_angles.ndim != 2:
+            raise ValueError("The joint angles must be an (N, joints) array")
+
+        def request(i):
+            return joint_angles_message(joint_angles[i])
+
+        def values(pose):
+            return (pose.x, pose.y, pose.z, pose.theta_x, pose.theta_y, pose.theta_z)
+
+        return self.run("ComputeForwardKinematics", self.base.ComputeForwardKinematics, len(joint_angles), request, values, 6)
+
+    # This function returns the (N, joints) joint angles in degrees of (N, 6) poses, from
+    # base.ComputeInverseKinematics(). 'guesses' are the joint angles each pose starts from, one row per pose or the
+    # same for all, none by default.
+    def inverse(self, poses, guesses=None, joint_count=6):
+        poses = np.asarray(poses, dtype=np.float64)
+        if poses.ndim != 2 or poses.shape[1] != 6:
+            raise ValueError("The poses must be an (N, 6) array")
+        if guesses is not None:
+            guesses = np.broadcast_to(np.asarray(guesses, dtype=np.float64), (len(poses), joint_count))
+
+        def request(i):
+            ik_data = Base_pb2.IKData()
+            pose = ik_data.cartesian_pose
+            pose.x, pose.y, pose.z, pose.theta_x, pose.theta_y, pose.theta_z = poses[i]
+            if guesses is not None:
+                for value in guesses[i]:
+                    ik_data.guess.joint_angles.add().value = value
+            return ik_data
+
+        def values(computed_joint_angles):
+            return [joint_angle.value for joint_angle in computed_joint_angles.joint_angles]
+
+        return self.run("ComputeInverseKinematics", self.base.ComputeInverseKinematics, len(poses), request, values, joint_count)
+
+    # This function calls 'function' on request(i) for i in range(count), with up to max_in_flight calls in flight,
+    # and returns a BatchResult whose row i holds values(answer i)
+    def run(self, name, function, count, request, values, width):
+
+        results = np.full((count, width), np.nan)
+        failed = np.zeros(count, dtype=bool)
+        errors = {}
+        latencies = []
+        retries = [0]
+        lock = threading.Lock()
+
+        def call(i):
+            message = request(i)
+            start = time.perf_counter()
+            for attempt in range(self.retries + 1):
+                try:
+                    answer = function(message)
+                    break
+                except (KServerException, concurrent.futures.TimeoutError) as ex:
+                    if attempt == self.retries or not self.is_transient(ex):
+                        return i, None, ex
+                    with lock:
+                        retries[0] += 1
+                    time.sleep(self.retry_delay)
+            latency = time.perf_counter() - start
+            with lock:
+                latencies.append(latency)
+            return i, answer, None
+
+        start = time.perf_counter()
+        with concurrent.futures.ThreadPoolExecutor(max_workers=self.max_in_flight, thread_name_prefix="Kinematics") as pool:
+            # A window of pending calls, collected in order: the pool keeps max_in_flight of them running
+            window = collections.deque()
+            following = 0
+            try:
+                while following < count or window:
+                    while following < count and len(window) < 2 * self.max_in_flight:
+                        window.append(pool.submit(call, following))
+                        following += 1
+                    i, answer, error = window.popleft().result()
+                    if error is None:
+                        results[i] = values(answer)
+                    else:
+                        failed[i] = True
+                        errors[i] = error
+            finally:
+                for future in window:
+                    future.cancel()
+        elapsed = time.perf_counter() - start
+
+        report = BatchReport(name, count, np.array(latencies), elapsed, retries[0], int(failed.sum()), self.max_in_flight)
+        return BatchResult(results, failed, errors, report)
+
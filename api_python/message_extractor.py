@@ -0,0 +1,230 @@
+#! /usr/bin/env python3
+
+###
+# KINOVA (R) KORTEX (TM)
+#
+# Copyright (c) 2024 Kinova inc. All rights reserved.
+#
+# This software may be modified and distributed
+# under the terms of the BSD 3-Clause license.
+#
+# Refer to the LICENSE file for details.
+#
+###
+
+# Descriptor-compiled flat field extractor for Kortex protobuf messages.
+#
+# json_format.MessageToDict walks the descriptor of every message it converts, and loops over
+# DESCRIPTOR.fields_by_name + getattr redo the same lookups for each message. MessageExtractor walks the
+# descriptor once, then generates the source of a function reading the chosen fields in a single expression:
+#
+#   def extract(message):
+#       m1 = message.base
+#       return (m1.tool_pose_x, m1.tool_pose_y, ...)
+#
+# The compiled function is reused for every message, along with the matching NumPy dtype and column names.
+# The inverse function, writing a tuple of values to the same fields of a message, is generated the same way.
+
+import keyword
+
+import numpy as np
+from google.protobuf.descriptor import FieldDescriptor
+
+_DTYPES = {
+    FieldDescriptor.CPPTYPE_INT32: np.int32,
+    FieldDescriptor.CPPTYPE_INT64: np.int64,
+    FieldDescriptor.CPPTYPE_UINT32: np.uint32,
+    FieldDescriptor.CPPTYPE_UINT64: np.uint64,
+    FieldDescriptor.CPPTYPE_DOUBLE: np.float64,
+    FieldDescriptor.CPPTYPE_FLOAT: np.float64,
+    FieldDescriptor.CPPTYPE_BOOL: np.bool_,
+    FieldDescriptor.CPPTYPE_ENUM: np.int32,
+    FieldDescriptor.CPPTYPE_STRING: object,
+}
+
+
+# This function returns True if a field descriptor is a repeated field
+def _is_repeated(field):
+    # Recent protobuf releases replace FieldDescriptor.label by is_repeated
+    if hasattr(field, "is_repeated"):
+        return field.is_repeated
+    return field.label == FieldDescriptor.LABEL_REPEATED
+
+
+# This function returns True if a field descriptor is a scalar that fits in a float64 column
+def is_numeric(field):
+    return not _is_repeated(field) and field.cpp_type in _DTYPES and field.cpp_type != FieldDescriptor.CPPTYPE_STRING
+
+
+# This function returns True if a field descriptor is a scalar (numeric or string) field
+def is_scalar(field):
+    return not _is_repeated(field) and field.cpp_type in _DTYPES
+
+
+# This function returns the descriptor of the submessage found at the dotted 'path' of a message descriptor
+def _descriptor_at(descriptor, path):
+    for name in path.split(".") if path else []:
+        descriptor = descriptor.fields_by_name[name].message_type
+    return descriptor
+
+
+# This function returns the dotted paths of the numeric fields of the submessage found at 'path' in a message type.
+# 'predicate' receives each field name and selects the fields to keep.
+def select_fields(message_class, path, predicate=None):
+    descriptor = _descriptor_at(message_class.DESCRIPTOR, path)
+
+    prefix = path + "." if path else ""
+    return [
+        prefix + field.name
+        for field in descriptor.fields
+        if is_numeric(field) and (predicate is None or predicate(field.name))
+    ]
+
+
+# This function returns the name json_format.MessageToDict gives to the field at a dotted path, e.g. "toolPoseX" for
+# "base.tool_pose_x"
+def json_name(message_class, path):
+    parent, _, name = path.rpartition(".")
+    return _descriptor_at(message_class.DESCRIPTOR, parent).fields_by_name[name].json_name
+
+
+# This function expands dotted paths into (path, field descriptor) pairs of scalar fields.
+# A path naming a submessage is replaced by every scalar field found below it, repeated fields are skipped.
+def expand_fields(message_class, paths=None):
+    expanded = []
+
+    def expand(descriptor, prefix):
+        for field in descriptor.fields:
+            if _is_repeated(field):
+                continue
+            if field.cpp_type == FieldDescriptor.CPPTYPE_MESSAGE:
+                expand(field.message_type, prefix + field.name + ".")
+            elif field.cpp_type in _DTYPES:
+                expanded.append((prefix + field.name, field))
+
+    if paths is None:
+        expand(message_class.DESCRIPTOR, "")
+        return expanded
+
+    for path in paths:
+        parent, _, name = path.rpartition(".")
+        field = _descriptor_at(message_class.DESCRIPTOR, parent).fields_by_name[name]
+        if _is_repeated(field):
+            raise ValueError("Repeated field {} can not be extracted to a column".format(path))
+        if field.cpp_type == FieldDescriptor.CPPTYPE_MESSAGE:
+            expand(field.message_type, path + ".")
+        else:
+            expanded.append((path, field))
+
+    return expanded
+
+
+# This function returns the expression reading field 'name' of 'variable'
+def _access(variable, name):
+    # A field named after a Python keyword can only be read with getattr
+    if keyword.iskeyword(name):
+        return "getattr({}, {!r})".format(variable, name)
+    return "{}.{}".format(variable, name)
+
+
+# This function returns the statements reading the submessages of 'paths' into local variables,
+# and the (variable, field name) pair of each path
+def _field_accesses(paths):
+    variables = {"": "message"}
+    lines = []
+
+    # Each submessage is read once and kept in a local variable
+    def variable_for(path):
+        if path not in variables:
+            parent, _, name = path.rpartition(".")
+            parent_variable = variable_for(parent)
+            variables[path] = "m{}".format(len(variables))
+            lines.append("    {} = {}".format(variables[path], _access(parent_variable, name)))
+        return variables[path]
+
+    accesses = []
+    for path in paths:
+        parent, _, name = path.rpartition(".")
+        accesses.append((variable_for(parent), name))
+    return lines, accesses
+
+
+# This function returns the source of the extraction function
+def _generate_source(paths):
+    lines, accesses = _field_accesses(paths)
+    values = [_access(variable, name) for variable, name in accesses]
+    lines.append("    return ({},)".format(", ".join(values)))
+    return "def extract(message):\n" + "\n".join(lines) + "\n"
+
+
+# This function returns the source of the function writing a tuple of values to the fields, the inverse of extract()
+def _generate_fill_source(paths):
+    lines, accesses = _field_accesses(paths)
+    for i, (variable, name) in enumerate(accesses):
+        if keyword.iskeyword(name):
+            lines.append("    setattr({}, {!r}, values[{}])".format(variable, name, i))
+        else:
+            lines.append("    {}.{} = values[{}]".format(variable, name, i))
+    return "def fill(message, values):\n" + "\n".join(lines) + "\n"
+
+
+class MessageExtractor:
+    """
+    Flat extractor of the scalar fields of a message type. 'fields' are dotted paths of fields or submessages
+    (every scalar field of the message when None). 'columns' is a list of column names or a function returning
+    the column name of a dotted path, by default the path with its dots replaced by underscores.
+    Calling the extractor on a message returns the tuple of its field values, in column order, fill() does the opposite.
+    """
+
+    def __init__(self, message_class, fields=None, columns=None):
+
+        self.message_class = message_class
+        expanded = expand_fields(message_class, fields)
+        if not expanded:
+            raise ValueError("No field to extract from {}".format(message_class.DESCRIPTOR.full_name))
+
+        self.fields = [path for path, _ in expanded]
+
+        if columns is None:
+            self.columns = [path.replace(".", "_") for path in self.fields]
+        elif callable(columns):
+            self.columns = [columns(path) for path in self.fields]
+        else:
+            self.columns = list(columns)
+        if len(self.columns) != len(self.fields) or len(set(self.columns)) != len(self.columns):
+            raise ValueError("The columns must be distinct and match the extracted fields")
+
+        self.dtype = np.dtype([(column, _DTYPES[field.cpp_type]) for column, (_, field) in zip(self.columns, expanded)])
+
+        self.source = _generate_source(self.fields)
+        namespace = {}
+        exec(compile(self.source, "<extract {}>".format(message_class.DESCRIPTOR.full_name), "exec"), namespace)
+        self._extract = namespace["extract"]
+
+        self.fill_source = _generate_fill_source(self.fields)
+        exec(compile(self.fill_source, "<fill {}>".format(message_class.DESCRIPTOR.full_name), "exec"), namespace)
+        self._fill = namespace["fill"]
+
+    def __call__(self, message):
+        return self._extract(message)
+
+    # This function writes the fields of a message in row 'index' of a structured array of the extractor dtype
+    def extract_into(self, message, array, index):
+        array[index] = self._extract(message)
+
+    # This function writes a tuple of values, in column order, to the fields of a message
+    def fill(self, message, values):
+        self._fill(message, values)
+
+    # This function converts an iterable of messages to a structured array
+    def to_array(self, messages, count=-1):
+        if any(self.dtype[name].hasobject for name in self.dtype.names):
+            # np.fromiter can not build arrays holding Python objects
+            return np.array(list(map(self._extract, messages)), dtype=self.dtype)
+        return np.fromiter(map(self._extract, messages), dtype=self.dtype, count=count)
+
+    def to_dataframe(self, messages):
+        # Pandas is only needed when the data is exported
+        import pandas as pd
+
+        return pd.DataFrame.from_records(list(map(self._extract, messages)), columns=self.columns)
@@ -0,0 +1,332 @@
+#! /usr/bin/env python3
+
+###
+# KINOVA (R) KORTEX (TM)
+#
+# Copyright (c) 2024 Kinova inc. All rights reserved.
+#
+# This software may be modified and distributed
+# under the terms of the BSD 3-Clause license.
+#
+# Refer to the LICENSE file for details.
+#
+###
+
+# Drift-free periodic loop runner for cyclic feedback and command loops.
+#
+# Calling time.sleep(period) after an RPC makes the real period sleep + RPC time. PeriodicLoop instead computes
+# absolute deadlines (start + k * period) with time.perf_counter_ns(), so the time spent in the loop body does not
+# accumulate. The last part of each wait can be spent busy-waiting, since time.sleep() usually wakes up late.
+# Overruns are counted and the achieved periods are accumulated in a jitter histogram reported at the end of a run.
+#
+# Typical use:
+#
+#   loop = PeriodicLoop(0.001)
+#   for i in loop.ticks(1000):
+#       feedback = base_cyclic.RefreshFeedback()
+#   print(loop.report())
+#
+# On a shared computer, the loop can also run with real-time settings (Linux only, most of them need privileges):
+#
+#   with RealTime(cpu=3, priority=80) as realtime:
+#       report = loop.run(body, 1000)
+#   print(realtime)
+
+import ctypes
+import ctypes.util
+import gc
+import math
+import mmap
+import os
+import threading
+import time
+
+DEFAULT_BUSY_WAIT = 0.0002  # seconds
+DEFAULT_HISTOGRAM_BIN = 10e-6  # seconds
+DEFAULT_HISTOGRAM_RANGE = 1e-3  # seconds
+
+# mlockall() flags
+_MCL_CURRENT = 1
+_MCL_FUTURE = 2
+
+
+class JitterReport:
+    """
+    Statistics of the periods achieved by a PeriodicLoop. Times are in seconds, histogram[i] counts the periods
+    that deviated from the nominal period by (i - len(histogram) // 2) * bin_width, the first and last bins
+    also count every deviation beyond the histogram range.
+    """
+
+    def __init__(self, period, count, overruns, skipped, total, total_squared, minimum, maximum, histogram, bin_width):
+        self.period = period
+        self.count = count
+        self.overruns = overruns
+        self.skipped = skipped
+        self.mean = total / count if count else 0.0
+        self.std = math.sqrt(max(total_squared / count - self.mean ** 2, 0.0)) if count else 0.0
+        self.min = minimum if count else 0.0
+        self.max = maximum if count else 0.0
+        self.histogram = histogram
+        self.bin_width = bin_width
+
+    # This function returns the period deviation below which 'q' percent of the periods fall, from the histogram
+    def percentile(self, q):
+        if not self.count:
+            return 0.0
+        target = self.count * q / 100.0
+        cumulated = 0
+        for index, value in enumerate(self.histogram):
+            cumulated += value
+            if cumulated >= target:
+                return (index - len(self.histogram) // 2) * self.bin_width
+        return (len(self.histogram) // 2) * self.bin_width
+
+    def __str__(self):
+        lines = [
+            "Periods: {} (nominal {:.3f} ms)".format(self.count, self.period * 1e3),
+            "Mean: {:.3f} ms, std: {:.3f} ms, min: {:.3f} ms, max: {:.3f} ms".format(self.mean * 1e3, self.std * 1e3, self.min * 1e3, self.max * 1e3),
+            "Jitter p50: {:+.1f} us, p99: {:+.1f} us, p99.9: {:+.1f} us".format(self.percentile(50) * 1e6, self.percentile(99) * 1e6, self.percentile(99.9) * 1e6),
+            "Overruns: {}, skipped periods: {}".format(self.overruns, self.skipped),
+        ]
+        return "\n".join(lines)
+
+
+class PeriodicLoop:
+    """
+    Runs a loop at a fixed period (in seconds) using absolute deadlines.
+    busy_wait is the time before each deadline spent spinning instead of sleeping (0 to always sleep).
+    When an iteration overruns by more than a whole period, the missed deadlines are skipped so the loop keeps
+    its phase instead of running a burst of iterations to catch up.
+    """
+
+    def __init__(self, period, busy_wait=DEFAULT_BUSY_WAIT, histogram_bin=DEFAULT_HISTOGRAM_BIN, histogram_range=DEFAULT_HISTOGRAM_RANGE):
+
+        if period <= 0:
+            raise ValueError("The period must be greater than 0")
+
+        self.period = period
+        self.busy_wait = busy_wait
+        self.histogram_bin = histogram_bin
+
+        self._period_ns = int(round(period * 1e9))
+        self._busy_wait_ns = int(round(busy_wait * 1e9))
+        self._bin_ns = int(round(histogram_bin * 1e9))
+        self._half_bins = int(round(histogram_range / histogram_bin))
+
+        self.reset()
+
+    def reset(self):
+        self.overruns = 0
+        self.skipped = 0
+        self._deadline = None
+        self._last = None
+        self._count = 0
+        self._total = 0
+        self._total_squared = 0
+        self._min = None
+        self._max = None
+        self._histogram = [0] * (2 * self._half_bins + 1)
+
+    # This function sets the current time as the first deadline
+    def start(self):
+        self._deadline = time.perf_counter_ns()
+        self._last = self._deadline
+
+    # This function blocks until the next deadline and returns the lateness of the wake up, in seconds
+    def wait(self):
+        if self._deadline is None:
+            self.start()
+
+        period = self._period_ns
+        self._deadline += period
+        deadline = self._deadline
+        now = time.perf_counter_ns()
+
+        if now > deadline:
+            self.overruns += 1
+            missed = (now - deadline) // period
+            if missed:
+                self.skipped += missed
+                self._deadline += missed * period
+                deadline = self._deadline
+        else:
+            remaining = deadline - now - self._busy_wait_ns
+            if remaining > 0:
+                time.sleep(remaining / 1e9)
+            while time.perf_counter_ns() < deadline:
+                pass
+
+        now = time.perf_counter_ns()
+        self._record(now - self._last)
+        self._last = now
+
+        return (now - deadline) / 1e9
+
+    def _record(self, elapsed):
+        self._count += 1
+        self._total += elapsed
+        self._total_squared += elapsed * elapsed
+        if self._min is None or elapsed < self._min:
+            self._min = elapsed
+        if self._max is None or elapsed > self._max:
+            self._max = elapsed
+
+        index = (elapsed - self._period_ns + self._bin_ns // 2) // self._bin_ns + self._half_bins
+        self._histogram[min(max(index, 0), 2 * self._half_bins)] += 1
+
+    # This generator yields the iteration index at each deadline, forever or 'count' times
+    def ticks(self, count=None):
+        self.start()
+        i = 0
+        while count is None or i < count:
+            yield i
+            i += 1
+            if count is None or i < count:
+                self.wait()
+
+    # This function calls 'function' with the iteration index at each deadline and returns the jitter report
+    def run(self, function, count=None):
+        for i in self.ticks(count):
+            function(i)
+        return self.report()
+
+    def report(self):
+        return JitterReport(
+            self.period,
+            self._count,
+            self.overruns,
+            self.skipped,
+            self._total / 1e9,
+            self._total_squared / 1e18,
+            (self._min or 0) / 1e9,
+            (self._max or 0) / 1e9,
+            list(self._histogram),
+            self.histogram_bin,
+        )
+
+
+class RealTime:
+    """
+    Real-time settings applied to the thread entering a 'with' block, and restored when it exits:
+    'cpu' pins the thread to a CPU, 'priority' (1 to 99) requests the SCHED_FIFO policy, 'disable_gc' collects then
+    disables the garbage collector of the process, 'buffers' are NumPy arrays whose pages are written once to map them
+    and 'lock_memory' locks the memory of the process in RAM. Settings that are not supported or not permitted
+    are skipped and listed in 'warnings', the loop still runs. An instance is used by a single thread at a time.
+    """
+
+    def __init__(self, cpu=None, priority=None, disable_gc=True, buffers=(), lock_memory=False):
+
+        self.cpu = cpu
+        self.priority = priority
+        self.disable_gc = disable_gc
+        self.buffers = list(buffers)
+        self.lock_memory = lock_memory
+
+        self.applied = []
+        self.warnings = []
+        self.thread_name = None
+        self._affinity = None
+        self._scheduler = None
+        self._gc_enabled = None
+        self._locked = False
+
+    # This function returns the priority setting for a helper thread, with its own 'buffers' to pre-fault. The helper
+    # is not pinned: on the CPU of a busy-waiting SCHED_FIFO loop, it could only run while the loop sleeps.
+    def for_thread(self, buffers=()):
+        return RealTime(priority=self.priority, disable_gc=False, buffers=buffers)
+
+    def __enter__(self):
+        self.applied = []
+        self.warnings = []
+        self.thread_name = threading.current_thread().name
+
+        if self.cpu is not None:
+            if hasattr(os, "sched_setaffinity"):
+                try:
+                    # On Linux, pid 0 is the calling thread
+                    self._affinity = os.sched_getaffinity(0)
+                    os.sched_setaffinity(0, {self.cpu})
+                    self.applied.append("CPU {}".format(self.cpu))
+                except OSError as ex:
+                    self._affinity = None
+                    self.warnings.append("CPU affinity not set: {}".format(ex))
+            else:
+                self.warnings.append("CPU affinity is not supported on this platform")
+
+        if self.priority is not None:
+            if hasattr(os, "sched_setscheduler"):
+                try:
+                    self._scheduler = (os.sched_getscheduler(0), os.sched_getparam(0))
+                    os.sched_setscheduler(0, os.SCHED_FIFO, os.sched_param(self.priority))
+                    self.applied.append("SCHED_FIFO priority {}".format(self.priority))
+                except OSError as ex:
+                    self._scheduler = None
+                    self.warnings.append("SCHED_FIFO not set (needs root or CAP_SYS_NICE): {}".format(ex))
+            else:
+                self.warnings.append("SCHED_FIFO is not supported on this platform")
+
+        if self.lock_memory:
+            self._locked = self._mlockall()
+
+        prefaulted = sum(self._prefault(buffer) for buffer in self.buffers)
+        if prefaulted:
+            self.applied.append("{} buffers pre-faulted".format(prefaulted))
+
+        if self.disable_gc:
+            self._gc_enabled = gc.isenabled()
+            gc.collect()
+            gc.disable()
+            self.applied.append("GC disabled")
+
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if self._gc_enabled:
+            gc.enable()
+        self._gc_enabled = None
+
+        if self._locked:
+            libc = ctypes.CDLL(ctypes.util.find_library("c"), use_errno=True)
+            libc.munlockall()
+            self._locked = False
+
+        if self._scheduler is not None:
+            policy, parameters = self._scheduler
+            try:
+                os.sched_setscheduler(0, policy, parameters)
+            except OSError:
+                pass
+            self._scheduler = None
+
+        if self._affinity is not None:
+            os.sched_setaffinity(0, self._affinity)
+            self._affinity = None
+
+    def _mlockall(self):
+        library = ctypes.util.find_library("c")
+        if library is None:
+            self.warnings.append("Memory not locked: the C library was not found")
+            return False
+        libc = ctypes.CDLL(library, use_errno=True)
+        if not hasattr(libc, "mlockall"):
+            self.warnings.append("Memory locking is not supported on this platform")
+            return False
+        if libc.mlockall(_MCL_CURRENT | _MCL_FUTURE) != 0:
+            self.warnings.append("Memory not locked (needs root or CAP_IPC_LOCK): {}".format(os.strerror(ctypes.get_errno())))
+            return False
+        self.applied.append("memory locked")
+        return True
+
+    # This function writes one byte per page of a NumPy array, with its own value, so the pages are mapped before the loop
+    def _prefault(self, buffer):
+        if not buffer.flags["C_CONTIGUOUS"] or not buffer.flags["WRITEABLE"]:
+            self.warnings.append("Buffer not pre-faulted: only contiguous writeable arrays can be")
+            return False
+        data = buffer.reshape(-1).view("u1")
+        data[:: mmap.PAGESIZE] = data[:: mmap.PAGESIZE]
+        return True
+
+    def __str__(self):
+        lines = ["Real-time settings of {}: {}".format(self.thread_name, ", ".join(self.applied) or "none")]
+        lines += self.warnings
+        return "\n".join(lines)
@@ -0,0 +1,705 @@
+#! /usr/bin/env python3
+
+###
+# KINOVA (R) KORTEX (TM)
+#
+# Copyright (c) 2024 Kinova inc. All rights reserved.
+#
+# This software may be modified and distributed
+# under the terms of the BSD 3-Clause license.
+#
+# Refer to the LICENSE file for details.
+#
+###
+
+# Offline Link 6 simulator.
+#
+# The SimulatedRobot stands in for the arm behind utilities.DeviceConnection: it is returned in place of the
+# RouterClient when a connection is created with DeviceConnection.createSimulatedConnection(), and service
+# clients are then created with create_client(BaseClient, router).
+# Clients created on a real router are returned untouched, so the same code runs against the robot and offline.
+# The simulator is not a transport and does not decode the frames sent by the kortex_api clients: examples creating
+# their services with e.g. BaseClient(router) only run against a robot.
+#
+# The simulator models the arm state (operating mode, joint angles, tool pose), publishes cyclic feedback at 1 kHz,
+# executes waypoint trajectories and programs with their notifications and exposes the controller IO channels.
+# Every RPC waits for a configurable latency so throughput and latency measurements stay meaningful. A transport
+# model (TRANSPORTS) adds the round trip of MQTT or UDP, which grows with the size of the request and of the answer.
+# It is a state model, not a dynamics model: joint and cartesian motions are integrated independently.
+# Failing RPCs raise a SimulatedServerException, a KServerException, as the controller does.
+# ComputeForwardKinematics() and ComputeInverseKinematics() use the nominal kinematics.KinematicModel, which is
+# independent from the simulated pose.
+
+import itertools
+import math
+import random
+import threading
+import time
+
+from kortex_api.autogen.messages import (
+    Base_pb2,
+    BaseCyclic_pb2,
+    Common_pb2,
+    Errors_pb2,
+    IndustrialIO_pb2,
+    ProgramConfig_pb2,
+    ProgramRunner_pb2,
+    ProtectionZone_pb2,
+    VariableManager_pb2,
+)
+from kortex_api.exceptions.KServerException import KServerException
+
+from periodic_loop import PeriodicLoop
+
+JOINT_COUNT = 6
+
+# Default state of the simulated arm (joint angles in degrees, pose in meters and degrees)
+HOME_JOINT_ANGLES = (0.0, -20.0, 75.0, 0.0, 15.0, 0.0)
+HOME_POSE = (0.45, 0.0, 0.35, 0.0, 180.0, 90.0)
+
+# Speeds used to play trajectories that do not specify their own
+DEFAULT_LINEAR_SPEED = 0.1  # m/s
+DEFAULT_JOINT_SPEED = 20.0  # deg/s
+DEFAULT_ANGULAR_SPEED = 30.0  # deg/s, orientation of cartesian waypoints
+
+DIGITAL_CHANNEL_COUNT = 8
+ANALOG_CHANNEL_COUNT = 4
+
+
+class TransportModel:
+    """
+    Round trip model of a transport: 'latency' and 'jitter' (in seconds) are added to every RPC, 'overhead' is the size
+    (in bytes) of the protocol headers around every request and answer and 'bandwidth' the link rate in bytes per second.
+    """
+
+    def __init__(self, latency, jitter, overhead, bandwidth):
+        self.latency = latency
+        self.jitter = jitter
+        self.overhead = overhead
+        self.bandwidth = bandwidth
+
+    # This function returns the round trip time of an RPC, without jitter, from the serialized sizes of its messages
+    def round_trip(self, request_size, response_size):
+        return self.latency + (request_size + response_size + 2 * self.overhead) / self.bandwidth
+
+
+# Orders of magnitude on a 100 Mbit/s link, not measurements of a controller: MQTT goes through the broker of the arm
+# over TCP (Ethernet, IP, TCP and MQTT headers), UDP frames are sent straight to the controller (Ethernet, IP and UDP)
+TRANSPORTS = {
+    "MQTT": TransportModel(latency=0.002, jitter=0.001, overhead=74, bandwidth=12.5e6),
+    "UDP": TransportModel(latency=0.0005, jitter=0.0002, overhead=42, bandwidth=12.5e6),
+}
+
+
+# This function sets the fields of a message that exist in its descriptor, so the simulator stays compatible with
+# firmware versions that add or remove feedback fields
+def _set_fields(message, values):
+    fields = message.DESCRIPTOR.fields_by_name
+    for name, value in values.items():
+        if name in fields:
+            setattr(message, name, value)
+
+
+# This function returns True if a message has a field with the given name
+def _has_field(message, name):
+    return name in message.DESCRIPTOR.fields_by_name
+
+
+class SimulatedServerException(KServerException):
+    """
+    Error of a simulated RPC, raised where the controller raises a KServerException so the same error handling runs
+    offline. 'error_code' and 'sub_error_code' are Errors_pb2 codes.
+    """
+
+    # KServerException is built from the frame of a controller answer, which the simulator does not have
+    def __init__(self, error_code, sub_error_code, description):
+        Exception.__init__(self, description)
+        self.error_code = error_code
+        self.sub_error_code = sub_error_code
+        self.description = description
+
+    def get_error_code(self):
+        return self.error_code
+
+    def get_error_sub_code(self):
+        return self.sub_error_code
+
+    def __str__(self):
+        return "Server error {} (sub error {}): {}".format(self.error_code, self.sub_error_code, self.description)
+
+
+class _Subscription:
+    def __init__(self, topic, callback):
+        self.topic = topic
+        self.callback = callback
+
+
+class SimulatedRobot:
+    """
+    Simulated Link 6 arm. Use it as a context manager, it starts the 1 kHz state update thread on entry.
+    latency and jitter are the round trip delays (in seconds) added to every RPC, on top of the round trip of
+    'transport', a TransportModel or the name of one of TRANSPORTS ("MQTT", "UDP"), when given. validation_time is the
+    time spent per waypoint by ValidateWaypointList and program_duration the time taken by a program started by
+    ProgramRunner.
+    """
+
+    FEEDBACK_RATE = 1000  # Hz
+
+    def __init__(self, latency=0.0, jitter=0.0, feedback_rate=FEEDBACK_RATE, validation_time=0.0, program_duration=1.0, io_loopback=None, seed=None, transport=None):
+
+        self.latency = latency
+        self.jitter = jitter
+        self.transport = TRANSPORTS[transport] if isinstance(transport, str) else transport
+        self.feedback_rate = feedback_rate
+        self.validation_time = validation_time
+        self.program_duration = program_duration
+
+        # Digital output -> digital input jumpers, as wired for the industrial IO example (DO_4 to DI_0)
+        self.io_loopback = {4: 0} if io_loopback is None else dict(io_loopback)
+
+        self._random = random.Random(seed)
+        self._lock = threading.RLock()
+        self._thread = None
+        self._running = threading.Event()
+
+        # Arm state
+        self.operating_mode = Common_pb2.OPERATING_MODE_AUTO
+        self.arm_state = Base_pb2.ARMSTATE_SERVOING_READY
+        self.joint_angles = list(HOME_JOINT_ANGLES)
+        self.joint_velocities = [0.0] * JOINT_COUNT
+        self.pose = list(HOME_POSE)
+        self.twist = [0.0] * 6
+        self.wrench = [0.0] * 6
+        self.frame_id = 0
+        self.sim_time = 0.0
+
+        self._joint_command = None
+        self._twist_command = None
+        self._trajectory = []
+
+        # Controller content
+        self.programs = {"Newhome": "newhome"}
+        self.protection_zones = {}
+        self.variables = {}
+        self.digital_inputs = [False] * DIGITAL_CHANNEL_COUNT
+        self.digital_outputs = [False] * DIGITAL_CHANNEL_COUNT
+        self.analog_inputs = [0.0] * ANALOG_CHANNEL_COUNT
+        self.analog_outputs = [0.0] * ANALOG_CHANNEL_COUNT
+
+        self._subscriptions = {}
+        self._handles = itertools.count(1)
+        self._feedback_bytes = None
+        self._feedback_frame = -1
+
+        self._clients = {
+            "BaseClient": SimulatedBaseClient,
+            "BaseCyclicClient": SimulatedBaseCyclicClient,
+            "ProgramRunnerClient": SimulatedProgramRunnerClient,
+            "IndustrialIOClient": SimulatedIndustrialIOClient,
+            "ProtectionZoneClient": SimulatedProtectionZoneClient,
+            "VariableManagerClient": SimulatedVariableManagerClient,
+        }
+
+    # Called when entering 'with' statement
+    def __enter__(self):
+        self.start()
+        return self
+
+    # Called when exiting 'with' statement
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.stop()
+
+    def start(self):
+        if self._thread is not None:
+            return
+        self._running.set()
+        self._thread = threading.Thread(target=self._run, name="SimulatedRobot", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._running.clear()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    # This function returns the simulated service matching the name of a kortex_api client class
+    def create_client(self, client_name):
+        if client_name not in self._clients:
+            raise SimulatedServerException(Errors_pb2.ERROR_DEVICE, Errors_pb2.UNSUPPORTED_SERVICE, "The simulator does not provide a {}".format(client_name))
+        return self._clients[client_name](self)
+
+    # This function waits for the configured network latency, it is called by every RPC with the serialized sizes
+    # of its request and answer when they are known
+    def delay(self, request_size=0, response_size=0):
+        delay = self.latency
+        if self.jitter:
+            delay += self._random.uniform(0.0, self.jitter)
+        if self.transport is not None:
+            delay += self.transport.round_trip(request_size, response_size) + self._random.uniform(0.0, self.transport.jitter)
+        if delay > 0.0:
+            time.sleep(delay)
+
+    def subscribe(self, topic, callback):
+        handle = Common_pb2.NotificationHandle()
+        handle.identifier = next(self._handles)
+        with self._lock:
+            self._subscriptions[handle.identifier] = _Subscription(topic, callback)
+        return handle
+
+    def unsubscribe(self, handle):
+        with self._lock:
+            self._subscriptions.pop(handle.identifier, None)
+
+    # This function sends a notification to every subscriber of a topic, from a separate thread as the real router does
+    def notify(self, topic, notification):
+        with self._lock:
+            callbacks = [s.callback for s in self._subscriptions.values() if s.topic == topic]
+        for callback in callbacks:
+            threading.Thread(target=callback, args=(notification,), daemon=True).start()
+
+    def _run(self):
+        # The state thread sleeps instead of busy-waiting so it leaves the CPU to the code under test
+        period = 1.0 / self.feedback_rate
+        loop = PeriodicLoop(period, busy_wait=0.0)
+        loop.start()
+        dt = period
+        while self._running.is_set():
+            self.step(dt)
+            skipped = loop.skipped
+            loop.wait()
+            # Periods skipped by the loop are still simulated, so the simulated time follows the real time
+            dt = period * (1 + loop.skipped - skipped)
+
+    # This function advances the simulated arm by dt seconds
+    def step(self, dt):
+        ended = False
+        with self._lock:
+            self.sim_time += dt
+            self.frame_id += 1
+
+            joint_command = self._joint_command
+            if joint_command is not None and joint_command[1] is not None and self.sim_time >= joint_command[1]:
+                joint_command = self._joint_command = None
+            self.joint_velocities = list(joint_command[0]) if joint_command is not None else [0.0] * JOINT_COUNT
+
+            twist_command = self._twist_command
+            if twist_command is not None and twist_command[1] is not None and self.sim_time >= twist_command[1]:
+                twist_command = self._twist_command = None
+            self.twist = list(twist_command[0]) if twist_command is not None else [0.0] * 6
+
+            if self._trajectory:
+                ended = self._step_trajectory(dt)
+
+            for i in range(JOINT_COUNT):
+                self.joint_angles[i] += self.joint_velocities[i] * dt
+            for i in range(6):
+                self.pose[i] += self.twist[i] * dt
+
+        if ended:
+            notification = Base_pb2.ActionNotification()
+            notification.action_event = Base_pb2.ACTION_END
+            self.notify("action", notification)
+
+    # This function moves the arm toward the current trajectory target and returns True when the trajectory ends
+    def _step_trajectory(self, dt):
+        kind, target, speeds = self._trajectory[0]
+        if kind == "angular":
+            current = self.joint_angles
+            deltas = [target[i] - current[i] for i in range(JOINT_COUNT)]
+            duration = math.sqrt(sum(delta ** 2 for delta in deltas)) / speeds[0]
+        else:
+            current = self.pose
+            # Orientations take the shortest way around
+            deltas = [target[i] - current[i] for i in range(3)] + [(target[i] - current[i] + 180.0) % 360.0 - 180.0 for i in range(3, 6)]
+            # Positions move at the linear speed and orientations at the angular speed, the slower one sets the duration
+            linear_speed, angular_speed = speeds
+            duration = max(math.sqrt(sum(delta ** 2 for delta in deltas[:3])) / linear_speed, math.sqrt(sum(delta ** 2 for delta in deltas[3:])) / angular_speed)
+
+        if duration <= dt:
+            current[:] = target
+            self._trajectory.pop(0)
+            return not self._trajectory
+
+        ratio = dt / duration
+        for i, delta in enumerate(deltas):
+            current[i] += delta * ratio
+        return False
+
+    def start_joint_speeds(self, speeds, duration):
+        with self._lock:
+            self._joint_command = (speeds, self.sim_time + duration if duration > 0 else None)
+
+    def start_twist(self, twist, duration):
+        with self._lock:
+            self._twist_command = (twist, self.sim_time + duration if duration > 0 else None)
+
+    def start_trajectory(self, segments):
+        with self._lock:
+            self._trajectory = list(segments)
+        notification = Base_pb2.ActionNotification()
+        notification.action_event = Base_pb2.ACTION_START
+        self.notify("action", notification)
+
+    def stop_motion(self):
+        with self._lock:
+            aborted = bool(self._trajectory)
+            self._joint_command = None
+            self._twist_command = None
+            self._trajectory = []
+        if aborted:
+            notification = Base_pb2.ActionNotification()
+            notification.action_event = Base_pb2.ACTION_ABORT
+            self.notify("action", notification)
+
+    def set_digital_output(self, channel, value):
+        with self._lock:
+            self.digital_outputs[channel] = value
+            changed = None
+            if channel in self.io_loopback:
+                input_channel = self.io_loopback[channel]
+                if self.digital_inputs[input_channel] != value:
+                    self.digital_inputs[input_channel] = value
+                    changed = input_channel
+
+        if changed is not None:
+            notification = IndustrialIO_pb2.DigitalInputNotification()
+            notification.channel.identifier = changed + 1
+            notification.info.state = IndustrialIO_pb2.DIGITAL_PIN_STATE_HIGH if value else IndustrialIO_pb2.DIGITAL_PIN_STATE_LOW
+            notification.generic_info.timestamp = int(time.time())
+            self.notify("digital_input", notification)
+
+    # This function returns the serialized feedback of the latest frame, built at most once per frame
+    def feedback_bytes(self):
+        with self._lock:
+            if self._feedback_frame != self.frame_id:
+                self._feedback_bytes = self._build_feedback().SerializeToString()
+                self._feedback_frame = self.frame_id
+            return self._feedback_bytes
+
+    def _build_feedback(self):
+        feedback = BaseCyclic_pb2.Feedback()
+        _set_fields(feedback, {"frame_id": self.frame_id & 0xFFFFFFFF})
+
+        base_values = {"arm_state": self.arm_state}
+        for i, axis in enumerate(("x", "y", "z", "theta_x", "theta_y", "theta_z")):
+            base_values["tool_pose_" + axis] = self.pose[i]
+        for i, axis in enumerate(("linear_x", "linear_y", "linear_z", "angular_x", "angular_y", "angular_z")):
+            base_values["tool_twist_" + axis] = self.twist[i]
+        for i, axis in enumerate(("force_x", "force_y", "force_z", "torque_x", "torque_y", "torque_z")):
+            base_values["tool_external_wrench_" + axis] = self.wrench[i] + self._random.gauss(0.0, 0.05)
+        _set_fields(feedback.base, base_values)
+
+        if _has_field(feedback, "actuators"):
+            for i in range(JOINT_COUNT):
+                actuator = feedback.actuators.add()
+                _set_fields(actuator, {"position": self.joint_angles[i] % 360.0, "velocity": self.joint_velocities[i]})
+
+        # The wrist IMU and force channels carry a small vibration on top of the sensor noise
+        if _has_field(feedback, "wrist") and _has_field(feedback.wrist, "c61"):
+            c61 = feedback.wrist.c61
+            for index, field in enumerate(c61.DESCRIPTOR.fields):
+                if field.cpp_type == field.CPPTYPE_FLOAT or field.cpp_type == field.CPPTYPE_DOUBLE:
+                    vibration = 0.02 * math.sin(2.0 * math.pi * 30.0 * self.sim_time + index)
+                    setattr(c61, field.name, vibration + self._random.gauss(0.0, 0.005))
+
+        return feedback
+
+
+class SimulatedBaseClient:
+    def __init__(self, robot):
+        self._robot = robot
+        self._kinematic_model = None
+
+    def SelectOperatingMode(self, mode_selection):
+        self._robot.delay()
+        self._robot.operating_mode = mode_selection.operating_mode
+
+    def GetArmState(self):
+        self._robot.delay()
+        arm_state = Base_pb2.ArmStateInformation()
+        arm_state.active_state = self._robot.arm_state
+        return arm_state
+
+    def ActivateRobot(self):
+        self._robot.delay()
+        self._robot.arm_state = Base_pb2.ARMSTATE_SERVOING_READY
+
+    def DeactivateRobot(self):
+        self._robot.delay()
+        self._robot.stop_motion()
+        self._robot.arm_state = Base_pb2.ARMSTATE_IDLE
+
+    def GetMeasuredJointAngles(self):
+        self._robot.delay()
+        joint_angles = Base_pb2.JointAngles()
+        with self._robot._lock:
+            for i, value in enumerate(self._robot.joint_angles):
+                joint_angle = joint_angles.joint_angles.add()
+                joint_angle.joint_identifier = i
+                joint_angle.value = value % 360.0
+        return joint_angles
+
+    def _model(self):
+        if self._kinematic_model is None:
+            import kinematics
+
+            self._kinematic_model = kinematics.KinematicModel()
+        return self._kinematic_model
+
+    def ComputeForwardKinematics(self, input_joint_angles):
+        self._robot.delay()
+        x, y, z, theta_x, theta_y, theta_z = self._model().forward([joint_angle.value for joint_angle in input_joint_angles.joint_angles])[0]
+        return Base_pb2.Pose(x=x, y=y, z=z, theta_x=theta_x, theta_y=theta_y, theta_z=theta_z)
+
+    def ComputeInverseKinematics(self, input_ik_data):
+        self._robot.delay()
+        pose = input_ik_data.cartesian_pose
+        guess = [joint_angle.value for joint_angle in input_ik_data.guess.joint_angles] or list(self._robot.joint_angles)
+        result = self._model().inverse([pose.x, pose.y, pose.z, pose.theta_x, pose.theta_y, pose.theta_z], guess)
+        if not result.converged[0]:
+            raise SimulatedServerException(Errors_pb2.ERROR_DEVICE, Errors_pb2.METHOD_FAILED, "The inverse kinematics did not converge")
+        joint_angles = Base_pb2.JointAngles()
+        for i, value in enumerate(result.joint_angles[0]):
+            joint_angle = joint_angles.joint_angles.add()
+            joint_angle.joint_identifier = i
+            joint_angle.value = value
+        return joint_angles
+
+    def GetMeasuredCartesianPose(self):
+        self._robot.delay()
+        with self._robot._lock:
+            x, y, z, theta_x, theta_y, theta_z = self._robot.pose
+        return Base_pb2.Pose(x=x, y=y, z=z, theta_x=theta_x, theta_y=theta_y, theta_z=theta_z)
+
+    def SendJointSpeedsCommand(self, joint_speeds):
+        self._robot.delay(joint_speeds.ByteSize())
+        speeds = [0.0] * JOINT_COUNT
+        for joint_speed in joint_speeds.joint_speeds:
+            speeds[joint_speed.joint_identifier] = joint_speed.value
+        self._robot.start_joint_speeds(speeds, joint_speeds.duration)
+
+    def SendTwistCommand(self, twist_command):
+        self._robot.delay(twist_command.ByteSize())
+        twist = twist_command.twist
+        values = [twist.linear_x, twist.linear_y, twist.linear_z, twist.angular_x, twist.angular_y, twist.angular_z]
+        self._robot.start_twist(values, twist_command.duration)
+
+    def ExecuteAction(self, action):
+        if action.HasField("send_twist_command"):
+            self.SendTwistCommand(action.send_twist_command)
+        else:
+            self._robot.delay()
+
+    def Stop(self):
+        self._robot.delay()
+        self._robot.stop_motion()
+
+    def ValidateWaypointList(self, waypoint_list):
+        self._robot.delay()
+        time.sleep(self._robot.validation_time * len(waypoint_list.waypoints))
+        return Base_pb2.WaypointValidationReport()
+
+    def ExecuteWaypointTrajectory(self, waypoint_list):
+        self._robot.delay()
+        segments = []
+        for waypoint in waypoint_list.waypoints:
+            kind = waypoint.WhichOneof("type_of_waypoint")
+            if kind == "angular_waypoint":
+                segments.append(("angular", list(waypoint.angular_waypoint.angles), (DEFAULT_JOINT_SPEED,)))
+                continue
+            if kind == "cartesian_waypoint":
+                point = waypoint.cartesian_waypoint
+                speeds = (point.maximum_linear_velocity or DEFAULT_LINEAR_SPEED, point.maximum_angular_velocity or DEFAULT_ANGULAR_SPEED)
+            else:
+                point = getattr(waypoint, kind)
+                speeds = (point.linear_speed or DEFAULT_LINEAR_SPEED, DEFAULT_ANGULAR_SPEED)
+            pose = point.pose
+            segments.append(("cartesian", [pose.x, pose.y, pose.z, pose.theta_x, pose.theta_y, pose.theta_z], speeds))
+        self._robot.start_trajectory(segments)
+
+    def OnNotificationActionTopic(self, callback, notification_options):
+        self._robot.delay()
+        return self._robot.subscribe("action", callback)
+
+    def Unsubscribe(self, notification_handle):
+        self._robot.delay()
+        self._robot.unsubscribe(notification_handle)
+
+
+class SimulatedBaseCyclicClient:
+    def __init__(self, robot):
+        self._robot = robot
+
+    def RefreshFeedback(self):
+        data = self._robot.feedback_bytes()
+        self._robot.delay(0, len(data))
+        feedback = BaseCyclic_pb2.Feedback()
+        feedback.ParseFromString(data)
+        return feedback
+
+
+class SimulatedProgramRunnerClient:
+    def __init__(self, robot):
+        self._robot = robot
+
+    def ReadAllPrograms(self):
+        self._robot.delay()
+        program_list = ProgramConfig_pb2.ProgramList()
+        for name, identifier in self._robot.programs.items():
+            program = program_list.programs.add()
+            program.name = name
+            program.handle.identifier = identifier
+        return program_list
+
+    def ValidateProgram(self, validation_configuration):
+        self._robot.delay()
+
+    def Start(self, start_configuration):
+        self._robot.delay()
+        identifier = start_configuration.handle.program_handle.identifier
+        if identifier not in self._robot.programs.values():
+            raise SimulatedServerException(Errors_pb2.ERROR_DEVICE, Errors_pb2.INVALID_PARAM, "Unknown program handle {}".format(identifier))
+        threading.Thread(target=self._execute, args=(identifier,), daemon=True).start()
+
+    def _execute(self, identifier):
+        for event, delay in ((ProgramRunner_pb2.EXECUTION_EVENT_STARTED, 0.0), (ProgramRunner_pb2.EXECUTION_EVENT_COMPLETED, self._robot.program_duration)):
+            time.sleep(delay)
+            notification = ProgramRunner_pb2.ExecutionEventNotification()
+            notification.event = event
+            notification.handle.program_handle.identifier = identifier
+            self._robot.notify("execution_event", notification)
+
+    def OnNotificationExecutionEventTopic(self, callback, notification_options):
+        self._robot.delay()
+        return self._robot.subscribe("execution_event", callback)
+
+    def Unsubscribe(self, notification_handle):
+        self._robot.delay()
+        self._robot.unsubscribe(notification_handle)
+
+
+class SimulatedIndustrialIOClient:
+    def __init__(self, robot):
+        self._robot = robot
+
+    def _digital_info(self, info_class, states, channel):
+        info = info_class()
+        info.state = IndustrialIO_pb2.DIGITAL_PIN_STATE_HIGH if states[channel] else IndustrialIO_pb2.DIGITAL_PIN_STATE_LOW
+        return info
+
+    def GetDigitalInputInfo(self, identifier):
+        self._robot.delay()
+        return self._digital_info(IndustrialIO_pb2.DigitalInputInfo, self._robot.digital_inputs, identifier.identifier - 1)
+
+    def GetDigitalOutputInfo(self, identifier):
+        self._robot.delay()
+        return self._digital_info(IndustrialIO_pb2.DigitalOutputInfo, self._robot.digital_outputs, identifier.identifier - 1)
+
+    def GetAllDigitalInputInfo(self):
+        self._robot.delay()
+        info_list = IndustrialIO_pb2.DigitalInputInfoList()
+        for channel in range(DIGITAL_CHANNEL_COUNT):
+            info_list.infos.add().CopyFrom(self._digital_info(IndustrialIO_pb2.DigitalInputInfo, self._robot.digital_inputs, channel))
+        return info_list
+
+    def GetAllDigitalOutputInfo(self):
+        self._robot.delay()
+        info_list = IndustrialIO_pb2.DigitalOutputInfoList()
+        for channel in range(DIGITAL_CHANNEL_COUNT):
+            info_list.infos.add().CopyFrom(self._digital_info(IndustrialIO_pb2.DigitalOutputInfo, self._robot.digital_outputs, channel))
+        return info_list
+
+    def SetDigitalOutputHighState(self, identifier):
+        self._robot.delay()
+        self._robot.set_digital_output(identifier.identifier - 1, True)
+
+    def SetDigitalOutputLowState(self, identifier):
+        self._robot.delay()
+        self._robot.set_digital_output(identifier.identifier - 1, False)
+
+    def GetAnalogIOInfo(self, identifier):
+        self._robot.delay()
+        channel = identifier.identifier - 1
+        info = IndustrialIO_pb2.AnalogIOInfo()
+        info.adc_value = self._robot.analog_inputs[channel]
+        info.dac_value = self._robot.analog_outputs[channel]
+        return info
+
+    def SetAnalogValue(self, analog_output):
+        self._robot.delay()
+        self._robot.analog_outputs[analog_output.channel.identifier - 1] = analog_output.dac_value
+
+    def OnNotificationDigitalInputChangeTopic(self, callback, notification_options):
+        self._robot.delay()
+        return self._robot.subscribe("digital_input", callback)
+
+    def Unsubscribe(self, notification_handle):
+        self._robot.delay()
+        self._robot.unsubscribe(notification_handle)
+
+
+class SimulatedProtectionZoneClient:
+    def __init__(self, robot):
+        self._robot = robot
+
+    def ReadAllProtectionZones(self):
+        self._robot.delay()
+        zone_list = ProtectionZone_pb2.ProtectionZoneList()
+        for zone in self._robot.protection_zones.values():
+            zone_list.protection_zones.add().CopyFrom(zone)
+        return zone_list
+
+    def CreateProtectionZone(self, zone_config):
+        self._robot.delay()
+        zone = ProtectionZone_pb2.ProtectionZone()
+        zone.handle.identifier = next(self._robot._handles)
+        zone.name = zone_config.name
+        zone.is_enabled = zone_config.is_enabled
+        zone.shape.CopyFrom(zone_config.shape)
+        self._robot.protection_zones[zone.handle.identifier] = zone
+        return zone.handle
+
+    def DeleteProtectionZone(self, zone_handle):
+        self._robot.delay()
+        self._robot.protection_zones.pop(zone_handle.identifier, None)
+
+
+class SimulatedVariableManagerClient:
+    def __init__(self, robot):
+        self._robot = robot
+
+    def SetVariable(self, variable):
+        self._robot.delay()
+        key = (variable.handle.namespace_handle.identifier, variable.handle.identifier)
+        self._robot.variables[key] = VariableManager_pb2.Variable()
+        self._robot.variables[key].CopyFrom(variable)
+
+    def GetVariable(self, variable_handle):
+        self._robot.delay()
+        key = (variable_handle.namespace_handle.identifier, variable_handle.identifier)
+        if key not in self._robot.variables:
+            raise SimulatedServerException(Errors_pb2.ERROR_DEVICE, Errors_pb2.INVALID_PARAM, "Unknown variable {}.{}".format(*key))
+        # A copy, as an RPC answer: the caller must not change the simulated variable
+        variable = VariableManager_pb2.Variable()
+        variable.CopyFrom(self._robot.variables[key])
+        return variable
+
+    def GetAllVariables(self, namespace_handle):
+        self._robot.delay()
+        variable_list = VariableManager_pb2.VariableList()
+        for (namespace, _), variable in self._robot.variables.items():
+            if namespace == namespace_handle.identifier:
+                variable_list.variables.add().CopyFrom(variable)
+        return variable_list
+
+    def DeleteVariable(self, variable_handle):
+        self._robot.delay()
+        self._robot.variables.pop((variable_handle.namespace_handle.identifier, variable_handle.identifier), None)
+
+
+# This function creates a service client on a router: a simulated service when the router is a SimulatedRobot,
+# the kortex_api client otherwise. Use it in place of e.g. BaseClient(router) to run code offline.
+def create_client(client_class, router):
+    if isinstance(router, SimulatedRobot):
+        return router.create_client(client_class.__name__)
+    return client_class(router)
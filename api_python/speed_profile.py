@@ -0,0 +1,103 @@
+#! /usr/bin/env python3
+
+###
+# KINOVA (R) KORTEX (TM)
+#
+# Copyright (c) 2024 Kinova inc. All rights reserved.
+#
+# This software may be modified and distributed
+# under the terms of the BSD 3-Clause license.
+#
+# Refer to the LICENSE file for details.
+#
+###
+
+# Jerk- and acceleration-limited joint speed profiles.
+#
+# A profile is described by segments: target speeds for every joint, held for a given time once reached. Each joint
+# goes from one target speed to the next with an S-curve: the acceleration ramps up at the maximum jerk, stays at the
+# maximum acceleration if the speed change is large enough, then ramps down. For a speed change dv:
+#
+#   dv >= a^2 / j:  ramp time a / j, constant acceleration for dv / a - a / j, total time dv / a + a / j
+#   dv <  a^2 / j:  ramp time sqrt(dv / j), the acceleration peaks at sqrt(dv * j), total time 2 * sqrt(dv / j)
+#
+# The speeds of all the samples and joints of a segment are computed at once with NumPy. The transition of a segment
+# lasts as long as the slowest joint needs, the other joints reach their target earlier.
+
+import numpy as np
+
+
+# This function returns the time needed by speed changes 'delta' under the acceleration and jerk limits,
+# and the duration of the jerk ramps
+def transition_time(delta, max_acceleration, max_jerk):
+    delta = np.abs(np.asarray(delta, dtype=np.float64))
+    max_acceleration = np.broadcast_to(np.asarray(max_acceleration, dtype=np.float64), delta.shape)
+    max_jerk = np.broadcast_to(np.asarray(max_jerk, dtype=np.float64), delta.shape)
+
+    saturated = delta * max_jerk >= max_acceleration * max_acceleration
+    ramp = np.where(saturated, max_acceleration / max_jerk, np.sqrt(delta / max_jerk))
+    constant = np.where(saturated, delta / max_acceleration - ramp, 0.0)
+    return 2.0 * ramp + constant, ramp
+
+
+# This function returns the speeds at times 't' (shape (samples, 1)) after the start of transitions from 'start'
+# to 'end' speeds (shape (joints,))
+def _transition(t, start, end, max_acceleration, max_jerk):
+    delta = end - start
+    distance = np.abs(delta)
+    duration, ramp = transition_time(delta, max_acceleration, max_jerk)
+    peak = max_jerk * ramp
+
+    progress = np.where(
+        t < ramp,
+        0.5 * max_jerk * t * t,
+        np.where(
+            t < duration - ramp,
+            0.5 * max_jerk * ramp * ramp + peak * (t - ramp),
+            distance - 0.5 * max_jerk * np.square(np.maximum(duration - t, 0.0)),
+        ),
+    )
+    return start + np.sign(delta) * np.minimum(progress, distance)
+
+
+# This function returns the joint speeds sampled at 'rate' (in Hz) of a profile going through 'segments', a list of
+# (speeds, hold) pairs: the speeds of every joint, reached as fast as the limits allow then held for 'hold' seconds.
+# The profile starts from 'initial' speeds (0 by default). The limits are scalars or one value per joint.
+# The last sample of each segment is exactly its target speeds. The result is a (samples, joints) array.
+def jerk_limited_profile(segments, rate, max_acceleration, max_jerk, initial=None):
+
+    if not segments:
+        raise ValueError("At least one segment is needed")
+    joints = len(segments[0][0])
+    max_acceleration = np.broadcast_to(np.asarray(max_acceleration, dtype=np.float64), (joints,))
+    max_jerk = np.broadcast_to(np.asarray(max_jerk, dtype=np.float64), (joints,))
+    if np.any(max_acceleration <= 0) or np.any(max_jerk <= 0):
+        raise ValueError("The acceleration and jerk limits must be greater than 0")
+
+    current = np.zeros(joints) if initial is None else np.asarray(initial, dtype=np.float64)
+    blocks = []
+    # Time of the next sample, relative to the start of the current segment
+    offset = 0.0
+    period = 1.0 / rate
+
+    for speeds, hold in segments:
+        target = np.asarray(speeds, dtype=np.float64)
+        if target.shape != (joints,):
+            raise ValueError("Every segment must give a speed for each of the {} joints".format(joints))
+
+        transition = float(np.max(transition_time(target - current, max_acceleration, max_jerk)[0]))
+        duration = transition + hold
+        t = np.arange(offset, duration, period)[:, np.newaxis]
+        block = _transition(t, current, target, max_acceleration, max_jerk)
+        block[t[:, 0] >= transition] = target
+        last = t[-1, 0] if len(t) else offset - period
+        # The transition may end between two samples: the segment then ends with one more sample, at the target
+        if not len(block) or np.any(block[-1] != target):
+            block = np.vstack((block, target))
+            last += period
+        blocks.append(block)
+
+        offset = last + period - duration
+        current = target
+
+    return np.concatenate(blocks)
@@ -0,0 +1,304 @@
+#! /usr/bin/env python3
+
+###
+# KINOVA (R) KORTEX (TM)
+#
+# Copyright (c) 2024 Kinova inc. All rights reserved.
+#
+# This software may be modified and distributed
+# under the terms of the BSD 3-Clause license.
+#
+# Refer to the LICENSE file for details.
+#
+###
+
+# Incremental streaming statistics over feedback channels (e.g. the wrist.c61 IMU and force signals).
+#
+# Every statistic is updated with blocks of samples, given as (samples, channels) arrays, so the work is vectorized
+# per block and the cost per sample is constant whatever the length of the stream:
+#   RollingStatistics: mean, variance, min and max over the last 'window' samples
+#   ExponentialAverage: exponentially weighted mean and variance
+#   SpectrumAnalyzer: amplitude spectrum of the last 'size' samples, recomputed every 'hop' samples
+# StreamingStatistics runs all of them on named columns of structured arrays, as produced by a MessageExtractor,
+# a FeedbackRecorder or a feedback_fanout.FeedbackSubscriber.
+
+import numpy as np
+
+# Number of windows after which the running sums are recomputed, to discard floating point drift
+_RECOMPUTE_WINDOWS = 16
+
+
+# This function returns a block as a 2D float64 array of 'channels' columns
+def _as_block(block, channels):
+    return np.asarray(block, dtype=np.float64).reshape(-1, channels)
+
+
+class RollingStatistics:
+    """
+    Mean, variance, min and max of each channel over the last 'window' samples. update() is O(1) per sample and
+    the statistics are O(1) per channel.
+    """
+
+    def __init__(self, channels, window):
+
+        self.channels = channels
+        self.window = window
+        self.count = 0
+
+        # Values are stored relative to the first sample, which keeps the running sums accurate
+        self._offset = None
+        self._ring = np.zeros((window, channels))
+        self._index = 0
+        self._sum = np.zeros(channels)
+        self._sum_squared = np.zeros(channels)
+        self._since_recompute = 0
+
+        # The window is the samples of the current lap of the ring, before _index, and the end of the previous lap,
+        # from _index. Its min is the min of the running min of the current lap and of the suffix min of the previous
+        # lap at _index, computed once per lap (van Herk / Gil-Werman): O(1) per sample for any window.
+        self._lap_min = np.full(channels, np.inf)
+        self._lap_max = np.full(channels, -np.inf)
+        self._suffix_min = np.full((window, channels), np.inf)
+        self._suffix_max = np.full((window, channels), -np.inf)
+
+    def update(self, block):
+        block = _as_block(block, self.channels)
+        if not len(block):
+            return
+        if self._offset is None:
+            self._offset = block[0].copy()
+        block = block - self._offset
+
+        if len(block) >= self.window:
+            self._ring[:] = block[-self.window :]
+            self._index = 0
+            self._recompute()
+            self._end_lap()
+        else:
+            # Samples before and after the end of the lap, if the block reaches it
+            lap = min(len(block), self.window - self._index)
+            self._extend_lap(block[:lap])
+            # Slots that were never written hold zeros, so removing them from the sums has no effect
+            positions = (self._index + np.arange(len(block))) % self.window
+            old = self._ring[positions]
+            self._sum += block.sum(axis=0) - old.sum(axis=0)
+            self._sum_squared += (block * block).sum(axis=0) - (old * old).sum(axis=0)
+            self._ring[positions] = block
+            self._index = (self._index + len(block)) % self.window
+            # The suffixes of the previous lap are only read from _index on, where the ring still holds that lap
+            if lap < len(block) or not self._index:
+                self._end_lap()
+                self._extend_lap(block[lap:])
+            self._since_recompute += len(block)
+            if self._since_recompute >= _RECOMPUTE_WINDOWS * self.window:
+                self._recompute()
+
+        self.count += len(block)
+
+    def _recompute(self):
+        self._sum = self._ring.sum(axis=0)
+        self._sum_squared = (self._ring * self._ring).sum(axis=0)
+        self._since_recompute = 0
+
+    def _extend_lap(self, block):
+        if len(block):
+            self._lap_min = np.minimum(self._lap_min, block.min(axis=0))
+            self._lap_max = np.maximum(self._lap_max, block.max(axis=0))
+
+    def _end_lap(self):
+        self._suffix_min = np.minimum.accumulate(self._ring[::-1], axis=0)[::-1]
+        self._suffix_max = np.maximum.accumulate(self._ring[::-1], axis=0)[::-1]
+        self._lap_min = np.full(self.channels, np.inf)
+        self._lap_max = np.full(self.channels, -np.inf)
+
+    def mean(self):
+        n = min(self.count, self.window)
+        if not n:
+            return np.full(self.channels, np.nan)
+        return self._offset + self._sum / n
+
+    def variance(self):
+        n = min(self.count, self.window)
+        if not n:
+            return np.full(self.channels, np.nan)
+        mean = self._sum / n
+        return np.maximum(self._sum_squared / n - mean * mean, 0.0)
+
+    def std(self):
+        return np.sqrt(self.variance())
+
+    def min(self):
+        if not self.count:
+            return np.full(self.channels, np.nan)
+        return self._offset + np.minimum(self._lap_min, self._suffix_min[self._index])
+
+    def max(self):
+        if not self.count:
+            return np.full(self.channels, np.nan)
+        return self._offset + np.maximum(self._lap_max, self._suffix_max[self._index])
+
+
+class ExponentialAverage:
+    """
+    Exponentially weighted mean and variance of each channel. The smoothing is given either as 'alpha', the weight
+    of a new sample, or as 'halflife', the number of samples after which a sample weighs half as much.
+    """
+
+    def __init__(self, channels, alpha=None, halflife=None):
+
+        if (alpha is None) == (halflife is None):
+            raise ValueError("Either alpha or halflife must be given")
+        if alpha is None:
+            alpha = 1.0 - 0.5 ** (1.0 / halflife)
+
+        self.channels = channels
+        self.alpha = alpha
+        self.count = 0
+        self._mean = None
+        self._mean_squared = None
+        # Block length and weights of the samples of the last block: the blocks usually all have the same length
+        self._length = None
+        self._weights = None
+
+    def update(self, block):
+        block = _as_block(block, self.channels)
+        if not len(block):
+            return
+        if self._mean is None:
+            self._mean = block[0].copy()
+            self._mean_squared = block[0] * block[0]
+            self.count += 1
+            block = block[1:]
+            if not len(block):
+                return
+
+        # y_n = (1 - a)^n * y_0 + sum_i a * (1 - a)^(n - 1 - i) * x_i, computed for the whole block at once
+        length = len(block)
+        if length != self._length:
+            decay = 1.0 - self.alpha
+            self._length = length
+            self._weights = (decay ** length, self.alpha * decay ** np.arange(length - 1, -1, -1))
+        remaining, weights = self._weights
+
+        self._mean = remaining * self._mean + weights @ block
+        self._mean_squared = remaining * self._mean_squared + weights @ (block * block)
+        self.count += length
+
+    def mean(self):
+        if self._mean is None:
+            return np.full(self.channels, np.nan)
+        return self._mean.copy()
+
+    def variance(self):
+        if self._mean is None:
+            return np.full(self.channels, np.nan)
+        return np.maximum(self._mean_squared - self._mean * self._mean, 0.0)
+
+    def std(self):
+        return np.sqrt(self.variance())
+
+
+class SpectrumAnalyzer:
+    """
+    Amplitude spectrum of each channel over the last 'size' samples taken at 'rate' Hz, recomputed every 'hop'
+    samples (size // 2 by default) with a Hann window and the mean removed. With 'averaging' between 0 and 1,
+    successive spectra are exponentially averaged (Welch-like) instead of replaced.
+    """
+
+    def __init__(self, channels, size, rate, hop=None, averaging=0.0):
+
+        self.channels = channels
+        self.size = size
+        self.rate = rate
+        self.hop = hop if hop is not None else size // 2
+        self.averaging = averaging
+        self.count = 0
+
+        self.frequencies = np.fft.rfftfreq(size, 1.0 / rate)
+        self.spectrum = None
+
+        self._window = np.hanning(size)[:, np.newaxis]
+        # Scale so that a sine of amplitude A shows a peak of amplitude A
+        self._scale = 2.0 / self._window.sum()
+        self._ring = np.zeros((size, channels))
+        self._index = 0
+        self._since_spectrum = 0
+
+    def update(self, block):
+        block = _as_block(block, self.channels)
+        if len(block) >= self.size:
+            self._ring[:] = block[-self.size :]
+            self._index = 0
+        elif len(block):
+            positions = (self._index + np.arange(len(block))) % self.size
+            self._ring[positions] = block
+            self._index = (self._index + len(block)) % self.size
+
+        self.count += len(block)
+        self._since_spectrum += len(block)
+        if self.count >= self.size and self._since_spectrum >= self.hop:
+            self._compute()
+
+    def _compute(self):
+        samples = np.concatenate((self._ring[self._index :], self._ring[: self._index]))
+        samples = (samples - samples.mean(axis=0)) * self._window
+        spectrum = np.abs(np.fft.rfft(samples, axis=0)) * self._scale
+
+        if self.spectrum is None or not self.averaging:
+            self.spectrum = spectrum
+        else:
+            self.spectrum = self.averaging * self.spectrum + (1.0 - self.averaging) * spectrum
+        self._since_spectrum = 0
+
+    # This function returns the frequency and amplitude of the highest peak of each channel, DC excluded
+    def peak(self):
+        if self.spectrum is None:
+            return np.full(self.channels, np.nan), np.full(self.channels, np.nan)
+        index = np.argmax(self.spectrum[1:], axis=0) + 1
+        return self.frequencies[index], self.spectrum[index, np.arange(self.channels)]
+
+
+class StreamingStatistics:
+    """
+    Rolling, exponentially weighted and spectral statistics of the named 'columns' of structured arrays of samples
+    taken at 'rate' Hz. 'window' and 'halflife' are in samples, 'spectrum_size' is the number of samples per spectrum.
+    """
+
+    def __init__(self, columns, rate=1000, window=1000, halflife=100, spectrum_size=1024, spectrum_hop=None, spectrum_averaging=0.5):
+
+        self.columns = list(columns)
+        channels = len(self.columns)
+        self.rolling = RollingStatistics(channels, window)
+        self.ewma = ExponentialAverage(channels, halflife=halflife)
+        self.spectrum = SpectrumAnalyzer(channels, spectrum_size, rate, spectrum_hop, spectrum_averaging)
+
+    # This function adds a block of samples, a structured array holding the columns or a (samples, columns) array
+    def update(self, samples):
+        if samples.dtype.names is not None:
+            block = np.empty((len(samples), len(self.columns)))
+            for i, column in enumerate(self.columns):
+                block[:, i] = samples[column]
+        else:
+            block = samples
+        self.rolling.update(block)
+        self.ewma.update(block)
+        self.spectrum.update(block)
+
+    def summary(self):
+        # Pandas is only needed when the data is exported
+        import pandas as pd
+
+        peak_frequency, peak_amplitude = self.spectrum.peak()
+        return pd.DataFrame(
+            {
+                "mean": self.rolling.mean(),
+                "std": self.rolling.std(),
+                "min": self.rolling.min(),
+                "max": self.rolling.max(),
+                "ewma": self.ewma.mean(),
+                "ewm_std": self.ewma.std(),
+                "peak_frequency": peak_frequency,
+                "peak_amplitude": peak_amplitude,
+            },
+            index=self.columns,
+        )
@@ -0,0 +1,41 @@
+#! /usr/bin/env python3
+
+###
+# KINOVA (R) KORTEX (TM)
+#
+# Copyright (c) 2024 Kinova inc. All rights reserved.
+#
+# This software may be modified and distributed
+# under the terms of the BSD 3-Clause license.
+#
+# Refer to the LICENSE file for details.
+#
+###
+
+import os
+import sys
+
+import pytest
+
+pytest.importorskip("kortex_api")
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+import command_batch
+from kortex_api.autogen.messages import Base_pb2
+
+
+def test_varint_encodes_non_negative_values():
+    assert command_batch._varint(0) == b"\x00"
+    assert command_batch._varint(1) == b"\x01"
+    assert command_batch._varint(300) == b"\xac\x02"
+
+
+def test_varint_encodes_negative_values_as_64_bit_twos_complement():
+    assert command_batch._varint(-1) == b"\xff" * 9 + b"\x01"
+    assert command_batch._varint(-(1 << 63)) == b"\x80" * 9 + b"\x01"
+
+
+def test_negative_varint_field_parses_back():
+    field = Base_pb2.TwistCommand.DESCRIPTOR.fields_by_name["reference_frame"]
+    command = Base_pb2.TwistCommand.FromString(command_batch._encode_varint_field(field, -2))
+    assert command.reference_frame == -2
@@ -0,0 +1,57 @@
+#! /usr/bin/env python3
+
+###
+# KINOVA (R) KORTEX (TM)
+#
+# Copyright (c) 2024 Kinova inc. All rights reserved.
+#
+# This software may be modified and distributed
+# under the terms of the BSD 3-Clause license.
+#
+# Refer to the LICENSE file for details.
+#
+###
+
+import os
+import subprocess
+import sys
+import uuid
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+import feedback_fanout
+
+
+# Extractor reading a single float field, as a message_extractor.MessageExtractor would
+class ValueExtractor:
+    dtype = np.dtype([("value", np.float64)])
+
+    def __call__(self, message):
+        return (message,)
+
+
+# Attaches a subscriber in a separate interpreter, which has its own resource tracker, and exits
+SUBSCRIBER = """
+import sys
+sys.path.insert(0, {path!r})
+import feedback_fanout
+with feedback_fanout.FeedbackSubscriber({name!r}) as subscriber:
+    print(len(subscriber.poll()))
+"""
+
+
+def test_ring_survives_subscriber_process_exit():
+    name = "kfb_test_{}".format(uuid.uuid4().hex[:8])
+    with feedback_fanout.FeedbackPublisher(ValueExtractor(), name=name, capacity=8) as publisher:
+        publisher.append(1.0)
+
+        # The resource tracker of the subscriber process must leave the ring in place when the process exits
+        source = SUBSCRIBER.format(path=os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."), name=name)
+        result = subprocess.run([sys.executable, "-c", source], capture_output=True, text=True, timeout=60)
+        assert result.returncode == 0, result.stderr
+        assert result.stdout.strip() == "0"
+
+        with feedback_fanout.FeedbackSubscriber(name) as subscriber:
+            publisher.append(2.0)
+            assert subscriber.poll()["value"].tolist() == [2.0]
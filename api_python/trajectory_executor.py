@@ -0,0 +1,299 @@
+#! /usr/bin/env python3
+
+###
+# KINOVA (R) KORTEX (TM)
+#
+# Copyright (c) 2024 Kinova inc. All rights reserved.
+#
+# This software may be modified and distributed
+# under the terms of the BSD 3-Clause license.
+#
+# Refer to the LICENSE file for details.
+#
+###
+
+# Chunked, pipelined execution of long waypoint trajectories.
+#
+# ExecuteWaypointTrajectory() takes the whole list: for tens of thousands of waypoints, building, uploading and
+# validating it delays the first motion, and the list may exceed what the controller accepts. ChunkedTrajectoryExecutor
+# cuts the trajectory into chunks of about 'chunk_size' waypoints and pipelines them:
+#
+#   chunk 0:  build, validate, execute ............ ACTION_END
+#   chunk 1:             build, validate (while chunk 0 runs)  execute ............ ACTION_END
+#   chunk 2:                                                              build, validate (while chunk 1 runs)  ...
+#
+# Only the first chunk is validated before the arm moves, and only two chunks exist as messages at any time. The next
+# chunk is executed as soon as the action notification of the current one reports ACTION_END.
+#
+# The controller cannot blend across two trajectories: the arm stops at the last waypoint of every chunk, where the
+# blending radius is set to 0, and the next chunk starts from rest. To change the planned path as little as possible,
+# chunks are cut at waypoints that already have no blending when there is one within 'search' waypoints of the nominal
+# boundary, otherwise at the waypoint with the smallest blending. Every chunk after the first starts again from the
+# last waypoint of the previous one, where the arm stops: the list validated by the controller holds the first motion
+# of the chunk, and the blending of its next waypoints is computed with the same neighbours as in the full trajectory.
+# Toolpath chunks are only cut before straight segments, and their repeated first waypoint is sent as a straight
+# segment, since a toolpath must start with one.
+#
+# A chunk rejected by the controller stops the execution at the end of the previous chunk. Checking the whole
+# trajectory first with a trajectory_validator.TrajectoryValidator ('validator') avoids stopping halfway through
+# on the errors it detects.
+
+import queue
+import threading
+import time
+
+import numpy as np
+from kortex_api.autogen.messages import Base_pb2, Common_pb2
+
+import command_batch
+
+DEFAULT_CHUNK_SIZE = 1000  # waypoints
+DEFAULT_SEARCH = 100  # waypoints before the nominal boundary where a chunk may end
+DEFAULT_TIMEOUT = 600.0  # seconds, maximum duration of a chunk
+
+
+# This function returns the index of the first waypoint sent for a chunk starting at 'start': the chunks after the
+# first one repeat the last waypoint of the previous chunk, where the arm stopped
+def _first_waypoint(start):
+    return max(start - 1, 0)
+
+
+# This function returns the (start, stop) ranges of the chunks of a trajectory of 'count' waypoints. A chunk may only
+# end at a waypoint i where allowed[i] is True, and ends at the allowed waypoint of lowest 'cost' (e.g. the blending
+# radius) among the 'search' waypoints before its nominal end, the latest one on a tie. A chunk is longer than
+# 'chunk_size' only when no waypoint before its nominal end is allowed.
+def chunk_ranges(count, chunk_size, search=DEFAULT_SEARCH, allowed=None, cost=None):
+
+    if chunk_size < 2:
+        raise ValueError("The chunks must hold at least 2 waypoints")
+    allowed = np.ones(count, dtype=bool) if allowed is None else np.asarray(allowed, dtype=bool)
+    cost = np.zeros(count) if cost is None else np.asarray(cost, dtype=np.float64)
+
+    ranges = []
+    start = 0
+    while count - start > chunk_size:
+        last = start + chunk_size - 1
+        candidates = np.arange(max(start + 1, last - search), last + 1)
+        candidates = candidates[allowed[candidates]]
+        if not len(candidates):
+            # No allowed waypoint in the search window: the chunk ends at the last allowed waypoint before it, or
+            # else at the first one after it
+            before = np.flatnonzero(allowed[start + 1 : last + 1]) + start + 1
+            after = np.flatnonzero(allowed[last + 1 : count - 1]) + last + 1
+            if len(before):
+                candidates = before[-1:]
+            elif len(after):
+                candidates = after[:1]
+            else:
+                break
+        # Lowest cost, then latest waypoint
+        end = int(candidates[np.lexsort((-candidates, cost[candidates]))[0]])
+        ranges.append((start, end + 1))
+        start = end + 1
+    if start < count:
+        ranges.append((start, count))
+    return ranges
+
+
+class ChunkReport:
+    """
+    Timings of one chunk, in seconds from the start of the execution: 'built' when its list was ready, 'validated'
+    when its validation ended, 'started' when it was sent for execution and 'ended' when its ACTION_END arrived.
+    """
+
+    def __init__(self, index, start, stop):
+        self.index = index
+        self.start = start
+        self.stop = stop
+        self.built = None
+        self.validated = None
+        self.started = None
+        self.ended = None
+
+
+class ExecutionReport:
+    """
+    Result of a chunked execution. 'completed' is True when every chunk ended, otherwise 'error' tells why the
+    execution stopped and 'validation_report' holds the report of a chunk rejected by the controller.
+    """
+
+    def __init__(self, chunks):
+        self.chunks = chunks
+        self.completed = False
+        self.error = None
+        self.validation_report = None
+
+    # Time from the call to the first motion
+    @property
+    def time_to_first_motion(self):
+        return self.chunks[0].started if self.chunks and self.chunks[0].started is not None else None
+
+    # Times between the end of a chunk and the start of the next one
+    @property
+    def handoffs(self):
+        return np.array([after.started - before.ended for before, after in zip(self.chunks, self.chunks[1:]) if after.started is not None and before.ended is not None])
+
+    def __str__(self):
+        executed = sum(1 for chunk in self.chunks if chunk.ended is not None)
+        lines = ["Chunks executed: {} / {}{}".format(executed, len(self.chunks), "" if self.completed else ", stopped: {}".format(self.error))]
+        if self.time_to_first_motion is not None:
+            lines.append("Time to first motion: {:.3f} s".format(self.time_to_first_motion))
+        handoffs = self.handoffs
+        if len(handoffs):
+            lines.append("Hand-off between chunks mean: {:.1f} ms, max: {:.1f} ms".format(handoffs.mean() * 1e3, handoffs.max() * 1e3))
+        return "\n".join(lines)
+
+
+class ChunkedTrajectoryExecutor:
+    """
+    Executes long waypoint trajectories on 'base' in chunks of about 'chunk_size' waypoints, validating the next chunk
+    while the current one runs. 'validator' (a trajectory_validator.TrajectoryValidator) checks the whole trajectory
+    locally before the first motion, 'validation_cache' (a validation_cache.ValidationCache) is used for the
+    validation of the chunks when given.
+    """
+
+    def __init__(self, base, chunk_size=DEFAULT_CHUNK_SIZE, search=DEFAULT_SEARCH, validator=None, validation_cache=None, use_optimal_blending=True, timeout=DEFAULT_TIMEOUT):
+        self.base = base
+        self.chunk_size = chunk_size
+        self.search = search
+        self.validator = validator
+        self.validation_cache = validation_cache
+        self.use_optimal_blending = use_optimal_blending
+        self.timeout = timeout
+
+    # This function executes an (N, 7) array of Cartesian waypoints (command_batch.CARTESIAN_WAYPOINT_FIELDS order)
+    def execute_cartesian(self, poses, reference_frame=Base_pb2.CARTESIAN_REFERENCE_FRAME_BASE):
+        poses = np.asarray(poses, dtype=np.float64)
+        radius = command_batch.CARTESIAN_WAYPOINT_FIELDS.index("blending_radius")
+
+        def build(start, stop):
+            first = _first_waypoint(start)
+            chunk = poses[first:stop].copy()
+            chunk[-1, radius] = 0.0
+            return command_batch.cartesian_waypoint_list(chunk, reference_frame, use_optimal_blending=self.use_optimal_blending, first_index=first)
+
+        check = (lambda: self.validator.check_cartesian(poses)) if self.validator is not None else None
+        return self._execute(len(poses), build, check, cost=poses[:, radius])
+
+    # This function executes an (N, joints) array of joint angles (in degrees) with their blending, a scalar or one
+    # value per waypoint
+    def execute_angular(self, angles, blending=1.0):
+        angles = np.asarray(angles, dtype=np.float64)
+        blending = np.array(np.broadcast_to(np.asarray(blending, dtype=np.float64), (len(angles),)))
+
+        def build(start, stop):
+            first = _first_waypoint(start)
+            chunk_blending = blending[first:stop].copy()
+            chunk_blending[-1] = 0.0
+            return command_batch.angular_waypoint_list(angles[first:stop], chunk_blending, use_optimal_blending=self.use_optimal_blending, first_index=first)
+
+        check = (lambda: self.validator.check_angular(angles, blending)) if self.validator is not None else None
+        return self._execute(len(angles), build, check, cost=blending)
+
+    # This function executes an (N, 13) array of toolpath waypoints (command_batch.TOOLPATH_FIELDS order) with the
+    # type code of each row, command_batch.TOOLPATH_SEGMENT or TOOLPATH_ARC
+    def execute_toolpath(self, points, kinds):
+        points = np.asarray(points, dtype=np.float64)
+        kinds = np.asarray(kinds)
+        radius = command_batch.TOOLPATH_FIELDS.index("blending_radius")
+
+        def build(start, stop):
+            first = _first_waypoint(start)
+            chunk = points[first:stop].copy()
+            chunk[-1, radius] = 0.0
+            chunk_kinds = kinds[first:stop].copy()
+            chunk_kinds[0] = command_batch.TOOLPATH_SEGMENT
+            return command_batch.toolpath_waypoint_list(chunk, chunk_kinds, use_optimal_blending=self.use_optimal_blending, first_index=first)
+
+        # A chunk may only end before a straight segment, or at the end of the toolpath
+        allowed = np.append(kinds[1:] == command_batch.TOOLPATH_SEGMENT, True)
+        check = (lambda: self.validator.check_toolpath(points, kinds)) if self.validator is not None else None
+        return self._execute(len(points), build, check, allowed=allowed, cost=points[:, radius])
+
+    # This function returns the validation report of a chunk
+    def _validate(self, waypoint_list):
+        if self.validation_cache is not None:
+            return self.validation_cache.validate(self.base, waypoint_list)
+        return self.base.ValidateWaypointList(waypoint_list)
+
+    # This function builds and validates chunks in order in a separate thread, and puts (list, report, error) in
+    # 'prepared', waiting for 'request' before each chunk so that at most one chunk is prepared ahead
+    def _prepare(self, chunks, build, start_time, request, prepared):
+        for chunk in chunks:
+            if not request.get():
+                return
+            try:
+                waypoint_list = build(chunk.start, chunk.stop)
+                chunk.built = time.perf_counter() - start_time
+                report = self._validate(waypoint_list)
+                chunk.validated = time.perf_counter() - start_time
+                prepared.put((waypoint_list, report, None))
+            except Exception as ex:
+                prepared.put((None, None, ex))
+                return
+
+    def _execute(self, count, build, check=None, allowed=None, cost=None):
+
+        start_time = time.perf_counter()
+        ranges = chunk_ranges(count, self.chunk_size, self.search, allowed, cost) if count else []
+        report = ExecutionReport([ChunkReport(index, start, stop) for index, (start, stop) in enumerate(ranges)])
+
+        if check is not None:
+            local_report = check()
+            if not local_report.valid:
+                report.error = "local validation failed:\n{}".format(local_report)
+                return report
+        if not ranges:
+            report.completed = True
+            return report
+
+        # Action notifications, for the end of the chunks
+        events = queue.Queue()
+        handle = self.base.OnNotificationActionTopic(lambda notification: events.put(notification.action_event), Common_pb2.NotificationOptions())
+
+        request = queue.Queue()
+        prepared = queue.Queue()
+        preparer = threading.Thread(target=self._prepare, args=(report.chunks, build, start_time, request, prepared), name="TrajectoryPreparer", daemon=True)
+        preparer.start()
+        request.put(True)
+
+        try:
+            for chunk in report.chunks:
+                waypoint_list, validation_report, error = prepared.get()
+                if error is not None:
+                    report.error = "chunk {}: {}".format(chunk.index, error)
+                    return report
+                if len(validation_report.trajectory_error_report.trajectory_error_elements):
+                    report.error = "chunk {} rejected by the controller".format(chunk.index)
+                    report.validation_report = validation_report
+                    return report
+
+                # Events left by the previous chunk are dropped before the next one starts
+                while not events.empty():
+                    events.get_nowait()
+                self.base.ExecuteWaypointTrajectory(waypoint_list)
+                chunk.started = time.perf_counter() - start_time
+                del waypoint_list
+
+                # The next chunk is prepared while this one runs
+                request.put(True)
+
+                deadline = time.perf_counter() + self.timeout
+                while True:
+                    try:
+                        event = events.get(timeout=max(deadline - time.perf_counter(), 0.0))
+                    except queue.Empty:
+                        report.error = "chunk {} did not end within {} s".format(chunk.index, self.timeout)
+                        return report
+                    if event == Base_pb2.ACTION_END:
+                        chunk.ended = time.perf_counter() - start_time
+                        break
+                    if event == Base_pb2.ACTION_ABORT:
+                        report.error = "chunk {} aborted".format(chunk.index)
+                        return report
+
+            report.completed = True
+            return report
+        finally:
+            request.put(False)
+            self.base.Unsubscribe(handle)
@@ -0,0 +1,396 @@
+#! /usr/bin/env python3
+
+###
+# KINOVA (R) KORTEX (TM)
+#
+# Copyright (c) 2024 Kinova inc. All rights reserved.
+#
+# This software may be modified and distributed
+# under the terms of the BSD 3-Clause license.
+#
+# Refer to the LICENSE file for details.
+#
+###
+
+# Client-side pre-validation of waypoint lists.
+#
+# base.ValidateWaypointList() costs a controller round trip per attempt. TrajectoryValidator catches the common errors
+# locally, for all the waypoints at once with NumPy, so that only lists passing these checks are sent to the robot:
+#
+#   - non-finite values
+#   - Cartesian positions and via points out of the reach of the arm
+#   - Cartesian poses out of the workspace of a workspace_index.WorkspaceIndex
+#   - angular waypoints out of the joint limits, or with a wrong number of angles
+#   - blending: negative radii, radii larger than half the distance to a neighbouring waypoint, angular blending
+#     outside [0, 1]
+#   - toolpaths: the first waypoint must be a straight segment, speeds and accelerations must be greater than 0 and
+#     the via point of an arc must not be aligned with its start and end points
+#   - waypoints inside an enabled protection zone, or paths crossing one (sampled every 'zone_resolution' meters on
+#     the straight lines between waypoints, through the via points of arcs)
+#   - lists mixing Cartesian, angular and toolpath waypoints
+#
+# The reach, the joint limits and the blending radii compared to the neighbouring waypoints are checked against
+# nominal values (REACH, JOINT_LIMITS) and a conservative rule, not against the configuration of the arm: their
+# errors are reported as advisory (ADVISORY_CHECKS) and do not make a list invalid. Pass the limits configured on the
+# arm and advisory=() to make them errors.
+#
+# Passing these checks does not guarantee that the controller accepts the list (singularities, self-collisions and
+# speed limits are only checked by the robot), but a list failing them is rejected without a round trip.
+# The arrays have the layouts of command_batch.py, so a planner can check its arrays before building the list:
+#
+#   validator = TrajectoryValidator.from_protection_zones(protection_zone_client.ReadAllProtectionZones())
+#   report = validator.check_cartesian(poses)
+#   if report.valid:
+#       result = base.ValidateWaypointList(command_batch.cartesian_waypoint_list(poses))
+
+import numpy as np
+
+from command_batch import CARTESIAN_WAYPOINT_FIELDS, SEGMENT_FIELDS, TOOLPATH_ARC, TOOLPATH_FIELDS, TOOLPATH_SEGMENT, WAYPOINT_LIST_TYPES, waypoint_list_arrays
+
+JOINT_COUNT = 6
+
+# Nominal reach of the arm from the origin of the base frame, in meters
+REACH = 1.0
+
+# Joint limits in degrees, (minimum, maximum) for each joint. Replace them by the limits configured on the arm.
+JOINT_LIMITS = ((-360.0, 360.0),) * JOINT_COUNT
+
+# Checks reported as advisory by default: they use the nominal values above, or a rule of thumb for the blending radii
+ADVISORY_CHECKS = frozenset(("reach", "joint_limits", "blending_distance"))
+
+DEFAULT_ZONE_RESOLUTION = 0.01  # meters
+
+# Protection zone shape types, as in ProtectionZone_pb2.ZoneShape
+SHAPE_TYPE_CYLINDER = 1
+SHAPE_TYPE_SPHERE = 2
+SHAPE_TYPE_RECTANGULAR_PRISM = 3
+
+# Columns of the positions in the Cartesian and toolpath arrays
+_POSITION = [CARTESIAN_WAYPOINT_FIELDS.index(name) for name in ("pose.x", "pose.y", "pose.z")]
+_POSE = _POSITION + [CARTESIAN_WAYPOINT_FIELDS.index(name) for name in ("pose.theta_x", "pose.theta_y", "pose.theta_z")]
+_BLENDING_RADIUS = CARTESIAN_WAYPOINT_FIELDS.index("blending_radius")
+_VIA_POINT = [TOOLPATH_FIELDS.index(name) for name in ("via_point_x", "via_point_y", "via_point_z")]
+_LINEAR_SPEED = TOOLPATH_FIELDS.index("linear_speed")
+_LINEAR_ACCELERATION = TOOLPATH_FIELDS.index("linear_acceleration")
+_ANGULAR_ACCELERATION = TOOLPATH_FIELDS.index("angular_acceleration")
+
+# Minimum distance of an arc via point to the chord of the arc, in meters
+_ARC_TOLERANCE = 1e-4
+
+
+class WaypointError:
+    """
+    Error found on a waypoint: 'index' of the waypoint in the list, 'check' that failed and a readable 'message'.
+    An 'advisory' error is a warning, the robot may still accept the waypoint.
+    """
+
+    def __init__(self, index, check, message, advisory=False):
+        self.index = index
+        self.check = check
+        self.message = message
+        self.advisory = advisory
+
+    def __repr__(self):
+        return "WaypointError({}, {!r}, {!r}, advisory={})".format(self.index, self.check, self.message, self.advisory)
+
+    def __str__(self):
+        return "waypoint {}: {} ({}{})".format(self.index, self.message, self.check, ", advisory" if self.advisory else "")
+
+
+class ValidationReport:
+    """
+    Result of a local validation, sorted by waypoint. 'valid' is True when no check failed, apart from advisory ones.
+    """
+
+    def __init__(self, errors):
+        self.errors = sorted(errors, key=lambda error: error.index)
+
+    @property
+    def valid(self):
+        return all(error.advisory for error in self.errors)
+
+    @property
+    def advisories(self):
+        return [error for error in self.errors if error.advisory]
+
+    def __bool__(self):
+        return self.valid
+
+    # This function returns the indices of the waypoints that failed a check, or any check
+    def indices(self, check=None):
+        return sorted({error.index for error in self.errors if check is None or error.check == check})
+
+    def __str__(self):
+        advisories = len(self.advisories)
+        if not self.errors:
+            return "Waypoint list valid"
+        if self.valid:
+            summary = "Waypoint list valid, {} advisory warning(s):\n".format(advisories)
+        else:
+            summary = "{} error(s) and {} advisory warning(s) in the waypoint list:\n".format(len(self.errors) - advisories, advisories)
+        return summary + "\n".join("  " + str(error) for error in self.errors)
+
+
+class TrajectoryValidator:
+    """
+    Local checks of waypoint lists. 'reach' (meters) is measured from 'base_origin', 'joint_limits' are (minimum,
+    maximum) pairs in degrees, one per joint. Protection zones are added with add_zone() or from_protection_zones().
+    'workspace' is an optional workspace_index.WorkspaceIndex of the arm, the poses within the reach are also checked
+    against it. The errors of the 'advisory' checks are only warnings, see ADVISORY_CHECKS.
+    """
+
+    def __init__(self, reach=REACH, joint_limits=JOINT_LIMITS, base_origin=(0.0, 0.0, 0.0), zone_resolution=DEFAULT_ZONE_RESOLUTION, workspace=None, advisory=ADVISORY_CHECKS):
+
+        if zone_resolution <= 0:
+            raise ValueError("The zone resolution must be greater than 0")
+
+        self.reach = reach
+        self.joint_limits = np.asarray(joint_limits, dtype=np.float64)
+        if self.joint_limits.ndim != 2 or self.joint_limits.shape[1] != 2:
+            raise ValueError("The joint limits must be (minimum, maximum) pairs")
+        self.base_origin = np.asarray(base_origin, dtype=np.float64)
+        self.zone_resolution = zone_resolution
+        self.workspace = workspace
+        self.advisory = frozenset(advisory)
+
+        # Protection zones: name, shape type, origin, rotation (zone to base frame) and dimensions
+        self.zones = []
+
+    # This function returns a validator checking the enabled zones of a ProtectionZoneList
+    # (e.g. ProtectionZoneClient.ReadAllProtectionZones())
+    @classmethod
+    def from_protection_zones(cls, protection_zones, **options):
+        validator = cls(**options)
+        for zone in protection_zones.protection_zones:
+            if zone.is_enabled:
+                validator.add_protection_zone(zone)
+        return validator
+
+    # This function adds a ProtectionZone or ProtectionZoneConfig message
+    def add_protection_zone(self, zone):
+        shape = zone.shape
+        rows = (shape.orientation.row1, shape.orientation.row2, shape.orientation.row3)
+        rotation = [[row.column1, row.column2, row.column3] for row in rows]
+        # An unset orientation is the identity
+        if not np.any(rotation):
+            rotation = None
+        self.add_zone(shape.shape_type, (shape.origin.x, shape.origin.y, shape.origin.z), list(shape.dimensions), rotation, zone.name)
+
+    # This function adds a protection zone centered on 'origin' (meters, base frame). 'dimensions' are the radius
+    # and height of a cylinder (along the z axis of the zone), the radius of a sphere or the x, y and z sizes of a
+    # rectangular prism. 'rotation' is the 3x3 rotation matrix of the zone in the base frame.
+    def add_zone(self, shape_type, origin, dimensions, rotation=None, name=""):
+        expected = {SHAPE_TYPE_CYLINDER: 2, SHAPE_TYPE_SPHERE: 1, SHAPE_TYPE_RECTANGULAR_PRISM: 3}
+        if shape_type not in expected:
+            raise ValueError("Unknown protection zone shape type: {}".format(shape_type))
+        if len(dimensions) != expected[shape_type]:
+            raise ValueError("A zone of shape type {} needs {} dimensions".format(shape_type, expected[shape_type]))
+        rotation = np.eye(3) if rotation is None else np.asarray(rotation, dtype=np.float64)
+        self.zones.append((name, shape_type, np.asarray(origin, dtype=np.float64), rotation, np.asarray(dimensions, dtype=np.float64)))
+
+    # This function returns a mask of the points (shape (N, 3)) inside the zone
+    @staticmethod
+    def _inside(zone, points):
+        name, shape_type, origin, rotation, dimensions = zone
+        local = (points - origin) @ rotation
+        if shape_type == SHAPE_TYPE_SPHERE:
+            return np.einsum("ij,ij->i", local, local) <= dimensions[0] ** 2
+        if shape_type == SHAPE_TYPE_CYLINDER:
+            return (local[:, 0] ** 2 + local[:, 1] ** 2 <= dimensions[0] ** 2) & (np.abs(local[:, 2]) <= dimensions[1] / 2)
+        return np.all(np.abs(local) <= dimensions / 2, axis=1)
+
+    # This function returns points sampled every 'zone_resolution' meters on the polyline through 'points', with the
+    # index of the waypoint ending the segment of each sample
+    def _sample_path(self, points, ends):
+        starts = points[:-1]
+        stops = points[1:]
+        lengths = np.linalg.norm(stops - starts, axis=1)
+        counts = np.maximum(np.ceil(lengths / self.zone_resolution).astype(np.int64), 1)
+        segment = np.repeat(np.arange(len(starts)), counts)
+        fraction = (np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts) + 1) / counts[segment]
+        samples = starts[segment] + (stops - starts)[segment] * fraction[:, np.newaxis]
+        return samples, ends[segment]
+
+    # This function checks positions (waypoints and via points) against the reach and the protection zones.
+    # 'path' and 'path_ends' are the polyline followed by the arm and the waypoint index of each of its vertices.
+    def _check_positions(self, positions, indices, path, path_ends, errors):
+
+        distances = np.linalg.norm(positions - self.base_origin, axis=1)
+        for i in np.flatnonzero(distances > self.reach).tolist():
+            errors.append(WaypointError(int(indices[i]), "reach", "position at {:.3f} m from the base, out of the {:.3f} m reach".format(distances[i], self.reach)))
+
+        if not self.zones:
+            return
+        samples, sample_ends = self._sample_path(path, path_ends) if len(path) > 1 else (path, path_ends)
+        for zone in self.zones:
+            name = zone[0] or "protection zone"
+            inside = self._inside(zone, positions)
+            for i in np.flatnonzero(inside).tolist():
+                errors.append(WaypointError(int(indices[i]), "protection_zone", "position inside {}".format(name)))
+            crossing = set(sample_ends[self._inside(zone, samples)].tolist()) - set(indices[inside].tolist())
+            for index in sorted(crossing):
+                errors.append(WaypointError(int(index), "protection_zone", "path to the waypoint crosses {}".format(name)))
+
+    # This function checks (N, 6) poses (x, y, z, theta_x, theta_y, theta_z) within the reach against the workspace
+    # index, if any
+    def _check_workspace(self, poses, indices, errors):
+        if self.workspace is None or not len(poses):
+            return
+        poses = poses - np.append(self.base_origin, np.zeros(3))
+        within = np.linalg.norm(poses[:, :3], axis=1) <= self.reach
+        for i in np.flatnonzero(within & ~self.workspace.reachable(poses)).tolist():
+            errors.append(WaypointError(int(indices[i]), "workspace", "pose out of the workspace index: its wrist point is never reached"))
+
+    # This function returns the report of 'errors', marking the errors of the advisory checks
+    def _report(self, errors):
+        for error in errors:
+            error.advisory = error.check in self.advisory
+        return ValidationReport(errors)
+
+    # This function checks the blending radius of each waypoint against the distances to its neighbours
+    @staticmethod
+    def _check_blending_radii(positions, radii, errors):
+        for i in np.flatnonzero(radii < 0).tolist():
+            errors.append(WaypointError(i, "blending", "negative blending radius {:.4f} m".format(radii[i])))
+        if len(positions) < 2:
+            return
+        gaps = np.linalg.norm(np.diff(positions, axis=0), axis=1)
+        # Distance to the closest neighbour of each waypoint, ignoring the neighbours with non-finite positions
+        closest = np.fmin(np.append(gaps, np.inf), np.insert(gaps, 0, np.inf))
+        for i in np.flatnonzero(radii > closest / 2).tolist():
+            errors.append(WaypointError(i, "blending_distance", "blending radius {:.4f} m larger than half the {:.4f} m to a neighbouring waypoint".format(radii[i], closest[i])))
+
+    # This function checks the non-finite values of 'values', rows with one are excluded from the other checks
+    @staticmethod
+    def _check_finite(values, errors):
+        finite = np.all(np.isfinite(values), axis=1)
+        for i in np.flatnonzero(~finite).tolist():
+            errors.append(WaypointError(i, "finite", "non-finite value"))
+        return finite
+
+    # This function checks an (N, 7) array of Cartesian waypoints (command_batch.CARTESIAN_WAYPOINT_FIELDS order)
+    def check_cartesian(self, poses):
+
+        poses = np.asarray(poses, dtype=np.float64)
+        if poses.ndim != 2 or poses.shape[1] != len(CARTESIAN_WAYPOINT_FIELDS):
+            raise ValueError("The poses must be an (N, {}) array".format(len(CARTESIAN_WAYPOINT_FIELDS)))
+
+        errors = []
+        finite = self._check_finite(poses, errors)
+        indices = np.flatnonzero(finite)
+        positions = poses[finite][:, _POSITION]
+
+        self._check_positions(positions, indices, positions, indices, errors)
+        self._check_workspace(poses[finite][:, _POSE], indices, errors)
+        self._check_blending_radii(poses[:, _POSITION], np.where(finite, poses[:, _BLENDING_RADIUS], 0.0), errors)
+        return self._report(errors)
+
+    # This function checks an (N, joints) array of joint angles in degrees and their blending, a scalar or one value
+    # per waypoint
+    def check_angular(self, angles, blending=1.0):
+
+        angles = np.asarray(angles, dtype=np.float64)
+        if angles.ndim != 2:
+            raise ValueError("The angles must be an (N, joints) array")
+        blending = np.broadcast_to(np.asarray(blending, dtype=np.float64), (len(angles),))
+
+        errors = []
+        if angles.shape[1] != len(self.joint_limits):
+            return self._report([WaypointError(i, "joint_count", "{} angles for {} joints".format(angles.shape[1], len(self.joint_limits))) for i in range(len(angles))])
+
+        finite = self._check_finite(np.column_stack((angles, blending)), errors)
+        low = finite[:, np.newaxis] & (angles < self.joint_limits[:, 0])
+        high = finite[:, np.newaxis] & (angles > self.joint_limits[:, 1])
+        for i, joint in zip(*np.nonzero(low | high)):
+            minimum, maximum = self.joint_limits[joint]
+            errors.append(WaypointError(int(i), "joint_limits", "joint {} at {:.2f} deg, out of [{:.1f}, {:.1f}]".format(joint + 1, angles[i, joint], minimum, maximum)))
+        for i in np.flatnonzero(finite & ((blending < 0) | (blending > 1))).tolist():
+            errors.append(WaypointError(i, "blending", "blending {:.3f} out of [0, 1]".format(blending[i])))
+
+        return self._report(errors)
+
+    # This function checks an (N, 13) array of toolpath waypoints (command_batch.TOOLPATH_FIELDS order) and the type
+    # code of each row, command_batch.TOOLPATH_SEGMENT or TOOLPATH_ARC
+    def check_toolpath(self, points, kinds):
+
+        points = np.asarray(points, dtype=np.float64)
+        if points.ndim != 2 or points.shape[1] != len(TOOLPATH_FIELDS):
+            raise ValueError("The toolpath points must be an (N, {}) array".format(len(TOOLPATH_FIELDS)))
+        kinds = np.asarray(kinds)
+        if kinds.shape != (len(points),):
+            raise ValueError("A type code is needed for each of the {} toolpath points".format(len(points)))
+
+        errors = []
+        arcs = kinds == TOOLPATH_ARC
+        segments = kinds == TOOLPATH_SEGMENT
+        for i in np.flatnonzero(~(arcs | segments)).tolist():
+            errors.append(WaypointError(i, "toolpath", "unknown toolpath type code {}".format(kinds[i])))
+        if len(points) and not segments[0]:
+            errors.append(WaypointError(0, "toolpath", "a toolpath must start with a straight segment"))
+
+        # The arc columns of segments are not used
+        used = np.where(segments[:, np.newaxis], np.arange(len(TOOLPATH_FIELDS)) < len(SEGMENT_FIELDS), True)
+        finite = self._check_finite(np.where(used, points, 0.0), errors)
+
+        for column, name in ((_LINEAR_SPEED, "linear speed"), (_LINEAR_ACCELERATION, "linear acceleration")):
+            for i in np.flatnonzero(finite & ~(points[:, column] > 0)).tolist():
+                errors.append(WaypointError(i, "toolpath", "{} {:.4f} must be greater than 0".format(name, points[i, column])))
+        for i in np.flatnonzero(finite & arcs & ~(points[:, _ANGULAR_ACCELERATION] > 0)).tolist():
+            errors.append(WaypointError(i, "toolpath", "angular acceleration {:.4f} must be greater than 0".format(points[i, _ANGULAR_ACCELERATION])))
+
+        positions = points[:, _POSITION]
+        via_points = points[:, _VIA_POINT]
+
+        # An arc starts at the previous waypoint and goes through its via point to its end: the via point must be off
+        # the chord between them
+        starts = np.roll(positions, 1, axis=0)
+        chords = positions - starts
+        chord_lengths = np.linalg.norm(chords, axis=1)
+        offsets = np.linalg.norm(np.cross(via_points - starts, chords), axis=1) / np.where(chord_lengths > 0, chord_lengths, 1.0)
+        degenerate = arcs & finite & np.roll(finite, 1) & ((chord_lengths < _ARC_TOLERANCE) | (offsets < _ARC_TOLERANCE))
+        if len(degenerate):
+            degenerate[0] = False
+        for i in np.flatnonzero(degenerate).tolist():
+            errors.append(WaypointError(i, "toolpath", "arc via point aligned with the start and end points"))
+
+        # The path goes through the via points of the arcs, before their end point
+        usable = finite & np.all(np.isfinite(positions), axis=1)
+        rows = np.flatnonzero(usable)
+        path_arcs = arcs[rows]
+        path = np.empty((len(rows) + int(path_arcs.sum()), 3))
+        path_ends = np.empty(len(path), dtype=np.int64)
+        vertex = np.arange(len(rows)) + np.cumsum(path_arcs)
+        path[vertex] = positions[rows]
+        path_ends[vertex] = rows
+        path[vertex[path_arcs] - 1] = via_points[rows[path_arcs]]
+        path_ends[vertex[path_arcs] - 1] = rows[path_arcs]
+
+        checked = np.concatenate((positions[rows], via_points[rows[path_arcs]]))
+        checked_indices = np.concatenate((rows, rows[path_arcs]))
+        self._check_positions(checked, checked_indices, path, path_ends, errors)
+        self._check_workspace(points[rows][:, _POSE], rows, errors)
+        self._check_blending_radii(positions, np.where(finite, points[:, _BLENDING_RADIUS], 0.0), errors)
+
+        return self._report(errors)
+
+    # This function checks a Base_pb2.WaypointList, converted to the arrays of the other checks
+    def check_waypoint_list(self, waypoint_list):
+
+        waypoints = waypoint_list.waypoints
+        kinds = [waypoint.WhichOneof("type_of_waypoint") for waypoint in waypoints]
+        if not kinds:
+            return self._report([])
+
+        first = WAYPOINT_LIST_TYPES.get(kinds[0])
+        errors = [WaypointError(i, "waypoint_type", "{} waypoint in a {} list".format(kind, first)) for i, kind in enumerate(kinds) if WAYPOINT_LIST_TYPES.get(kind) != first]
+        if errors or first is None:
+            return self._report(errors or [WaypointError(0, "waypoint_type", "unsupported waypoint type {}".format(kinds[0]))])
+
+        if first == "angular":
+            counts = [len(waypoint.angular_waypoint.angles) for waypoint in waypoints]
+            if len(set(counts)) > 1:
+                return self._report([WaypointError(i, "joint_count", "{} angles for {} joints".format(count, len(self.joint_limits))) for i, count in enumerate(counts) if count != len(self.joint_limits)])
+
+        list_type, arrays = waypoint_list_arrays(waypoint_list)
+        checks = {"cartesian": self.check_cartesian, "angular": self.check_angular, "toolpath": self.check_toolpath}
+        return checks[list_type](*arrays)
@@ -0,0 +1,154 @@
+#! /usr/bin/env python3
+
+###
+# KINOVA (R) KORTEX (TM)
+#
+# Copyright (c) 2024 Kinova inc. All rights reserved.
+#
+# This software may be modified and distributed
+# under the terms of the BSD 3-Clause license.
+#
+# Refer to the LICENSE file for details.
+#
+###
+
+# Throughput and latency benchmark of the Kortex RPCs used in command and feedback loops.
+#
+# Each RPC is called 'count' times in a closed loop, either as fast as possible (rate=None) or paced by a
+# PeriodicLoop at a target rate. The duration of every call is stored, so the report gives the sustained rate,
+# the round-trip latency percentiles, the errors and the serialized size of the request and of the answer.
+# run_suite() benchmarks SendTwistCommand, SendJointSpeedsCommand and RefreshFeedback on the services of one
+# connection: running it on an MQTT and on a UDP connection gives the numbers to choose the transport of a cell.
+#
+# The commands sent are zero twists and zero joint speeds, the robot does not move.
+
+import time
+
+import numpy as np
+from kortex_api.autogen.messages import Base_pb2
+
+from periodic_loop import PeriodicLoop
+
+DEFAULT_COUNT = 1000
+DEFAULT_WARMUP = 20
+JOINT_COUNT = 6
+
+
+class BenchmarkResult:
+    """
+    Measurements of one RPC on one transport. 'latencies' are the durations of the successful calls in seconds,
+    'elapsed' the duration of the whole run, 'request_size' and 'response_size' the serialized sizes in bytes.
+    """
+
+    def __init__(self, transport, name, latencies, elapsed, errors, request_size, response_size, target_rate=None, overruns=0):
+        self.transport = transport
+        self.name = name
+        self.latencies = latencies
+        self.elapsed = elapsed
+        self.errors = errors
+        self.request_size = request_size
+        self.response_size = response_size
+        self.target_rate = target_rate
+        self.overruns = overruns
+
+    @property
+    def count(self):
+        return len(self.latencies) + self.errors
+
+    # Calls completed per second, errors included
+    @property
+    def rate(self):
+        return self.count / self.elapsed if self.elapsed > 0 else 0.0
+
+    # This function returns the latency below which 'q' percent of the successful calls fall, in seconds
+    def percentile(self, q):
+        return float(np.percentile(self.latencies, q)) if len(self.latencies) else float("nan")
+
+    def __str__(self):
+        return "{} {}: {:.0f} calls/s, latency p50 {:.3f} ms, p99 {:.3f} ms, max {:.3f} ms, errors: {}".format(
+            self.transport, self.name, self.rate, self.percentile(50) * 1e3, self.percentile(99) * 1e3,
+            self.latencies.max() * 1e3 if len(self.latencies) else float("nan"), self.errors)
+
+
+# This function calls 'function' with 'arguments' 'count' times, as fast as possible or at 'rate' (in Hz), after
+# 'warmup' calls that are not measured. It returns a BenchmarkResult.
+def benchmark(transport, name, function, arguments=(), count=DEFAULT_COUNT, rate=None, warmup=DEFAULT_WARMUP):
+
+    request_size = sum(argument.ByteSize() for argument in arguments)
+    response = None
+    for i in range(warmup):
+        try:
+            response = function(*arguments)
+        except Exception:
+            pass
+
+    latencies = np.empty(count)
+    successes = 0
+    errors = 0
+    loop = PeriodicLoop(1.0 / rate) if rate else None
+
+    start = time.perf_counter()
+    ticks = loop.ticks(count) if loop else range(count)
+    for i in ticks:
+        call_start = time.perf_counter()
+        try:
+            response = function(*arguments)
+        except Exception:
+            errors += 1
+            continue
+        latencies[successes] = time.perf_counter() - call_start
+        successes += 1
+    elapsed = time.perf_counter() - start
+
+    response_size = response.ByteSize() if hasattr(response, "ByteSize") else 0
+    overruns = loop.overruns if loop else 0
+    return BenchmarkResult(transport, name, latencies[:successes], elapsed, errors, request_size, response_size, rate, overruns)
+
+
+# This function benchmarks the command and feedback RPCs of the services of one connection
+def run_suite(transport, base, base_cyclic, count=DEFAULT_COUNT, rate=None):
+
+    twist_command = Base_pb2.TwistCommand()
+    twist_command.reference_frame = Base_pb2.CARTESIAN_REFERENCE_FRAME_BASE
+    twist_command.twist.linear_x = 0.0
+
+    joint_speeds = Base_pb2.JointSpeeds()
+    for i in range(JOINT_COUNT):
+        joint_speed = joint_speeds.joint_speeds.add()
+        joint_speed.joint_identifier = i
+        joint_speed.value = 0.0
+
+    results = [
+        benchmark(transport, "SendTwistCommand", base.SendTwistCommand, (twist_command,), count, rate),
+        benchmark(transport, "SendJointSpeedsCommand", base.SendJointSpeedsCommand, (joint_speeds,), count, rate),
+        benchmark(transport, "RefreshFeedback", base_cyclic.RefreshFeedback, (), count, rate),
+    ]
+    # The last command is a zero speed command, it is cleared
+    try:
+        base.Stop()
+    except Exception:
+        pass
+    return results
+
+
+# This function returns the results as a text table
+def format_results(results):
+    header = ("Transport", "RPC", "Target (Hz)", "Rate (Hz)", "p50 (ms)", "p90 (ms)", "p99 (ms)", "Max (ms)", "Errors", "Overruns", "Request (B)", "Answer (B)")
+    rows = [header]
+    for result in results:
+        rows.append((
+            result.transport,
+            result.name,
+            "{:.0f}".format(result.target_rate) if result.target_rate else "max",
+            "{:.0f}".format(result.rate),
+            "{:.3f}".format(result.percentile(50) * 1e3),
+            "{:.3f}".format(result.percentile(90) * 1e3),
+            "{:.3f}".format(result.percentile(99) * 1e3),
+            "{:.3f}".format(result.latencies.max() * 1e3) if len(result.latencies) else "nan",
+            str(result.errors),
+            str(result.overruns),
+            str(result.request_size),
+            str(result.response_size),
+        ))
+    widths = [max(len(row[i]) for row in rows) for i in range(len(header))]
+    return "\n".join("  ".join(value.rjust(width) for value, width in zip(row, widths)) for row in rows)
@@ -69,6 +69,19 @@ class DeviceConnection:
             credentials=(args.username, args.password),
         )
 
+    @staticmethod
+    def createSimulatedConnection(**simulatorOptions):
+        """
+        returns a SimulatedRobot that stands in for the RouterClient when no robot is available (see simulator.py).
+        The simulator is not a transport: the kortex_api clients can not be created on it with e.g. BaseClient(router),
+        services must be created with simulator.create_client(), e.g. create_client(BaseClient, router).
+        simulatorOptions are the arguments of SimulatedRobot (latency, jitter, ...).
+        """
+
+        import simulator
+
+        return simulator.SimulatedRobot(**simulatorOptions)
+
     def __init__(self, ipAddress: str = DEFAULT_IP, port: int = MQTT_PORT, credentials=("", "")):
 
         self.ipAddress = ipAddress
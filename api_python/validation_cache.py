@@ -0,0 +1,213 @@
+#! /usr/bin/env python3
+
+###
+# KINOVA (R) KORTEX (TM)
+#
+# Copyright (c) 2024 Kinova inc. All rights reserved.
+#
+# This software may be modified and distributed
+# under the terms of the BSD 3-Clause license.
+#
+# Refer to the LICENSE file for details.
+#
+###
+
+# Content-addressed cache of base.ValidateWaypointList() results.
+#
+# The validation of a waypoint list only depends on the list and on the configuration of the robot (tool and
+# protection zones). The cache key is the SHA-256 of the deterministic serialization of the list, prefixed by a
+# fingerprint of that configuration, so the same trajectory validated by another run or process is found again and
+# any change of the list, the tool or the zones gives a new key.
+#
+# Reports are kept in memory in LRU order and, when a directory is given, in one file per key written atomically
+# (temporary file then rename), so several processes can share the directory. Beyond 'disk_capacity' files, the
+# least recently used ones are removed down to DISK_EVICTION_RATIO of the capacity: the directory is only scanned
+# once every many puts, not on each of them.
+#
+# Typical use:
+#
+#   fingerprint = robot_fingerprint(tool_manager, protection_zone_client)
+#   cache = ValidationCache(DEFAULT_DIRECTORY, fingerprint=fingerprint)
+#   result = cache.validate(base, waypoint_list)
+
+import collections
+import hashlib
+import os
+import tempfile
+import threading
+
+from kortex_api.autogen.messages import Base_pb2
+
+DEFAULT_CAPACITY = 1000  # reports kept in memory
+DEFAULT_DISK_CAPACITY = 100000  # report files kept in the directory
+DISK_EVICTION_RATIO = 0.9  # share of the disk capacity kept by an eviction
+REPORT_SUFFIX = ".report"
+
+# Directory shared by the runs of the examples, in the user cache directory rather than in the source tree
+DEFAULT_DIRECTORY = os.path.join(os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache"), "kortex", "validation")
+
+
+# This function returns the fingerprint of configuration messages (e.g. tools information and protection zones),
+# as the SHA-256 of their deterministic serialization
+def configuration_fingerprint(*messages):
+    digest = hashlib.sha256()
+    for message in messages:
+        payload = message.SerializeToString(deterministic=True)
+        digest.update(message.DESCRIPTOR.full_name.encode())
+        digest.update(len(payload).to_bytes(8, "little"))
+        digest.update(payload)
+    return digest.hexdigest()
+
+
+# This function returns the fingerprint of the tool and protection zone configuration of the robot
+def robot_fingerprint(tool_manager, protection_zone_client):
+    return configuration_fingerprint(tool_manager.GetAllToolsInformation(), protection_zone_client.ReadAllProtectionZones())
+
+
+class ValidationCache:
+    """
+    Cache of WaypointValidationReport messages keyed by waypoint list and robot configuration 'fingerprint'
+    (see robot_fingerprint()). 'directory', when given, persists the reports across runs and processes.
+    'hits' and 'misses' count the lookups.
+    """
+
+    def __init__(self, directory=None, fingerprint="", capacity=DEFAULT_CAPACITY, disk_capacity=DEFAULT_DISK_CAPACITY):
+
+        if capacity < 1 or disk_capacity < 1:
+            raise ValueError("The cache capacities must be at least 1")
+
+        self.directory = directory
+        self.fingerprint = fingerprint
+        self.capacity = capacity
+        self.disk_capacity = disk_capacity
+
+        self.hits = 0
+        self.misses = 0
+
+        self._reports = collections.OrderedDict()
+        self._lock = threading.Lock()
+        # Number of report files, counted by the first put() and recounted by each eviction (other processes may
+        # add files meanwhile)
+        self._file_count = None
+        if directory is not None:
+            os.makedirs(directory, exist_ok=True)
+
+    # This function returns the cache key of a waypoint list
+    def key(self, waypoint_list):
+        digest = hashlib.sha256(self.fingerprint.encode())
+        digest.update(b"\0")
+        digest.update(waypoint_list.SerializeToString(deterministic=True))
+        return digest.hexdigest()
+
+    def _path(self, key):
+        return os.path.join(self.directory, key + REPORT_SUFFIX)
+
+    # This function returns the cached report of a waypoint list, or None
+    def get(self, waypoint_list):
+        key = self.key(waypoint_list)
+        with self._lock:
+            payload = self._reports.get(key)
+            if payload is not None:
+                self._reports.move_to_end(key)
+
+        if payload is None and self.directory is not None:
+            try:
+                with open(self._path(key), "rb") as file:
+                    payload = file.read()
+                # The modification time of the files is their last use, for the eviction
+                os.utime(self._path(key))
+            except FileNotFoundError:
+                payload = None
+            if payload is not None:
+                self._remember(key, payload)
+
+        with self._lock:
+            if payload is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+        return Base_pb2.WaypointValidationReport.FromString(payload)
+
+    # This function stores the validation report of a waypoint list
+    def put(self, waypoint_list, report):
+        key = self.key(waypoint_list)
+        payload = report.SerializeToString(deterministic=True)
+        self._remember(key, payload)
+
+        if self.directory is not None:
+            path = self._path(key)
+            new = not os.path.exists(path)
+            descriptor, temporary = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+            with os.fdopen(descriptor, "wb") as file:
+                file.write(payload)
+            os.replace(temporary, path)
+            with self._lock:
+                if self._file_count is None:
+                    self._file_count = self._count_files()
+                elif new:
+                    self._file_count += 1
+                evict = self._file_count > self.disk_capacity
+            if evict:
+                self._evict_files()
+
+    # This function returns the validation report of a waypoint list from the cache, or from
+    # base.ValidateWaypointList() on a miss
+    def validate(self, base, waypoint_list):
+        report = self.get(waypoint_list)
+        if report is None:
+            report = base.ValidateWaypointList(waypoint_list)
+            self.put(waypoint_list, report)
+        return report
+
+    # This function removes every report, in memory and on disk
+    def clear(self):
+        with self._lock:
+            self._reports.clear()
+        if self.directory is not None:
+            for name in os.listdir(self.directory):
+                if name.endswith(REPORT_SUFFIX):
+                    self._remove(os.path.join(self.directory, name))
+            with self._lock:
+                self._file_count = 0
+
+    def __len__(self):
+        if self.directory is not None:
+            return self._count_files()
+        return len(self._reports)
+
+    def _count_files(self):
+        return sum(1 for name in os.listdir(self.directory) if name.endswith(REPORT_SUFFIX))
+
+    def _remember(self, key, payload):
+        with self._lock:
+            self._reports[key] = payload
+            self._reports.move_to_end(key)
+            while len(self._reports) > self.capacity:
+                self._reports.popitem(last=False)
+
+    # This function removes the least recently used report files, down to DISK_EVICTION_RATIO of the disk capacity
+    def _evict_files(self):
+        files = []
+        with os.scandir(self.directory) as entries:
+            for entry in entries:
+                if entry.name.endswith(REPORT_SUFFIX):
+                    try:
+                        files.append((entry.stat().st_mtime_ns, entry.path))
+                    except FileNotFoundError:
+                        pass
+        kept = len(files)
+        if kept > self.disk_capacity:
+            files.sort()
+            kept = max(int(self.disk_capacity * DISK_EVICTION_RATIO), 1)
+            for mtime, path in files[: len(files) - kept]:
+                self._remove(path)
+        with self._lock:
+            self._file_count = kept
+
+    # This function removes a file, another process may have removed it already
+    @staticmethod
+    def _remove(path):
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
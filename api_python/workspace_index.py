@@ -0,0 +1,196 @@
+#! /usr/bin/env python3
+
+###
+# KINOVA (R) KORTEX (TM)
+#
+# Copyright (c) 2024 Kinova inc. All rights reserved.
+#
+# This software may be modified and distributed
+# under the terms of the BSD 3-Clause license.
+#
+# Refer to the LICENSE file for details.
+#
+###
+
+# Precomputed reachability index of the workspace.
+#
+# build() samples configurations of a kinematics.KinematicModel in batches and stores, per voxel of a regular 3D grid
+# of wrist points (KinematicModel.wrist_points(), the wrist center of Link 6):
+#
+#   - samples: the number of sampled configurations with their wrist point in the voxel, 0 for a voxel never reached
+#   - manipulability: the best manipulability sqrt(det(J J^T)) among them
+#   - seed: the joint angles of that configuration
+#
+# The wrist point of a target pose follows from the pose alone, so a lookup is an index computation, for any number
+# of poses at once. The joints of the wrist (KinematicModel.wrist_joints()) do not move the wrist point: the seed of a
+# pose takes the other joints from the voxel, which place the wrist well away from singularities, and the wrist
+# joints from a guess, a warm start converging in about half the iterations of a fixed guess.
+#
+# The file has the layout of the feedback logs:
+#
+#   magic (8 bytes) | header size (uint32) | JSON header | padding up to DATA_ALIGNMENT | voxels
+#
+# The JSON header holds the grid (origin, resolution, shape), the record dtype and the kinematic model the index was
+# built with. WorkspaceIndex maps the voxels with numpy.memmap, so opening an index reads nothing but the header.
+#
+# Reachability is sampled: a pose whose wrist point is in a voxel without samples is out of the workspace, or was
+# missed by the sampling (use enough samples for the resolution, about ten per voxel of the workspace). A pose in a
+# reached voxel may still be out of the joint limits of the wrist, or in a self-collision.
+#
+# Typical use:
+#
+#   index = build(kinematics.KinematicModel(), "workspace.idx", resolution=0.02, samples=5000000)
+#   index = WorkspaceIndex("workspace.idx")
+#   reachable = index.reachable(poses)
+#   result = index.model.inverse(poses[reachable], guess=index.seeds(poses[reachable]), path=False)
+
+import json
+import os
+
+import numpy as np
+
+from kinematics import KinematicModel, matrix_poses, pose_matrices
+
+MAGIC = b"KWSIDX01"
+DATA_ALIGNMENT = 4096
+DEFAULT_RESOLUTION = 0.02  # meters
+DEFAULT_SAMPLES = 2000000
+DEFAULT_CHUNK_SIZE = 100000  # configurations sampled at once
+
+
+# This function returns the dtype of the voxels of an arm with 'joint_count' joints
+def voxel_dtype(joint_count):
+    return np.dtype([("samples", np.uint32), ("manipulability", np.float32), ("seed", np.float32, (joint_count,))])
+
+
+# This function returns the bounds (minimum and maximum corners) of a cube containing every wrist point of 'model':
+# the lengths of the chain up to the last joint around the origin of the base
+def model_bounds(model):
+    reach = np.abs(model.dh_parameters[:-1, [0, 2]]).sum()
+    return np.full(3, -reach), np.full(3, reach)
+
+
+# This function samples 'samples' configurations of 'model', writes the index of its workspace to 'path' and returns
+# the WorkspaceIndex. 'bounds' is the (minimum, maximum) corners of the grid, model_bounds() by default.
+def build(model, path, resolution=DEFAULT_RESOLUTION, samples=DEFAULT_SAMPLES, bounds=None, seed=None, chunk_size=DEFAULT_CHUNK_SIZE):
+
+    if resolution <= 0:
+        raise ValueError("The resolution must be greater than 0")
+
+    lower, upper = model_bounds(model) if bounds is None else (np.asarray(bound, dtype=np.float64) for bound in bounds)
+    shape = tuple(int(n) for n in np.maximum(np.ceil((upper - lower) / resolution), 1))
+    count = int(np.prod(shape))
+
+    voxels = np.zeros(count, dtype=voxel_dtype(model.joint_count))
+    best = np.full(count, -1.0)
+    random = np.random.default_rng(seed)
+    # One turn of each joint: the other turns reach the same poses, and seeds close to 0 make short inverse solutions
+    lower_limits, upper_limits = np.clip(model.joint_limits, -180.0, 180.0).T
+
+    for start in range(0, samples, chunk_size):
+        joint_angles = random.uniform(lower_limits, upper_limits, size=(min(chunk_size, samples - start), model.joint_count))
+        wrist_points = model.wrist_points(model.forward_matrices(joint_angles))
+        manipulability = model.manipulability(joint_angles)
+
+        cells = np.floor((wrist_points - lower) / resolution).astype(np.int64)
+        inside = np.all((cells >= 0) & (cells < shape), axis=1)
+        flat = np.ravel_multi_index(cells[inside].T, shape)
+        joint_angles, manipulability = joint_angles[inside], manipulability[inside]
+        voxels["samples"] += np.bincount(flat, minlength=count).astype(np.uint32)
+
+        # Best configuration of each voxel in the chunk: sorted by voxel then decreasing manipulability
+        order = np.lexsort((-manipulability, flat))
+        cells, first = np.unique(flat[order], return_index=True)
+        candidates = order[first]
+        better = manipulability[candidates] > best[cells]
+        cells, candidates = cells[better], candidates[better]
+        best[cells] = manipulability[candidates]
+        voxels["manipulability"][cells] = manipulability[candidates]
+        voxels["seed"][cells] = joint_angles[candidates]
+
+    header = {
+        "origin": lower.tolist(),
+        "resolution": resolution,
+        "shape": list(shape),
+        "dtype": [list(field) for field in voxels.dtype.descr],
+        "dh_parameters": model.dh_parameters.tolist(),
+        "tool": matrix_poses(model.tool[np.newaxis])[0].tolist(),
+        "joint_limits": model.joint_limits.tolist(),
+        "wrist_joints": model.wrist_joints(),
+        "samples": samples,
+        "data_offset": 0,
+    }
+    # The data offset is part of the header, so the header size is computed with a large enough placeholder
+    size = len(json.dumps(dict(header, data_offset=2 ** 40)).encode("utf-8"))
+    header["data_offset"] = -(-(len(MAGIC) + 4 + size) // DATA_ALIGNMENT) * DATA_ALIGNMENT
+    encoded = json.dumps(header).encode("utf-8")
+
+    # Written to a temporary file then renamed, so readers never map a partial index
+    temporary = path + ".tmp"
+    with open(temporary, "wb") as file:
+        file.write(MAGIC)
+        file.write(len(encoded).to_bytes(4, "little"))
+        file.write(encoded)
+        file.write(b"\0" * (header["data_offset"] - file.tell()))
+        file.write(voxels.tobytes())
+    os.replace(temporary, path)
+
+    return WorkspaceIndex(path)
+
+
+class WorkspaceIndex:
+    """
+    Read-only view of a workspace index file. 'voxels' is a numpy.memmap structured array of the grid, of shape
+    'shape', the voxel (i, j, k) covering the wrist points origin + resolution * [(i, j, k), (i + 1, j + 1, k + 1)).
+    'model' is the KinematicModel the index was built with. Poses are (N, 6) arrays (x, y, z, theta_x, theta_y,
+    theta_z) in the base frame of the model.
+    """
+
+    def __init__(self, path):
+
+        self.path = path
+        with open(path, "rb") as file:
+            if file.read(len(MAGIC)) != MAGIC:
+                raise ValueError("Not a workspace index file")
+            header_size = int.from_bytes(file.read(4), "little")
+            self.header = json.loads(file.read(header_size).decode("utf-8"))
+
+        self.origin = np.asarray(self.header["origin"], dtype=np.float64)
+        self.resolution = self.header["resolution"]
+        self.shape = tuple(self.header["shape"])
+        self.dtype = np.dtype([tuple(field[:2]) + ((tuple(field[2]),) if len(field) > 2 else ()) for field in self.header["dtype"]])
+        self.voxels = np.memmap(path, dtype=self.dtype, mode="r", offset=self.header["data_offset"], shape=self.shape)
+        self.model = KinematicModel(self.header["dh_parameters"], tool=self.header["tool"], joint_limits=self.header["joint_limits"])
+        self.wrist_joints = self.header["wrist_joints"]
+
+    # This function returns the voxel records of poses and the mask of the poses with their wrist point inside the
+    # grid. The records of the poses outside the grid are zeros.
+    def lookup(self, poses):
+        cells = np.floor((self.model.wrist_points(pose_matrices(poses)) - self.origin) / self.resolution).astype(np.int64)
+        inside = np.all((cells >= 0) & (cells < self.shape), axis=1)
+        records = np.zeros(len(cells), dtype=self.dtype)
+        records[inside] = self.voxels[tuple(cells[inside].T)]
+        return records, inside
+
+    # This function returns the mask of the poses with their wrist point in a voxel reached by the sampling
+    def reachable(self, poses):
+        records, inside = self.lookup(poses)
+        return inside & (records["samples"] > 0)
+
+    # This function returns the (N, joints) inverse kinematics seeds of poses, NaN for unreachable poses. The wrist
+    # joints take the angles of 'guess', a scalar or one value per joint.
+    def seeds(self, poses, guess=0.0):
+        records, inside = self.lookup(poses)
+        seeds = records["seed"].astype(np.float64)
+        seeds[:, self.wrist_joints] = np.broadcast_to(np.asarray(guess, dtype=np.float64), (self.model.joint_count,))[self.wrist_joints]
+        seeds[~(inside & (records["samples"] > 0))] = np.nan
+        return seeds
+
+    # This function returns the best manipulability sampled in the voxels of poses, 0 when unreachable
+    def manipulability(self, poses):
+        return self.lookup(poses)[0]["manipulability"].astype(np.float64)
+
+    def __str__(self):
+        reached = int(np.count_nonzero(self.voxels["samples"]))
+        return "Workspace index: {} voxels of {:.3f} m, {} reached by the wrist ({:.3f} m^3), {} samples".format(
+            int(np.prod(self.shape)), self.resolution, reached, reached * self.resolution ** 3, self.header["samples"])